@@ -1,10 +1,18 @@
 import os
 import re
-from openai import OpenAI
+import sys
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+try:
+    from edumuse.tools.llm_gateway import get_gateway
+except ImportError:
+    # Standalone runs of the pipeline: make the EduMUSE package importable
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "edumuse", "src"))
+    from edumuse.tools.llm_gateway import get_gateway
+
+# Shared with the CrewAI flows: one rate limiter, retry policy and connection pool
+gateway = get_gateway()
 import requests
 
 from bs4 import BeautifulSoup
@@ -83,7 +91,7 @@ class SpeechToTextAgent:
         """
         try:
             with open(audio_path, "rb") as audio_file:
-                resp = client.audio.transcribe(model=self.model,
+                resp = gateway.client.audio.transcribe(model=self.model,
                 file=audio_file)
             return resp.get("text", "")
         except Exception as e:
@@ -214,6 +222,10 @@ class RetrievalAgent:
         self.top_k = top_k
 
     def __call__(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Passages already retrieved by the caller (e.g. the corpus index) are used as-is
+        if context.get("retrieved_snippets") is not None:
+            return context
+
         qobj = context.get("question_object", {})
         source = qobj.get("context_source")
         snippets: List[str] = []
@@ -284,14 +296,14 @@ class AnswerGenerationAgent:
 
     def _call_llm(self, prompt: str) -> str:
         try:
-            response = client.chat.completions.create(model=self.model,
+            response = gateway.chat(model=self.model,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": prompt},
             ],
             temperature=0.2,
             max_tokens=512)
-            return response.choices[0].message.content.strip()
+            return response.strip()
         except Exception as e:
             return f"<LLM call failed: {str(e)}>"
 
@@ -343,14 +355,14 @@ class VerificationAgent:
             f"If not, respond 'NO' and briefly explain which part is not supported."
         )
         try:
-            resp = client.chat.completions.create(model=self.model,
+            resp = gateway.chat(model=self.model,
             messages=[
                 {"role": "system", "content": "You are a helpful fact-checking assistant."},
                 {"role": "user", "content": verification_prompt},
             ],
             temperature=0.0,
             max_tokens=150)
-            verdict_text = resp.choices[0].message.content.strip()
+            verdict_text = resp.strip()
             if verdict_text.upper().startswith("YES"):
                 return True, None
             else:
@@ -446,7 +458,7 @@ Content:
         """
 
         try:
-            response = client.chat.completions.create(
+            response = gateway.chat(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a quiz creator for educational purposes."},
@@ -455,7 +467,7 @@ Content:
                 temperature=0.4,
                 max_tokens=1500
             )
-            quiz_text = response.choices[0].message.content.strip()
+            quiz_text = response.strip()
 
             # Save to PDF
             pdf_path = "quiz_output.pdf"
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 from agents.agents import (
     InputDetectionAgent,
     SpeechToTextAgent,
@@ -30,12 +30,15 @@ class MultiAgentOrchestrator:
         self.tts_agent = TTSAagent()
         self.quiz_agent = QuizAgent()
 
-    def run(self, user_input: Any, request_tts: bool = False) -> Dict[str, Any]:
+    def run(self, user_input: Any, request_tts: bool = False,
+            retrieved_snippets: Optional[List[str]] = None) -> Dict[str, Any]:
         # Initialize context with user input
         context: Dict[str, Any] = {
             "user_input": user_input,
             "request_tts": request_tts,
         }
+        if retrieved_snippets is not None:
+            context["retrieved_snippets"] = retrieved_snippets
 
         # Detect input type
         context = self.input_detector(context)
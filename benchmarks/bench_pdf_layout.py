@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Benchmark PDFGenerator layout on generated assessments of growing size
+
+Renders the student assessment and the answer key for synthetic assessments of
+10, 100 and 1000 questions, plus a summary of the same length written without a
+single blank line (like extracted PDF text or dense LLM output), and reports wall
+time and peak Python allocations.
+Linear layout shows up as a constant time per question; streamed layout shows
+up as a peak that barely moves while the document grows 100x.
+
+    python benchmarks/bench_pdf_layout.py
+    python benchmarks/bench_pdf_layout.py --sizes 10 100 1000 5000 --output pdf_layout.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'edumuse', 'src'))
+
+from edumuse.tools.pdf_generator import PDFGenerator
+
+QUESTION_TEMPLATE = """Question {n}: [Multiple Choice - Apply - Medium]
+Concept: Scaled dot-product attention
+Time: 1-2 minutes
+
+Which statement about the scaling factor in attention variant {n} is correct?
+A) It divides the dot products by sqrt(d_k)
+B) It replaces the softmax with a recurrence
+C) It removes the need for key vectors
+D) It is only used in convolutional layers
+Correct Answer: A
+Explanation: Scaling by sqrt(d_k) keeps the softmax out of regions with tiny gradients.
+- Common misconception: scaling changes which key gets the highest weight
+"""
+
+
+SUMMARY_LINE = "Sentence {n} of the summary explains how attention weights the values by query-key similarity."
+# Roughly the number of text lines one question of the assessment takes
+SUMMARY_LINES_PER_QUESTION = 10
+
+
+def synthetic_summary(num_questions):
+    """Summary text with single newlines only, as long as an assessment of num_questions"""
+    return "\n".join(SUMMARY_LINE.format(n=n) for n in range(1, num_questions * SUMMARY_LINES_PER_QUESTION + 1))
+
+
+def synthetic_assessment(num_questions):
+    """Assessment text shaped like AssessmentFlow output"""
+    header = "=== STUDENT ASSESSMENT ===\n**Section 1: Multiple Choice**\n\n"
+    return header + "\n".join(QUESTION_TEMPLATE.format(n=n) for n in range(1, num_questions + 1))
+
+
+def measure(render, filepath, content):
+    """Time one render, then repeat it under tracemalloc for the allocation peak"""
+    start = time.perf_counter()
+    render(filepath, content, "Benchmark Assessment")
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    render(filepath, content, "Benchmark Assessment")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds": round(seconds, 4),
+        "peak_kib": peak // 1024,
+        "pdf_bytes": os.path.getsize(filepath)
+    }
+
+
+def run(sizes):
+    generator = PDFGenerator(upload_folder=tempfile.mkdtemp(prefix="edumuse_bench_"))
+    renderers = {
+        "student_assessment": (generator._generate_student_pdf, synthetic_assessment),
+        "answer_key": (generator._generate_answer_key_pdf, synthetic_assessment),
+        "summary_no_blanks": (generator._generate_summary_pdf, synthetic_summary)
+    }
+
+    results = []
+    for num_questions in sizes:
+        for name, (render, make_content) in renderers.items():
+            content = make_content(num_questions)
+            filepath = os.path.join(generator.upload_folder, f"{name}_{num_questions}.pdf")
+            row = {"document": name, "questions": num_questions, **measure(render, filepath, content)}
+            row["ms_per_question"] = round(row["seconds"] * 1000 / num_questions, 3)
+            results.append(row)
+    return results
+
+
+def print_table(results):
+    print(f"{'document':<20}{'questions':>10}{'seconds':>10}{'ms/question':>13}{'peak KiB':>10}{'PDF KiB':>10}")
+    for row in results:
+        print(f"{row['document']:<20}{row['questions']:>10}{row['seconds']:>10.3f}"
+              f"{row['ms_per_question']:>13.3f}{row['peak_kib']:>10}{row['pdf_bytes'] // 1024:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDFGenerator layout scaling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Question counts to render")
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "pdf_layout", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
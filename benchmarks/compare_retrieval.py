@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""Compare the knowledge-retrieval flows on measured latency and cost
+
+Runs web_search, llm_knowledge and hybrid_retrieval over a set of topics,
+several times each and concurrently, and reports per flow the wall time
+(mean/p50/p95), LLM requests, prompt/completion tokens, search calls and output
+size. Usage is metered per run, so concurrent runs do not blur each other's
+numbers. With --offline the fake LLM and search providers are used (see README),
+which measures the flows' own overhead and call patterns without API cost.
+
+    python benchmarks/compare_retrieval.py --offline
+    python benchmarks/compare_retrieval.py --repetitions 5 --concurrency 4 --output retrieval.json
+    python benchmarks/compare_retrieval.py --topics "graph neural networks" --flows web_search hybrid_retrieval
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import product
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'edumuse', 'src'))
+
+DEFAULT_TOPICS = [
+    "machine learning transformers",
+    "quantum computing algorithms",
+    "climate change policy"
+]
+RETRIEVAL_FLOWS = ["web_search", "llm_knowledge", "hybrid_retrieval"]
+
+
+def run_once(flow_name, topic, repetition):
+    """Run one flow on one topic with a fresh flow instance; CrewAI agents are not safe to share across threads"""
+    from edumuse.flows.flow_registry import flow_registry
+    from edumuse.tools.usage_meter import metered
+
+    flow = type(flow_registry.flows[flow_name])()
+    context = {"topic": topic, "user_level": "graduate", "depth": "comprehensive"}
+    error = None
+    output = ""
+    with metered() as usage:
+        start = time.perf_counter()
+        try:
+            output = flow.process([], context).get("sources_found", "")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+    return {
+        "flow": flow_name,
+        "topic": topic,
+        "repetition": repetition,
+        "seconds": round(seconds, 3),
+        "output_chars": len(str(output)),
+        "error": error,
+        **usage.snapshot()
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(runs, flows):
+    """Per-flow aggregates over successful runs; errors are counted separately"""
+    summary = []
+    for flow_name in flows:
+        flow_runs = [run for run in runs if run["flow"] == flow_name]
+        ok = [run for run in flow_runs if run["error"] is None]
+        row = {"flow": flow_name, "runs": len(flow_runs), "errors": len(flow_runs) - len(ok)}
+        if ok:
+            seconds = [run["seconds"] for run in ok]
+            row.update({
+                "mean_seconds": round(statistics.mean(seconds), 3),
+                "p50_seconds": round(percentile(seconds, 0.50), 3),
+                "p95_seconds": round(percentile(seconds, 0.95), 3),
+                "mean_llm_requests": round(statistics.mean(run["llm_requests"] for run in ok), 2),
+                "mean_prompt_tokens": round(statistics.mean(run["prompt_tokens"] for run in ok)),
+                "mean_completion_tokens": round(statistics.mean(run["completion_tokens"] for run in ok)),
+                "mean_search_calls": round(statistics.mean(run["search_calls"] for run in ok), 2),
+                "mean_output_chars": round(statistics.mean(run["output_chars"] for run in ok)),
+                "llm_retries": sum(run["llm_retries"] for run in ok)
+            })
+        summary.append(row)
+    return summary
+
+
+def run(flows, topics, repetitions, concurrency):
+    jobs = [(flow_name, topic, repetition)
+            for repetition, topic, flow_name in product(range(repetitions), topics, flows)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(lambda job: run_once(*job), jobs))
+    return runs, time.perf_counter() - start
+
+
+def print_table(summary):
+    print(f"{'flow':<18}{'runs':>6}{'errors':>8}{'mean s':>9}{'p50 s':>9}{'p95 s':>9}"
+          f"{'LLM calls':>11}{'prompt tok':>12}{'compl tok':>11}{'searches':>10}{'out chars':>11}")
+    for row in summary:
+        if "mean_seconds" not in row:
+            print(f"{row['flow']:<18}{row['runs']:>6}{row['errors']:>8}   (no successful runs)")
+            continue
+        print(f"{row['flow']:<18}{row['runs']:>6}{row['errors']:>8}{row['mean_seconds']:>9.2f}"
+              f"{row['p50_seconds']:>9.2f}{row['p95_seconds']:>9.2f}{row['mean_llm_requests']:>11}"
+              f"{row['mean_prompt_tokens']:>12}{row['mean_completion_tokens']:>11}"
+              f"{row['mean_search_calls']:>10}{row['mean_output_chars']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the knowledge-retrieval flows")
+    parser.add_argument("--flows", nargs="+", default=RETRIEVAL_FLOWS, choices=RETRIEVAL_FLOWS)
+    parser.add_argument("--topics", nargs="+", default=DEFAULT_TOPICS)
+    parser.add_argument("--repetitions", type=int, default=3, help="Runs per flow and topic")
+    parser.add_argument("--concurrency", type=int, default=3, help="Flow runs in flight at once")
+    parser.add_argument("--offline", action="store_true", help="Use the fake LLM and search providers")
+    parser.add_argument("--output", help="Optional path to write the runs and summary as JSON")
+    args = parser.parse_args()
+
+    # Providers are chosen at import time, so the environment must be set before edumuse is imported
+    if args.offline:
+        os.environ["EDUMUSE_OFFLINE"] = "1"
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    import edumuse.flows  # noqa: F401  registers the retrieval flows
+    from edumuse.tools.llm_gateway import get_gateway
+
+    runs, wall = run(args.flows, args.topics, args.repetitions, args.concurrency)
+    summary = summarize(runs, args.flows)
+    print()
+    print_table(summary)
+    print(f"\n{len(runs)} runs in {wall:.1f}s at concurrency {args.concurrency}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "retrieval_flows",
+                "recorded_at": datetime.now().isoformat(),
+                "offline": args.offline,
+                "topics": args.topics,
+                "repetitions": args.repetitions,
+                "concurrency": args.concurrency,
+                "wall_seconds": round(wall, 3),
+                "summary": summary,
+                "runs": runs,
+                "gateway": get_gateway().stats()
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+"""Load-test file_upload.py with realistic request mixes
+
+Replays uploads of the sample PDFs, QA questions and summarize/assess actions
+against a running instance and reports throughput, p50/p95/p99 latency, error
+rate and server memory growth per scenario. With --spawn the app is started in
+offline mode (fake LLM and search, see README) so runs need no API keys and are
+comparable over time.
+
+    python benchmarks/load_test.py --spawn
+    python benchmarks/load_test.py --spawn --scenarios qa mixed --concurrency 32 --duration 60 --output load.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --pid 12345
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+UPLOADS = os.path.join(REPO_ROOT, 'uploads')
+
+QUESTIONS = [
+    "What is self-attention?",
+    "Explain self attention",
+    "How does multi-head attention work?",
+    "What problem does positional encoding solve?",
+    "What is a crew of agents?",
+    "How are tasks delegated between agents?",
+    "What are the limitations of the approach?",
+    "Summarize the main contribution",
+]
+
+# Relative weights of request types in the mixed scenario, roughly what the frontend sends
+MIXED_WEIGHTS = {'qa': 6, 'process': 3, 'upload': 1}
+
+MEMORY_SAMPLE_SECONDS = 0.5
+
+
+def sample_documents():
+    return sorted(name for name in os.listdir(UPLOADS) if name.endswith('.pdf') and '_20' not in name)
+
+
+class Workload:
+    """Builds one request of each kind; `cold` defeats the answer and flow caches"""
+
+    def __init__(self, base_url, documents, cold=False, seed=0):
+        self.base_url = base_url.rstrip('/')
+        self.documents = documents
+        self.cold = cold
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def choice(self, options):
+        with self.lock:
+            return self.rng.choice(options)
+
+    def qa(self):
+        body = {'query': self.choice(QUESTIONS), 'context': self.choice(self.documents)}
+        if self.cold:
+            body['cache'] = False
+        return self.session().post(f"{self.base_url}/qa", json=body, timeout=300)
+
+    def process(self):
+        start = self.choice([1, 2, 3])
+        body = {
+            'action': self.choice(['summarize', 'assess']),
+            'filename': self.choice(self.documents),
+            'mode': 'fast',
+            'pages': [start, start + 1],
+            'refresh': self.cold
+        }
+        return self.session().post(f"{self.base_url}/process", json=body, timeout=300)
+
+    def upload(self):
+        name = self.choice(self.documents)
+        with open(os.path.join(UPLOADS, name), 'rb') as f:
+            files = {'file': (name, f, 'application/pdf')}
+            return self.session().post(f"{self.base_url}/upload", files=files, timeout=300)
+
+    def mixed(self):
+        kinds = [kind for kind, weight in MIXED_WEIGHTS.items() for _ in range(weight)]
+        return getattr(self, self.choice(kinds))()
+
+
+class MemorySampler:
+    """Samples the server's resident set size from /proc while a scenario runs"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def rss_kib(self):
+        if not self.pid:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+
+    def __enter__(self):
+        self.samples = [self.rss_kib()]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append(self.rss_kib())
+
+    def _run(self):
+        while not self._stop.wait(MEMORY_SAMPLE_SECONDS):
+            self.samples.append(self.rss_kib())
+
+    def summary(self):
+        samples = [sample for sample in self.samples if sample is not None]
+        if not samples:
+            return {'rss_start_kib': None, 'rss_end_kib': None, 'rss_peak_kib': None, 'rss_growth_kib': None}
+        return {
+            'rss_start_kib': samples[0],
+            'rss_end_kib': samples[-1],
+            'rss_peak_kib': max(samples),
+            'rss_growth_kib': samples[-1] - samples[0]
+        }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(workload, scenario, concurrency, duration, max_requests, pid):
+    """Keep `concurrency` clients busy for `duration` seconds (or until max_requests)"""
+    latencies = []
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    issued = [0]
+
+    def client():
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_requests and issued[0] >= max_requests:
+                    return
+                issued[0] += 1
+            start = time.perf_counter()
+            try:
+                status = getattr(workload, scenario)().status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+                if not (isinstance(status, int) and status < 400):
+                    errors.append(status)
+
+    started = time.perf_counter()
+    with MemorySampler(pid) as memory, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        'error_rate': round(len(errors) / len(latencies), 4) if latencies else 0.0,
+        'status_codes': statuses,
+        **memory.summary()
+    }
+
+
+def spawn_app(port):
+    """Start file_upload.py offline, without the debug reloader, and wait for /health"""
+    env = {**os.environ, 'EDUMUSE_OFFLINE': '1', 'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY', 'offline'),
+           'CREWAI_DISABLE_TELEMETRY': 'true', 'OTEL_SDK_DISABLED': 'true'}
+    process = subprocess.Popen(
+        [sys.executable, '-c', f"import file_upload; file_upload.app.run(port={port}, threaded=True)"],
+        cwd=REPO_ROOT, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True  # own process group, so the render pool workers are stopped with it
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(240):
+        if process.poll() is not None:
+            raise RuntimeError(f"file_upload.py exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.5)
+    stop_app(process)
+    raise RuntimeError("file_upload.py did not become healthy")
+
+
+def stop_app(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def print_table(results):
+    print(f"{'scenario':<10}{'conc':>6}{'requests':>10}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>8}{'RSS +KiB':>10}")
+    for row in results:
+        growth = row['rss_growth_kib'] if row['rss_growth_kib'] is not None else '-'
+        print(f"{row['scenario']:<10}{row['concurrency']:>6}{row['requests']:>10}{row['throughput_rps']:>9}"
+              f"{row['p50_ms'] or '-':>10}{row['p95_ms'] or '-':>10}{row['p99_ms'] or '-':>10}"
+              f"{row['error_rate']:>8.2%}{growth:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the EduMUSE Flask service")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of a running file_upload.py")
+    target.add_argument("--spawn", action="store_true", help="Start file_upload.py in offline mode for the run")
+    parser.add_argument("--port", type=int, default=5055, help="Port used with --spawn")
+    parser.add_argument("--pid", type=int, help="Server PID for memory sampling when using --url")
+    parser.add_argument("--scenarios", nargs="+", default=["upload", "qa", "process", "mixed"],
+                        choices=["upload", "qa", "process", "mixed"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--max-requests", type=int, default=0, help="Stop a scenario after this many requests")
+    parser.add_argument("--cold", action="store_true", help="Bypass the answer and flow-result caches")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    process = None
+    url, pid = args.url, args.pid
+    if args.spawn:
+        process, url = spawn_app(args.port)
+        pid = process.pid
+
+    try:
+        workload = Workload(url, sample_documents(), cold=args.cold, seed=args.seed)
+        results = [
+            run_scenario(workload, scenario, args.concurrency, args.duration, args.max_requests, pid)
+            for scenario in args.scenarios
+        ]
+        health = requests.get(f"{url}/health", timeout=5).json()
+    finally:
+        if process is not None:
+            stop_app(process)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "load_test",
+                "recorded_at": datetime.now().isoformat(),
+                "target": url,
+                "offline": args.spawn,
+                "cold": args.cold,
+                "duration_seconds": args.duration,
+                "results": results,
+                "server_health": health
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
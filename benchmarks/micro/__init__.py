@@ -0,0 +1,11 @@
+"""Micro-benchmarks for the CPU-bound hot paths of EduMUSE
+
+Each case runs against synthetic PDFs of a chosen page count and against the
+sample PDFs in uploads/, and records wall time and peak Python allocations.
+Results can be saved and compared against a baseline from an earlier run.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --pages 10 100 1000 --output baseline.json
+    python -m benchmarks.micro --baseline baseline.json --threshold 0.1
+    python -m benchmarks.micro --cases extract_text.cold retrieval --no-samples
+"""
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'edumuse', 'src'))
+
+from .cases import CASES
+from .documents import load_documents
+from .harness import compare
+
+
+def run(case_names, page_counts, include_samples, repeat):
+    documents, workdir = load_documents(page_counts, include_samples)
+    results = []
+    try:
+        for name in case_names:
+            case = CASES[name]
+            for document in (documents if case.per_document else [None]):
+                print(f"  {name} {document.name if document else ''}".rstrip(), file=sys.stderr)
+                row = {
+                    "case": name,
+                    "document": document.name if document else "-",
+                    "pages": document.page_count if document else None,
+                    **case.run(document, workdir, repeat)
+                }
+                if document:
+                    row["us_per_page"] = round(row["median_seconds"] * 1e6 / max(document.page_count, 1), 3)
+                results.append(row)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def print_table(results):
+    print(f"{'case':<20}{'document':<26}{'pages':>7}{'median':>13}{'min':>13}{'us/page':>11}{'peak KiB':>10}")
+    for row in results:
+        print(f"{row['case']:<20}{row['document']:<26}{row['pages'] or '-':>7}"
+              f"{format_seconds(row['median_seconds']):>13}{format_seconds(row['min_seconds']):>13}"
+              f"{row.get('us_per_page', '-'):>11}{row['peak_kib']:>10}")
+
+
+def print_comparison(comparisons):
+    print(f"\n{'case':<20}{'document':<26}{'baseline':>13}{'now':>13}{'time':>8}{'peak':>8}")
+    for row in comparisons:
+        flag = "  REGRESSED" if row['regressed'] else ""
+        print(f"{row['case']:<20}{row['document']:<26}{format_seconds(row['baseline_median_seconds']):>13}"
+              f"{format_seconds(row['median_seconds']):>13}{row['time_ratio'] or '-':>7}x"
+              f"{row['peak_ratio'] or '-':>7}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro",
+                                     description="Micro-benchmark EduMUSE's CPU-bound hot paths")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Page counts of the synthetic PDFs")
+    parser.add_argument("--no-samples", action="store_true", help="Skip the sample PDFs in uploads/")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES),
+                        help="Cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed samples per case and document")
+    parser.add_argument("--output", help="Optional path to write the results as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative growth in median time or peak that counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.cases, args.pages, not args.no_samples, args.repeat)
+    print_table(results)
+
+    comparisons = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparisons = compare(results, json.load(f)["results"], args.threshold)
+        print_comparison(comparisons)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "benchmark": "micro",
+                "recorded_at": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "results": results,
+                "comparison": comparisons
+            }, f, indent=2)
+
+    if comparisons and any(row['regressed'] for row in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
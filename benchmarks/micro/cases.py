@@ -0,0 +1,186 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Callable
+
+from benchmarks.bench_pdf_layout import synthetic_assessment
+from edumuse.tools.document_cache import DocumentCache
+from edumuse.tools.pdf_generator import PDFGenerator
+
+from .documents import REPO_ROOT
+from .harness import measure
+
+SRC_PATH = os.path.join(REPO_ROOT, 'edumuse', 'src')
+QA_PIPELINE_PATH = os.path.join(REPO_ROOT, 'EduMUSE-ishika-qa-pipeline', 'multi_agent_pipeline')
+
+ADAPTIVE_POOL_SIZE = 50_000
+
+QUERY = "How does the softmax scale attention weights in the encoder layer?"
+
+# Imports every flow file_upload.py registers; each module instantiates its flow on import
+IMPORT_SCRIPT = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, {src!r})
+if {trace}:
+    tracemalloc.start()
+start = time.perf_counter()
+import edumuse.flows
+import edumuse.flows.assessment_flow
+import edumuse.flows.summary_flow
+seconds = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if {trace} else 0
+print(json.dumps({{"seconds": seconds, "peak": peak}}))
+"""
+
+
+@dataclass
+class Case:
+    """One benchmark; `run(document, workdir, repeat)` returns the measurements
+
+    Cases with `per_document=False` do not depend on input size and run once,
+    with document None.
+    """
+    name: str
+    description: str
+    run: Callable
+    per_document: bool = True
+
+
+def timed(prepare):
+    """Adapt `prepare(document, workdir) -> fn` into a Case.run that measures fn in-process"""
+    def run(document, workdir, repeat):
+        return measure(prepare(document, workdir), repeat)
+    return run
+
+
+def extract_cold(document, workdir):
+    def fn():
+        cache = DocumentCache(tempfile.mkdtemp(dir=workdir))
+        return "".join(page['text'] for page in cache.extract_pages(document.path))
+    return fn
+
+
+def extract_warm(document, workdir):
+    cache = DocumentCache(os.path.join(workdir, 'warm_cache'))
+    cache.extract_pages(document.path)
+    return lambda: "".join(page['text'] for page in cache.extract_pages(document.path))
+
+
+def retrieval(document, workdir):
+    if QA_PIPELINE_PATH not in sys.path:
+        sys.path.insert(0, QA_PIPELINE_PATH)
+    from agents.agents import RetrievalAgent
+
+    agent = RetrievalAgent(top_k=3)
+    text = document.text
+    return lambda: agent._retrieve_from_text(text, QUERY)
+
+
+def parse_student(document, workdir):
+    generator = PDFGenerator(upload_folder=os.path.join(workdir, 'renders'))
+    content = synthetic_assessment(document.page_count)
+    return lambda: generator._parse_content_for_student(content)
+
+
+def render(method_name, content_for):
+    def prepare(document, workdir):
+        generator = PDFGenerator(upload_folder=os.path.join(workdir, 'renders'))
+        render_pdf = getattr(generator, method_name)
+        filepath = os.path.join(generator.upload_folder, f"{method_name}_{document.name}.pdf")
+        content = content_for(document)
+        return lambda: render_pdf(filepath, content, "Benchmark")
+    return prepare
+
+
+def format_sources(document, workdir):
+    from edumuse.flows.summary_flow import SummaryFlow
+
+    flow = SummaryFlow()
+    sources = [
+        {'title': f"{document.name} page {page['page']}", 'source_type': 'pdf', 'content': page['text']}
+        for page in document.pages
+    ]
+    return lambda: flow._format_sources(sources)
+
+
+def flows_instantiate(document, workdir):
+    from edumuse.flows.flow_registry import FlowRegistry
+    from edumuse.flows.web_search_flow import WebSearchFlow
+    from edumuse.flows.llm_knowledge_flow import LLMKnowledgeFlow
+    from edumuse.flows.hybrid_retrieval_flow import HybridRetrievalFlow
+    from edumuse.flows.assessment_flow import AssessmentFlow
+    from edumuse.flows.summary_flow import SummaryFlow
+
+    def fn():
+        registry = FlowRegistry()
+        registry.register_flow("web_search", WebSearchFlow(), "knowledge_retrieval")
+        registry.register_flow("llm_knowledge", LLMKnowledgeFlow(), "knowledge_retrieval")
+        registry.register_flow("hybrid_retrieval", HybridRetrievalFlow(), "knowledge_retrieval")
+        registry.register_flow("assessment", AssessmentFlow(), "assessment")
+        registry.register_flow("summary", SummaryFlow(), "content")
+        return registry
+    return fn
+
+
+def adaptive_select(document, workdir):
+    """Next-item selection over a 50,000-item pool after ten scored responses"""
+    import random
+    from edumuse.tools.adaptive_selection import ItemPool, next_item
+
+    rng = random.Random(0)
+    pool = ItemPool.from_rows([
+        {'id': item_id, 'user_level': rng.choice(['beginner', 'intermediate', 'advanced']),
+         'question_type': rng.choice(['multiple_choice', 'short_answer']),
+         'bloom_level': rng.choice(['remember', 'apply', 'evaluate']),
+         'difficulty': rng.choice(['easy', 'medium', 'hard']), 'option_count': 4}
+        for item_id in range(1, ADAPTIVE_POOL_SIZE + 1)
+    ])
+    responses = [(item_id, rng.random() < 0.6) for item_id in rng.sample(range(1, ADAPTIVE_POOL_SIZE + 1), 10)]
+    return lambda: next_item(pool, responses, question_types=['multiple_choice'])
+
+
+def import_in_subprocess(trace):
+    env = {**os.environ, 'CREWAI_DISABLE_TELEMETRY': 'true', 'OTEL_SDK_DISABLED': 'true'}
+    env.setdefault('OPENAI_API_KEY', 'benchmark')
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT.format(src=SRC_PATH, trace=trace)],
+        env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def flows_import(document, workdir, repeat):
+    """Cold import in a fresh interpreter each time; module caches make in-process repeats meaningless"""
+    timings = sorted(import_in_subprocess(trace=False)['seconds'] for _ in range(repeat))
+    peak = import_in_subprocess(trace=True)['peak']
+    return {
+        "min_seconds": round(timings[0], 9),
+        "median_seconds": round(timings[len(timings) // 2], 9),
+        "peak_kib": peak // 1024,
+        "calls_per_sample": 1
+    }
+
+
+CASES = {case.name: case for case in [
+    Case("extract_text.cold", "PDF text extraction with an empty page cache", timed(extract_cold)),
+    Case("extract_text.warm", "PDF text extraction served from the page cache", timed(extract_warm)),
+    Case("retrieval", "RetrievalAgent._retrieve_from_text over the document text", timed(retrieval)),
+    Case("parse_student", "PDFGenerator._parse_content_for_student, one question per page",
+         timed(parse_student)),
+    Case("render.student", "Student assessment PDF, one question per page",
+         timed(render('_generate_student_pdf', lambda document: synthetic_assessment(document.page_count)))),
+    Case("render.answer_key", "Answer key PDF, one question per page",
+         timed(render('_generate_answer_key_pdf', lambda document: synthetic_assessment(document.page_count)))),
+    # Extracted text has no blank lines, so this tracks layout of long unbroken runs of lines
+    Case("render.summary", "Summary PDF of the full document text",
+         timed(render('_generate_summary_pdf', lambda document: document.text))),
+    Case("format_sources", "SummaryFlow._format_sources with one source per page", timed(format_sources)),
+    Case("flows.import", "Cold import of the flow registry and every flow", flows_import, per_document=False),
+    Case("flows.instantiate", "FlowRegistry plus one instance of every flow", timed(flows_instantiate),
+         per_document=False),
+    Case("adaptive.select", "Adaptive next-item selection over a 50,000-item pool", timed(adaptive_select),
+         per_document=False),
+]}
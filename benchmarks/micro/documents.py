@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from edumuse.tools.document_cache import DocumentCache
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+UPLOADS = os.path.join(REPO_ROOT, 'uploads')
+
+VOCABULARY = (
+    "attention query key value softmax gradient encoder decoder layer token embedding "
+    "position sequence model training loss optimizer batch dropout residual normalization "
+    "head projection matrix vector dimension scale weight bias agent task crew flow tree "
+    "parse syntax hierarchy structure dependency representation benchmark evaluation"
+).split()
+
+PARAGRAPHS_PER_PAGE = 5
+WORDS_PER_PARAGRAPH = 70
+LINE_WIDTH_CHARS = 90
+
+
+@dataclass
+class Document:
+    """A benchmark input: the PDF on disk plus its extracted per-page text"""
+    name: str
+    kind: str
+    path: str
+    pages: List[Dict] = field(repr=False)
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def text(self):
+        """The document text as file_upload.extract_text_from_pdf returns it"""
+        return "".join(page['text'] for page in self.pages)
+
+
+def write_synthetic_pdf(path, num_pages, seed=0):
+    """Write a text-only PDF with paragraphs of lecture-like prose on every page"""
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(path, pagesize=letter)
+    _, height = letter
+    for number in range(1, num_pages + 1):
+        text = pdf.beginText(54, height - 72)
+        text.setFont("Helvetica", 9)
+        text.textLine(f"Lecture notes, page {number}")
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            text.textLine("")
+            words = [rng.choice(VOCABULARY) for _ in range(WORDS_PER_PARAGRAPH)]
+            line = []
+            for word in words:
+                if len(' '.join(line + [word])) > LINE_WIDTH_CHARS:
+                    text.textLine(' '.join(line))
+                    line = []
+                line.append(word)
+            text.textLine(' '.join(line) + '.')
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def sample_pdf_paths():
+    """The sample papers in uploads/, skipping PDFs EduMUSE generated there"""
+    return sorted(
+        os.path.join(UPLOADS, name) for name in os.listdir(UPLOADS)
+        if name.endswith('.pdf') and '_assessment_' not in name and '_answer_key_' not in name
+        and '_summary_' not in name
+    )
+
+
+def load_documents(page_counts, include_samples=True, workdir=None):
+    """Build the synthetic PDFs and extract text for them and the samples once, up front"""
+    workdir = workdir or tempfile.mkdtemp(prefix="edumuse_micro_")
+    cache = DocumentCache(os.path.join(workdir, 'cache'))
+
+    documents = []
+    for num_pages in page_counts:
+        path = os.path.join(workdir, f"synthetic_{num_pages}.pdf")
+        write_synthetic_pdf(path, num_pages)
+        documents.append(Document(f"synthetic-{num_pages}p", 'synthetic', path, cache.extract_pages(path)))
+
+    if include_samples:
+        for path in sample_pdf_paths():
+            name = os.path.splitext(os.path.basename(path))[0]
+            documents.append(Document(name, 'sample', path, cache.extract_pages(path)))
+    return documents, workdir
@@ -0,0 +1,80 @@
+import gc
+import statistics
+import time
+import tracemalloc
+
+# Fast cases are looped until one sample takes at least this long, like timeit's autorange
+MIN_SAMPLE_SECONDS = 0.05
+
+
+def calls_per_sample(fn):
+    """Warm `fn` up (imports, regex compilation, font loading) and pick a loop count"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            return number
+        number *= 10
+
+
+def measure(fn, repeat=3):
+    """Time `fn` over `repeat` samples, then run it once more under tracemalloc for the allocation peak
+
+    Times are per call. The peak run is separate because tracing slows
+    allocation-heavy code down several times over and would distort the timings.
+    """
+    number = calls_per_sample(fn)
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "min_seconds": round(min(timings), 9),
+        "median_seconds": round(statistics.median(timings), 9),
+        "peak_kib": peak // 1024,
+        "calls_per_sample": number
+    }
+
+
+def result_key(row):
+    return row["case"], row["document"]
+
+
+def compare(results, baseline, threshold):
+    """Pair each result with the baseline row for the same case and document
+
+    A row regresses when its median time or its allocation peak grew by more
+    than `threshold` (a fraction) over the baseline.
+    """
+    previous = {result_key(row): row for row in baseline}
+    comparisons = []
+    for row in results:
+        before = previous.get(result_key(row))
+        if before is None:
+            continue
+        time_ratio = row["median_seconds"] / before["median_seconds"] if before["median_seconds"] else None
+        peak_ratio = row["peak_kib"] / before["peak_kib"] if before["peak_kib"] else None
+        comparisons.append({
+            "case": row["case"],
+            "document": row["document"],
+            "baseline_median_seconds": before["median_seconds"],
+            "median_seconds": row["median_seconds"],
+            "time_ratio": round(time_ratio, 3) if time_ratio is not None else None,
+            "baseline_peak_kib": before["peak_kib"],
+            "peak_kib": row["peak_kib"],
+            "peak_ratio": round(peak_ratio, 3) if peak_ratio is not None else None,
+            "regressed": any(ratio is not None and ratio > 1 + threshold for ratio in (time_ratio, peak_ratio))
+        })
+    return comparisons
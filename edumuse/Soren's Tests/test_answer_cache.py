@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Test that the semantic answer cache reuses rephrasings but not different questions"""
+
+from edumuse.tools.answer_cache import SemanticAnswerCache
+
+SCOPE = ("document", "all")
+
+def test_rephrasings_hit():
+    """Rephrasings of a cached question should be served from the cache"""
+
+    print("🔍 Testing Rephrasings")
+    print("="*50)
+
+    cache = SemanticAnswerCache()
+    cache.put("What is self-attention?", SCOPE, "self-attention answer")
+    cache.put("How does the transformer work?", SCOPE, "how answer")
+
+    rephrasings = {
+        "Explain self-attention": "self-attention answer",
+        "Please define self-attention.": "self-attention answer",
+        "how does the transformer work": "how answer"
+    }
+
+    passed = True
+    for question, expected in rephrasings.items():
+        hit = cache.get(question, SCOPE)
+        if hit and hit[0] == expected:
+            print(f"✅ {question!r} - hit ({hit[1]:.2f})")
+        else:
+            print(f"❌ {question!r} - expected a hit, got {hit}")
+            passed = False
+
+    return passed
+
+def test_different_intents_miss():
+    """Questions about the same subject that ask something different must not share an answer"""
+
+    print("\n🧪 Testing Different Intents")
+    print("="*50)
+
+    cache = SemanticAnswerCache()
+    cache.put("How does the transformer work?", SCOPE, "how answer")
+
+    different = [
+        "Why does the transformer work?",
+        "Does the transformer work?",
+        "When does the transformer work?",
+        "Who proposed the transformer?"
+    ]
+
+    passed = True
+    for question in different:
+        hit = cache.get(question, SCOPE)
+        if hit is None:
+            print(f"✅ {question!r} - miss")
+        else:
+            print(f"❌ {question!r} - served the cached answer at {hit[1]:.2f}")
+            passed = False
+
+    return passed
+
+if __name__ == "__main__":
+    print("🎓 EduMUSE Answer Cache Testing")
+    print("="*60)
+
+    results = [test_rephrasings_hit(), test_different_intents_miss()]
+
+    if all(results):
+        print("\n✨ Answer cache only reuses answers for the same question")
+    else:
+        print("\n⚠️  Answer cache matching needs attention")
+        raise SystemExit(1)
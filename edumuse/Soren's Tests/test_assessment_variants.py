@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Test per-student assessment variants: answer keys follow shuffled options, samples stay balanced"""
+
+import random
+from collections import Counter
+
+from edumuse.schemas import AssessmentOutput, Question
+from edumuse.tools.assessment_variants import balanced_sample, make_variants
+
+CAPITALS = [("France", "Paris"), ("Italy", "Rome"), ("Norway", "Oslo"), ("Switzerland", "Bern")]
+
+def capital_question(number, country, capital, answer_format):
+    options = [{'label': label, 'text': city} for label, (_, city) in zip("ABCD", CAPITALS)]
+    label = "ABCD"[[city for _, city in CAPITALS].index(capital)]
+    return Question(
+        number=number,
+        text=f"What is the capital of {country}?",
+        difficulty="Easy",
+        options=options,
+        answer=answer_format.format(label=label, text=capital),
+        explanation=f"Choice ({label.lower()}) is correct; option {label} names {capital}."
+    )
+
+def test_answer_key_remapping():
+    """Every variant's answer letter must point at the same option text as the master copy"""
+
+    print("🔍 Testing Answer Key Remapping")
+    print("="*50)
+
+    # Bare letters, "A) Paris" style answers and answers given as the option text
+    answer_formats = ["{label}", "{label}) {text}", "{text}", "({label}) {text}"]
+    questions = [
+        capital_question(number, country, capital, answer_formats[index % len(answer_formats)])
+        for number, (index, (country, capital)) in enumerate(enumerate(CAPITALS * 2), 1)
+    ]
+    expected = {question.text: capital for question, (_, capital) in zip(questions, CAPITALS * 2)}
+
+    passed = True
+    for variant in make_variants(AssessmentOutput(questions=questions), 20, seed=7):
+        for question in variant.questions:
+            chosen = {option.label: option.text for option in question.options}.get(question.answer)
+            reference = f"option {question.answer}"
+            if chosen != expected[question.text] or reference not in question.explanation:
+                print(f"❌ {question.text!r}: answer {question.answer!r} -> {chosen!r}, "
+                      f"explanation {question.explanation!r}")
+                passed = False
+
+    if passed:
+        print("✅ Answers and explanation references follow the options in all 20 variants")
+    return passed
+
+def test_stratified_sampling():
+    """Samples keep the pool's mix of question types and difficulties"""
+
+    print("\n🧪 Testing Stratified Sampling")
+    print("="*50)
+
+    pool = []
+    for question_type, difficulty, count in [("multiple_choice", "Easy", 10), ("multiple_choice", "Hard", 10),
+                                             ("short_answer", "Medium", 6), ("essay", "Hard", 4)]:
+        pool.extend(Question(number=len(pool) + 1, question_type=question_type, difficulty=difficulty,
+                             text=f"{question_type} {difficulty} {index}") for index in range(count))
+
+    passed = True
+    for seed in range(10):
+        variant = make_variants(AssessmentOutput(questions=pool), 1, questions_per_variant=15, seed=seed)[0]
+        mix = Counter((question.question_type, question.difficulty) for question in variant.questions)
+        expected = {("multiple_choice", "Easy"): 5, ("multiple_choice", "Hard"): 5,
+                    ("short_answer", "Medium"): 3, ("essay", "Hard"): 2}
+        if dict(mix) != expected or len({question.text for question in variant.questions}) != 15:
+            print(f"❌ seed {seed}: {dict(mix)}")
+            passed = False
+
+    # Leftover seats go to the strata with the largest remainders
+    sample = balanced_sample(pool, 7, random.Random(0))
+    mix = Counter((question.question_type, question.difficulty) for question in sample)
+    if len(sample) != 7 or max(mix.values()) > 3:
+        print(f"❌ 7 of 30: {dict(mix)}")
+        passed = False
+
+    if passed:
+        print("✅ Every variant keeps the pool's type and difficulty proportions")
+    return passed
+
+if __name__ == "__main__":
+    print("🎓 EduMUSE Assessment Variant Testing")
+    print("="*60)
+
+    results = [test_answer_key_remapping(), test_stratified_sampling()]
+
+    if all(results):
+        print("\n✨ Variants are safe to hand out")
+    else:
+        print("\n⚠️  Assessment variants need attention")
+        raise SystemExit(1)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Test off-peak precompute windows and the per-window token budget"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from edumuse.tools.precompute import AccessLog, PrecomputeScheduler, active_window, parse_windows
+from edumuse.tools.usage_meter import record_usage
+
+def test_windows():
+    """Windows parse from HH:MM-HH:MM and one that crosses midnight belongs to the evening it started"""
+
+    print("🔍 Testing Off-Peak Windows")
+    print("="*50)
+
+    passed = True
+    windows = parse_windows("22:00-06:00, 12:30-13:00")
+    if windows != [(22 * 60, 6 * 60), (12 * 60 + 30, 13 * 60)]:
+        print(f"❌ Parsed {windows}")
+        passed = False
+
+    day = datetime(2026, 3, 10)
+    cases = [
+        (day.replace(hour=23, minute=30), day.replace(hour=22)),
+        (day.replace(hour=2, minute=15), day - timedelta(days=1) + timedelta(hours=22)),
+        (day.replace(hour=5, minute=59), day - timedelta(days=1) + timedelta(hours=22)),
+        (day.replace(hour=6), None),
+        (day.replace(hour=21, minute=59), None),
+        (day.replace(hour=12, minute=45), day.replace(hour=12, minute=30)),
+        (day.replace(hour=13), None)
+    ]
+    for now, expected in cases:
+        start = active_window(windows, now)
+        if start == expected:
+            print(f"✅ {now:%H:%M} -> {start:%m-%d %H:%M}" if start else f"✅ {now:%H:%M} -> outside")
+        else:
+            print(f"❌ {now:%H:%M} -> {start}, expected {expected}")
+            passed = False
+
+    if parse_windows("") != [] or parse_windows(None) != []:
+        print("❌ An empty spec should mean no windows")
+        passed = False
+    for spec in ("25:00-06:00", "22:00", "10:00-10:00", "ten-eleven"):
+        try:
+            parse_windows(spec)
+            print(f"❌ {spec!r} was accepted")
+            passed = False
+        except ValueError:
+            pass
+    return passed
+
+def test_budget_deferral():
+    """Requests whose known cost exceeds the window's remaining budget wait for the next window"""
+
+    print("\n🧪 Testing Budget Deferral")
+    print("="*50)
+
+    access_log = AccessLog(os.path.join(tempfile.mkdtemp(), "access_log.db"))
+    for user_level, hits in (("beginner", 3), ("intermediate", 2), ("advanced", 1)):
+        for _ in range(hits):
+            access_log.record("doc", "doc.pdf", "summarize", {"user_level": user_level})
+
+    warmed = []
+    cached = set()
+    def warm(task):
+        # Like file_upload.precompute: a result that is already cached costs nothing
+        key = (task['action'], task['params'].get('user_level'))
+        if key in cached:
+            return False
+        cached.add(key)
+        warmed.append(key)
+        if task['action'] != 'index':
+            record_usage(prompt_tokens=500, completion_tokens=100)
+        return True
+
+    scheduler = PrecomputeScheduler(access_log, warm, windows=[(22 * 60, 6 * 60)], token_budget=1000)
+    now = datetime.now()
+    first_window = now.replace(hour=22, minute=0, second=0, microsecond=0)
+    scheduler.run_window(first_window, now=now)
+    stats = scheduler.stats()
+
+    passed = True
+    # The index is free, the first request costs 600 and the next ones would need 600 of the 400 left
+    expected = [("index", None), ("summarize", "beginner")]
+    if warmed != expected or stats['tokens_spent'] != 600 or stats['deferred'] != 2:
+        print(f"❌ First window warmed {warmed}, spent {stats['tokens_spent']}, deferred {stats['deferred']}")
+        passed = False
+    else:
+        print("✅ Most popular request warmed first; the rest deferred once the budget ran short")
+
+    # Re-running the same window does not repeat work
+    scheduler.run_window(first_window, now=now)
+    if len(warmed) != 2:
+        print(f"❌ Same window re-ran tasks: {warmed}")
+        passed = False
+
+    # A new window resets the budget and picks up where the last one stopped
+    warmed.clear()
+    scheduler.run_window(first_window + timedelta(days=1), now=now)
+    stats = scheduler.stats()
+    if (warmed != [("summarize", "intermediate")] or stats['tokens_spent'] != 600 or stats['deferred'] != 1
+            or stats['already_warm'] != 2):
+        print(f"❌ Second window warmed {warmed}, spent {stats['tokens_spent']}, deferred {stats['deferred']}")
+        passed = False
+    else:
+        print("✅ Next window starts with a fresh budget")
+    return passed
+
+if __name__ == "__main__":
+    print("🎓 EduMUSE Precompute Scheduler Testing")
+    print("="*60)
+
+    results = [test_windows(), test_budget_deferral()]
+
+    if all(results):
+        print("\n✨ Precompute windows and budgets behave as expected")
+    else:
+        print("\n⚠️  Precompute scheduler needs attention")
+        raise SystemExit(1)
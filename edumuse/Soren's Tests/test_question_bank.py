@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Test question bank rotation and how assessments split their questions across types"""
+
+import os
+import tempfile
+
+from edumuse.schemas import AssessmentOutput, Question
+from edumuse.tools.question_bank import QuestionBank, get_question_bank, QUESTION_BANK_FILENAME
+from edumuse.flows.assessment_flow import AssessmentFlow
+
+DOCUMENT = "a" * 64
+
+def banked_questions(count, question_type="multiple_choice", concepts=None):
+    concepts = concepts or [f"concept {index}" for index in range(count)]
+    return [
+        Question(number=0, question_type=question_type, text=f"{question_type} question {index}?",
+                 difficulty="Medium", concept=concepts[index % len(concepts)],
+                 options=[{'label': 'A', 'text': 'yes'}, {'label': 'B', 'text': 'no'}]
+                 if question_type == "multiple_choice" else [],
+                 answer="A")
+        for index in range(count)
+    ]
+
+def test_bank_rotation():
+    """Selections rotate through the bank, but only once the questions have been marked used"""
+
+    print("🔍 Testing Bank Rotation")
+    print("="*50)
+
+    bank = QuestionBank(os.path.join(tempfile.mkdtemp(), QUESTION_BANK_FILENAME))
+    bank.add(DOCUMENT, banked_questions(6), "intermediate")
+    passed = True
+
+    first = [question.text for question in bank.select(DOCUMENT, {'multiple_choice': 3}, "intermediate")]
+    again = [question.text for question in bank.select(DOCUMENT, {'multiple_choice': 3}, "intermediate")]
+    if first != again:
+        print(f"❌ Selecting without marking rotated the bank: {first} -> {again}")
+        passed = False
+    else:
+        print("✅ Unmarked selections are not counted as used")
+
+    bank.mark_used(DOCUMENT, bank.select(DOCUMENT, {'multiple_choice': 3}, "intermediate"), "intermediate")
+    second = [question.text for question in bank.select(DOCUMENT, {'multiple_choice': 3}, "intermediate")]
+    if set(first) & set(second):
+        print(f"❌ Marked questions were served again: {first} then {second}")
+        passed = False
+    else:
+        print("✅ Marked questions rotate out for the least-used ones")
+
+    if bank.stats()['times_served'] != 3:
+        print(f"❌ times_served is {bank.stats()['times_served']}, expected 3")
+        passed = False
+
+    # Other levels and page ranges are separate scopes
+    if bank.select(DOCUMENT, {'multiple_choice': 3}, "advanced") or \
+            bank.select(DOCUMENT, {'multiple_choice': 3}, "intermediate", pages=(1, 2)):
+        print("❌ Questions leaked across learner levels or page ranges")
+        passed = False
+
+    # Four questions over two concepts: a pick of two covers both concepts
+    spread = QuestionBank(os.path.join(tempfile.mkdtemp(), QUESTION_BANK_FILENAME))
+    spread.add(DOCUMENT, banked_questions(4, concepts=["attention", "attention", "recurrence", "recurrence"]),
+               "intermediate")
+    concepts = {question.concept for question in spread.select(DOCUMENT, {'multiple_choice': 2}, "intermediate")}
+    if concepts != {"attention", "recurrence"}:
+        print(f"❌ Selection did not spread across concepts: {concepts}")
+        passed = False
+    else:
+        print("✅ Selections spread across concepts")
+
+    return passed
+
+def test_question_quota():
+    """Quotas follow the 5:3:2 type weights among the requested types and always add up"""
+
+    print("\n🧪 Testing Question Quota")
+    print("="*50)
+
+    cases = [
+        (10, ['multiple_choice', 'short_answer', 'essay'], {'multiple_choice': 5, 'short_answer': 3, 'essay': 2}),
+        (7, ['multiple_choice', 'short_answer', 'essay'], {'multiple_choice': 4, 'short_answer': 2, 'essay': 1}),
+        (6, ['short_answer', 'essay'], {'short_answer': 4, 'essay': 2}),
+        (3, ['multiple_choice'], {'multiple_choice': 3}),
+        (5, ['true_false'], {})
+    ]
+
+    passed = True
+    for num_questions, question_types, expected in cases:
+        quota = AssessmentFlow._question_quota(None, num_questions, question_types)
+        if quota == expected:
+            print(f"✅ {num_questions} of {question_types} -> {quota}")
+        else:
+            print(f"❌ {num_questions} of {question_types} -> {quota}, expected {expected}")
+            passed = False
+    return passed
+
+def test_failed_generation_keeps_bank_unused():
+    """A crew failure must not count the banked questions it would have been combined with"""
+
+    print("\n🏦 Testing Usage After Failed Generation")
+    print("="*50)
+
+    cache_folder = tempfile.mkdtemp()
+    bank = get_question_bank(os.path.join(cache_folder, QUESTION_BANK_FILENAME))
+    bank.add(DOCUMENT, banked_questions(3), "beginner")
+    context = {'topic': 'bank test', 'user_level': 'beginner', 'document_hash': DOCUMENT,
+               'cache_folder': cache_folder, 'question_types': ['multiple_choice']}
+
+    flow = AssessmentFlow()
+    def failing_crew(*args, **kwargs):
+        raise RuntimeError("crew failed")
+    flow._generate = failing_crew
+
+    passed = True
+    try:
+        flow.process([], {**context, 'num_questions': 5})
+        print("❌ Generation failure was swallowed")
+        passed = False
+    except RuntimeError:
+        pass
+    if bank.stats()['times_served'] != 0:
+        print(f"❌ Failed run counted {bank.stats()['times_served']} banked questions as used")
+        passed = False
+    else:
+        print("✅ Failed run left the bank untouched")
+
+    # Entirely from the bank: no crew call, and the questions count as served
+    flow._generate = lambda *args, **kwargs: AssessmentOutput(questions=[])
+    result = flow.process([], {**context, 'num_questions': 3})
+    if result['metadata']['questions_from_bank'] != 3 or bank.stats()['times_served'] != 3:
+        print(f"❌ Bank-only assessment: {result['metadata']}, served {bank.stats()['times_served']}")
+        passed = False
+    else:
+        print("✅ Bank-only assessment marks its questions used")
+    return passed
+
+if __name__ == "__main__":
+    print("🎓 EduMUSE Question Bank Testing")
+    print("="*60)
+
+    results = [test_bank_rotation(), test_question_quota(), test_failed_generation_keeps_bank_unused()]
+
+    if all(results):
+        print("\n✨ Question bank rotation and quotas behave as expected")
+    else:
+        print("\n⚠️  Question bank needs attention")
+        raise SystemExit(1)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+"""Run flows over a whole directory (or manifest) of PDFs in one command
+
+Every (document, flow) pair is a job. Jobs fan out over a process pool, with the
+LLM request concurrency and rate limits split across the workers so the total
+stays bounded. Progress is checkpointed to a state file after each job, so an
+interrupted run picks up where it stopped. Results land in a tree under --output:
+
+    <output>/<document>_<hash>/<flow>-<options>/result.json    flow output, usage and timing
+    <output>/<document>_<hash>/<flow>-<options>/content.md     readable text
+    <output>/<document>_<hash>/<flow>-<options>/*.pdf          summary / student / answer key PDFs
+
+where <options> is what shapes that flow's output, e.g. summary-intermediate-thorough
+or assessment-beginner-10q, so a rerun with other options does not reuse old results.
+
+    edumuse-batch course/week*/ --flows summary assessment
+    edumuse-batch semester.json --workers 4 --llm-concurrency 8 --output semester_out
+    edumuse-batch uploads/ --flows summary --mode fast --offline
+
+A manifest is a JSON list of PDF paths, or of objects with "path" and optional
+"flows", "pages", "topic" and "user_level"; relative paths are resolved against
+the manifest's folder.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from edumuse.tools.document_cache import DocumentCache, file_sha256, write_atomic
+
+DOCUMENT_FLOWS = ("summary", "assessment")
+STATE_VERSION = 2
+DEFAULT_OUTPUT = "batch_output"
+STATE_FILENAME = "batch_state.json"
+
+
+def discover(inputs, recursive=False):
+    """Documents to process: [{'path', optional 'flows', 'pages', 'topic', 'user_level'}]"""
+    documents = []
+    for source in inputs:
+        if os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                documents.extend({'path': os.path.join(root, name)} for name in sorted(files)
+                                 if name.lower().endswith('.pdf'))
+                if not recursive:
+                    break
+                dirs.sort()
+        elif source.lower().endswith('.json'):
+            with open(source, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            base = os.path.dirname(os.path.abspath(source))
+            for entry in entries:
+                entry = {'path': entry} if isinstance(entry, str) else dict(entry)
+                entry['path'] = os.path.join(base, entry['path'])
+                documents.append(entry)
+        elif source.lower().endswith('.pdf'):
+            documents.append({'path': source})
+        else:
+            raise ValueError(f"Not a directory, PDF or JSON manifest: {source}")
+
+    for document in documents:
+        pages = document.get('pages')
+        if pages is not None and not (isinstance(pages, list) and len(pages) == 2
+                                      and all(isinstance(number, int) for number in pages)):
+            raise ValueError(f"pages must be [start, end] for {document['path']}")
+        flows = document.get('flows')
+        if flows is not None:
+            if not isinstance(flows, list) or not all(isinstance(flow, str) for flow in flows):
+                raise ValueError(f"flows must be a list of flow names for {document['path']}")
+            unknown = [flow for flow in flows if flow not in DOCUMENT_FLOWS]
+            if unknown:
+                raise ValueError(f"Unknown flows {unknown} for {document['path']}; "
+                                 f"choose from {', '.join(DOCUMENT_FLOWS)}")
+    missing = [document['path'] for document in documents if not os.path.isfile(document['path'])]
+    if missing:
+        raise FileNotFoundError(f"Missing documents: {missing}")
+    return documents
+
+
+def document_slug(path, document_hash, pages=None):
+    stem = re.sub(r'[^\w-]+', '_', os.path.splitext(os.path.basename(path))[0]).strip('_')[:40] or 'document'
+    suffix = f"_p{pages[0]}-{pages[1]}" if pages else ''
+    return f"{stem}_{document_hash[:12]}{suffix}"
+
+
+def flow_options(flow, user_level, args):
+    """The options that change a flow's output, as a path-safe label"""
+    level = re.sub(r'[^\w-]+', '_', str(user_level))
+    if flow == 'summary':
+        return f"{level}-{args.mode}"
+    return f"{level}-{args.num_questions}q"
+
+
+def plan_jobs(documents, flows, args):
+    """One job per (document, flow, options), keyed by content hash so renamed or moved files keep their progress"""
+    jobs = {}
+    for document in documents:
+        document_hash = file_sha256(document['path'])
+        pages = document.get('pages')
+        user_level = document.get('user_level', args.user_level)
+        for flow in document.get('flows', flows):
+            options = flow_options(flow, user_level, args)
+            content = f"{document_hash}:{pages[0]}-{pages[1]}" if pages else document_hash
+            key = f"{content}:{flow}:{options}"
+            jobs[key] = {
+                'key': key,
+                'path': os.path.abspath(document['path']),
+                'document_hash': document_hash,
+                'pages': pages,
+                'flow': flow,
+                'topic': document.get('topic') or os.path.basename(document['path']),
+                'user_level': user_level,
+                'summary_mode': args.mode,
+                'num_questions': args.num_questions,
+                'cache_folder': os.path.abspath(args.cache),
+                'output_dir': os.path.join(os.path.abspath(args.output),
+                                           document_slug(document['path'], document_hash, pages), f"{flow}-{options}"),
+                'render_pdfs': not args.no_pdf
+            }
+    return jobs
+
+
+class BatchState:
+    """Per-job status persisted after every change, so a rerun skips finished work"""
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                self.jobs = state['jobs']
+
+    def is_done(self, key):
+        job = self.jobs.get(key)
+        return bool(job and job['status'] == 'done' and all(os.path.exists(path) for path in job['outputs']))
+
+    def is_failed(self, key):
+        return self.jobs.get(key, {}).get('status') == 'failed'
+
+    def record(self, job, status, **fields):
+        previous = self.jobs.get(job['key'], {})
+        self.jobs[job['key']] = {
+            'document': job['path'],
+            'flow': job['flow'],
+            'status': status,
+            'attempts': previous.get('attempts', 0) + 1,
+            'finished_at': datetime.now().isoformat(),
+            **fields
+        }
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        write_atomic(self.path, json.dumps({'version': STATE_VERSION, 'jobs': self.jobs}, indent=2))
+
+
+def _select_pages(pages, page_range):
+    start, end = page_range
+    if start < 1 or end < start or end > len(pages):
+        raise ValueError(f"Page range {start}-{end} is outside the document's {len(pages)} pages")
+    return pages[start - 1:end]
+
+
+def run_job(job):
+    """Worker entry point: run one flow on one document and write its output folder"""
+    import edumuse.flows.assessment_flow  # noqa: F401  registers the document flows
+    import edumuse.flows.summary_flow  # noqa: F401
+    from edumuse.crew import EduMUSE
+    from edumuse.tools.pdf_generator import PDFGenerator
+    from edumuse.tools.usage_meter import metered
+
+    document_cache = DocumentCache(job['cache_folder'])
+    pages = document_cache.extract_pages(job['path'])
+    if job['pages']:
+        pages = _select_pages(pages, job['pages'])
+    context = {
+        "user_level": job['user_level'],
+        "summary_mode": job['summary_mode'],
+        "num_questions": job['num_questions'],
+        "cache_folder": job['cache_folder'],
+        "document_hash": job['document_hash'],
+        "pages": job['pages'],
+        "document_content": "".join(page['text'] for page in pages),
+        "document_chunks": document_cache.chunk_pages(pages)
+    }
+
+    start = time.perf_counter()
+    with metered() as usage:
+        result = EduMUSE().process_educational_request(topic=job['topic'], requested_flows=[job['flow']], context=context)
+    seconds = time.perf_counter() - start
+    flow_data = result['educational_content'].get(job['flow'], {})
+    if flow_data.get('type', '').endswith('_error'):
+        raise RuntimeError(flow_data.get('content', f"{job['flow']} failed"))
+
+    os.makedirs(job['output_dir'], exist_ok=True)
+    outputs = []
+    result_path = os.path.join(job['output_dir'], 'result.json')
+    write_atomic(result_path, json.dumps({
+        'document': job['path'],
+        'document_hash': job['document_hash'],
+        'pages': job['pages'],
+        'flow': job['flow'],
+        'topic': job['topic'],
+        'user_level': job['user_level'],
+        'seconds': round(seconds, 3),
+        'usage': usage.snapshot(),
+        'result': flow_data
+    }, indent=2, default=str))
+    outputs.append(result_path)
+
+    content_path = os.path.join(job['output_dir'], 'content.md')
+    write_atomic(content_path, f"# {job['flow'].title()}: {job['topic']}\n\n{flow_data.get('sources_found', '')}\n")
+    outputs.append(content_path)
+
+    if job['render_pdfs'] and job['flow'] in ('summary', 'assessment'):
+        generator = PDFGenerator(upload_folder=job['output_dir'])
+        flow_data['topic'] = job['topic']
+        if job['flow'] == 'summary':
+            pdf_files = generator.generate_summary_pdf(flow_data)
+        else:
+            pdf_files = generator.generate_assessment_pdfs(flow_data)
+        outputs.extend(path for key, path in pdf_files.items() if key.endswith('_path'))
+
+    return {'outputs': outputs, 'seconds': round(seconds, 3), 'usage': usage.snapshot()}
+
+
+def worker_environment(args):
+    """Split the process-wide LLM limits evenly across the workers"""
+    environment = {'CREWAI_DISABLE_TELEMETRY': os.environ.get('CREWAI_DISABLE_TELEMETRY', 'true')}
+    if args.offline:
+        environment.update({'EDUMUSE_OFFLINE': '1', 'OPENAI_API_KEY': os.environ.get('OPENAI_API_KEY', 'offline')})
+    environment['EDUMUSE_LLM_CONCURRENCY'] = str(max(1, args.llm_concurrency // args.workers))
+    for variable, default in (('EDUMUSE_LLM_RPM', 450), ('EDUMUSE_LLM_TPM', 180000)):
+        total = int(os.environ.get(variable, default))
+        environment[variable] = str(max(1, math.floor(total / args.workers)))
+    return environment
+
+
+def run_batch(jobs, state, args):
+    pending = [job for key, job in jobs.items()
+               if not state.is_done(key) and not (args.skip_failed and state.is_failed(key))]
+    skipped = len(jobs) - len(pending)
+    print(f"📚 {len(jobs)} jobs, {skipped} already done or skipped, {len(pending)} to run on {args.workers} workers")
+    if not pending:
+        return 0
+
+    failures = 0
+    start = time.perf_counter()
+    # The gateway reads its limits from the environment at import, and spawned workers
+    # import edumuse fresh with this process's environment
+    os.environ.update(worker_environment(args))
+    executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {executor.submit(run_job, job): job for job in pending}
+        for number, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            label = f"[{number}/{len(pending)}] {os.path.basename(job['path'])} · {job['flow']}"
+            try:
+                outcome = future.result()
+            except Exception as e:
+                failures += 1
+                state.record(job, 'failed', error=f"{type(e).__name__}: {e}")
+                print(f"❌ {label}: {type(e).__name__}: {e}")
+            else:
+                state.record(job, 'done', **outcome)
+                print(f"✅ {label} in {outcome['seconds']:.1f}s ({outcome['usage']['llm_requests']} LLM requests)")
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; finished jobs are saved and a rerun resumes from here")
+        executor.shutdown(wait=False, cancel_futures=True)
+        sys.exit(130)
+    executor.shutdown()
+
+    print(f"🏁 {len(pending) - failures} done, {failures} failed in {time.perf_counter() - start:.1f}s; "
+          f"state in {state.path}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run EduMUSE flows over directories or manifests of PDFs")
+    parser.add_argument("inputs", nargs="+", help="Directories of PDFs, PDF files or JSON manifests")
+    parser.add_argument("--flows", nargs="+", default=["summary", "assessment"], choices=DOCUMENT_FLOWS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Root of the output tree")
+    parser.add_argument("--state", help=f"Checkpoint file (default: <output>/{STATE_FILENAME})")
+    parser.add_argument("--cache", default="cache", help="Page text, chunk and question bank cache folder")
+    parser.add_argument("--recursive", action="store_true", help="Also search subdirectories for PDFs")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Worker processes")
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.environ.get('EDUMUSE_LLM_CONCURRENCY', 8)),
+                        help="LLM requests in flight across all workers")
+    parser.add_argument("--user-level", default="intermediate")
+    parser.add_argument("--mode", default="thorough", choices=["fast", "thorough"], help="Summary mode")
+    parser.add_argument("--num-questions", type=int, default=10)
+    parser.add_argument("--no-pdf", action="store_true", help="Skip rendering PDFs")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry jobs that failed in an earlier run")
+    parser.add_argument("--offline", action="store_true", help="Use the fake LLM and search providers")
+    args = parser.parse_intermixed_args(argv)
+    if args.workers < 1 or args.llm_concurrency < 1:
+        parser.error("--workers and --llm-concurrency must be at least 1")
+    # Every worker needs at least one LLM slot
+    args.workers = min(args.workers, args.llm_concurrency)
+
+    try:
+        documents = discover(args.inputs, recursive=args.recursive)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+    jobs = plan_jobs(documents, args.flows, args)
+    state = BatchState(args.state or os.path.join(args.output, STATE_FILENAME))
+    failures = run_batch(jobs, state, args)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
 from typing import List, Dict, Any
 from edumuse.flows.flow_registry import flow_registry
+from edumuse.tools.crewai_llm import GatewayLLM
+from edumuse.tools.search_tools import search_tool
 
 @CrewBase
 class EduMUSE():
@@ -10,13 +11,14 @@ class EduMUSE():
 
     def __init__(self):
         super().__init__()
-        self.search_tool = SerperDevTool()
+        self.search_tool = search_tool()
 
     @agent
     def academic_searcher(self) -> Agent:
         return Agent(
             config=self.agents_config['academic_searcher'],
             tools=[self.search_tool],
+            llm=GatewayLLM(),
             verbose=True
         )
 
@@ -24,6 +26,7 @@ class EduMUSE():
     def flow_coordinator(self) -> Agent:
         return Agent(
             config=self.agents_config['flow_coordinator'],
+            llm=GatewayLLM(),
             verbose=True
         )
 
@@ -57,6 +60,10 @@ class EduMUSE():
 
         # Get the real document content that was passed from file_upload.py
         document_content = context.get('document_content', '')
+        # Content-hashed chunks let flows reuse per-chunk work across re-uploads; they
+        # travel on the source rather than in the (echoed) learning context
+        document_chunks = context.get('document_chunks')
+        context = {key: value for key, value in context.items() if key != 'document_chunks'}
 
         # Create a proper source object with the real content from the PDF
         sources = [
@@ -64,7 +71,8 @@ class EduMUSE():
                 "title": topic,
                 "url": f"localfile://{topic.replace(' ', '_')}",
                 "content": document_content, # Use the actual content here
-                "source_type": "uploaded_document"
+                "source_type": "uploaded_document",
+                "chunks": document_chunks
             }
         ]
         
@@ -97,7 +105,7 @@ class EduMUSE():
 
         return {
             "topic": topic,
-            "sources": sources,
+            "sources": [{key: value for key, value in source.items() if key != 'chunks'} for source in sources],
             "educational_content": final_flow_results,
             "metadata": {
                 "flows_executed": requested_flows,
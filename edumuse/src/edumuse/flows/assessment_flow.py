@@ -1,6 +1,26 @@
+import os
 from crewai import Agent, Crew, Task, Process
 from typing import List, Dict, Any, Optional
 from .flow_registry import EducationFlow, flow_registry
+from ..tools.crewai_llm import GatewayLLM
+from ..tools.question_bank import QUESTION_BANK_FILENAME, get_question_bank, difficulty_rank
+from ..tools.assessment_variants import make_variants
+from ..schemas import AssessmentOutput, parse_assessment_text, structured_output, assessment_to_text
+
+# Per-student variants draw from a pool this many times the assessment size
+VARIANT_POOL_FACTOR = 2
+QUESTION_TYPE_WEIGHTS = {'multiple_choice': 5, 'short_answer': 3, 'essay': 2}
+QUESTION_TYPE_LABELS = {
+    'multiple_choice': "Multiple Choice: {count} questions with 4 options each",
+    'short_answer': "Short Answer: {count} questions requiring 2-3 sentence responses",
+    'essay': "Essay/Long Answer: {count} questions for deeper analysis"
+}
+# Used when every question comes from the bank and no crew writes instructions
+DEFAULT_INSTRUCTIONS = [
+    "Read each question carefully before answering.",
+    "Questions are ordered from easier to harder.",
+    "Answer multiple choice questions with a single letter; write short answers in 2-3 sentences."
+]
 
 class AssessmentFlow(EducationFlow):
     """Educational assessment and quiz generation flow"""
@@ -17,6 +37,7 @@ class AssessmentFlow(EducationFlow):
             that accurately measure student understanding while avoiding common pitfalls like 
             unclear wording or cultural bias. You're skilled at creating various question types 
             that engage different learning styles.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -32,6 +53,7 @@ class AssessmentFlow(EducationFlow):
             answers are accurate and that distractors (wrong answers) are plausible but 
             clearly incorrect. You also excel at writing clear explanations that help 
             students learn from their mistakes.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -46,6 +68,7 @@ class AssessmentFlow(EducationFlow):
             accurately gauge question difficulty and create balanced assessments that 
             neither frustrate nor bore students. You're skilled at creating question 
             progressions that guide learners from basic understanding to mastery.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -68,6 +91,104 @@ class AssessmentFlow(EducationFlow):
         num_questions = context.get('num_questions', 10)
         question_types = context.get('question_types', ['multiple_choice', 'short_answer', 'essay'])
         learning_objectives = context.get('learning_objectives', [])
+        num_variants = context.get('variants', 1)
+        # Per-student variants are sampled locally from one larger pool, so a class costs one crew run
+        pool_size = context.get('pool_size') or (num_questions * VARIANT_POOL_FACTOR if num_variants > 1 else num_questions)
+        
+        # Assemble from previously generated questions for the same content and level first;
+        # the crew only writes the questions the bank cannot supply
+        quota = self._question_quota(pool_size, question_types)
+        document_hash = context.get('document_hash')
+        bank = None
+        if document_hash:
+            bank = get_question_bank(os.path.join(context.get('cache_folder', 'cache'), QUESTION_BANK_FILENAME))
+        banked = []
+        if bank and context.get('reuse_questions', True):
+            banked = bank.select(document_hash, quota, user_level, pages=context.get('pages'))
+        gaps = {
+            question_type: count - sum(1 for question in banked if question.question_type == question_type)
+            for question_type, count in quota.items()
+        }
+        print(f"🏦 {len(banked)} questions from the question bank, {sum(gaps.values())} to generate")
+        
+        generated = AssessmentOutput(instructions=DEFAULT_INSTRUCTIONS, questions=[])
+        if sum(gaps.values()) > 0:
+            covered_concepts = sorted({question.concept for question in banked if question.concept})
+            generated = self._generate(sources, topic, user_level, gaps, covered_concepts, learning_objectives)
+            if bank:
+                bank.add(document_hash, generated.questions, user_level, pages=context.get('pages'))
+        # Only count banked questions as used once the assessment they fill has been built
+        if banked:
+            bank.mark_used(document_hash, banked, user_level, pages=context.get('pages'))
+        
+        # Easier questions first, numbered in their final order
+        questions = sorted(banked + generated.questions, key=difficulty_rank)
+        assessment = AssessmentOutput(
+            instructions=generated.instructions or DEFAULT_INSTRUCTIONS,
+            questions=[question.model_copy(update={'number': number}) for number, question in enumerate(questions, 1)]
+        )
+        
+        variants = []
+        if num_variants > 1:
+            variants = make_variants(assessment, num_variants, min(num_questions, len(assessment.questions)),
+                                     seed=context.get('variant_seed', 0))
+        
+        # ✅ FIXED: Match the expected frontend structure  
+        result = {
+            "flow_type": "assessment",
+            "retrieval_method": "educational_assessment_generation",
+            "sources_found": assessment_to_text(assessment),  # ← Frontend expects this field!
+            # Questions, options, answers and explanations as fields for PDFs and caches
+            "assessment": assessment.model_dump(),
+            "topic": topic,
+            "metadata": {
+                "question_types": question_types,
+                "total_questions": len(assessment.questions),
+                "questions_from_bank": len(banked),
+                "questions_generated": len(generated.questions),
+                "difficulty_level": user_level,
+                "estimated_time": f"{num_questions * 2} minutes",
+                "generation_method": "pedagogical_assessment_design" if generated.questions else "question_bank",
+                "agents_used": ["question_designer", "answer_validator", "difficulty_calibrator"] if generated.questions else []
+            },
+            # Keep assessment-specific data for PDF generation
+            "assessment_details": {
+                "assessment_type": assessment_type,
+                "num_questions": num_questions,
+                "question_types": question_types,
+                "learning_objectives": learning_objectives,
+                "cognitive_levels": ["remember", "understand", "apply", "analyze", "evaluate", "create"]
+            }
+        }
+        if variants:
+            # The pool above is the teacher's master copy; each variant is one student's quiz
+            result["variants"] = [variant.model_dump() for variant in variants]
+            result["metadata"].update({"variants": len(variants), "questions_per_variant": len(variants[0].questions)})
+        return result
+    
+    def _question_quota(self, num_questions: int, question_types: List[str]) -> Dict[str, int]:
+        """Questions per type: half multiple choice, 30% short answer, 20% essay among the requested types"""
+        weights = {question_type: weight for question_type, weight in QUESTION_TYPE_WEIGHTS.items()
+                   if question_type in question_types}
+        if not weights:
+            return {}
+        total = sum(weights.values())
+        quota = {question_type: num_questions * weight // total for question_type, weight in weights.items()}
+        # Rounding leftovers go to the first type, so the counts always add up to num_questions
+        quota[next(iter(quota))] += num_questions - sum(quota.values())
+        return quota
+    
+    def _generate(self, sources: List[Dict[str, Any]], topic: str, user_level: str, gaps: Dict[str, int],
+                  covered_concepts: List[str], learning_objectives: List[str]) -> AssessmentOutput:
+        """Run the three-agent crew for the questions the bank could not supply"""
+        num_questions = sum(gaps.values())
+        type_lines = "\n".join(
+            f"               - {QUESTION_TYPE_LABELS[question_type].format(count=count)}"
+            for question_type, count in gaps.items() if count > 0
+        )
+        type_counts = ', '.join(f"{question_type}: {count}" for question_type, count in gaps.items() if count > 0)
+        covered = (f"\n            Other questions in this assessment already test: {', '.join(covered_concepts)}."
+                   f"\n            Test different concepts where the sources allow.\n" if covered_concepts else "")
         
         # Task 1: Design diverse questions
         question_design_task = Task(
@@ -76,9 +197,7 @@ class AssessmentFlow(EducationFlow):
             
             Requirements:
             1. **Question Types to Include**:
-               - Multiple Choice: {min(num_questions//2, 5)} questions with 4 options each
-               - Short Answer: {min(num_questions//3, 3)} questions requiring 2-3 sentence responses
-               - Essay/Long Answer: {min(num_questions//5, 2)} questions for deeper analysis
+{type_lines}
             
             2. **Cognitive Levels** (use Bloom's Taxonomy):
                - Remember/Understand: 30% of questions
@@ -91,7 +210,7 @@ class AssessmentFlow(EducationFlow):
                - Progressive difficulty
                - No trick questions
                - Culturally neutral language
-            
+            {covered}
             Sources to use:
             {self._format_sources(sources)}
             
@@ -177,16 +296,18 @@ class AssessmentFlow(EducationFlow):
                - Passing score suggestion
                - Alignment with learning objectives: {learning_objectives}
             
-            Create both:
-            - Student version (questions only)
-            - Instructor version (with answers and rubrics)
+            Return all {num_questions} questions ({type_counts}), each with its type,
+            cognitive level, difficulty, concept, options (multiple choice only),
+            correct answer, explanation and rubric.
+            The student version and the instructor answer key are both rendered from
+            these fields, so never leave answers inside the question text.
             """,
             agent=self.difficulty_calibrator,
-            expected_output="""Final calibrated assessment package with:
-            - Student assessment version
-            - Complete instructor answer key
-            - Scoring guidelines and rubrics
-            - Learning enhancement materials"""
+            expected_output="""Final calibrated assessment:
+            - Instructions for students
+            - Questions ordered from easier to harder, each with options, answer,
+              explanation and rubric in their own fields""",
+            output_pydantic=AssessmentOutput
         )
         
         # Create and run the crew
@@ -198,30 +319,7 @@ class AssessmentFlow(EducationFlow):
         )
         
         crew_output = assessment_crew.kickoff()
-        
-        # ✅ FIXED: Match the expected frontend structure  
-        return {
-            "flow_type": "assessment",
-            "retrieval_method": "educational_assessment_generation",
-            "sources_found": str(crew_output),  # ← Frontend expects this field!
-            "topic": topic,
-            "metadata": {
-                "question_types": question_types,
-                "total_questions": num_questions,
-                "difficulty_level": user_level,
-                "estimated_time": f"{num_questions * 2} minutes",
-                "generation_method": "pedagogical_assessment_design",
-                "agents_used": ["question_designer", "answer_validator", "difficulty_calibrator"]
-            },
-            # Keep assessment-specific data for PDF generation
-            "assessment_details": {
-                "assessment_type": assessment_type,
-                "num_questions": num_questions,
-                "question_types": question_types,
-                "learning_objectives": learning_objectives,
-                "cognitive_levels": ["remember", "understand", "apply", "analyze", "evaluate", "create"]
-            }
-        }
+        return structured_output(crew_output, AssessmentOutput, parse_assessment_text)
     
     def _format_sources(self, sources: List[Dict[str, Any]]) -> str:
         """Format sources for agent consumption"""
@@ -267,12 +365,20 @@ class AssessmentFlow(EducationFlow):
                     "num_questions": "Number of questions (default: 10)",
                     "question_types": "Types to include",
                     "assessment_type": "formative|summative|diagnostic",
-                    "learning_objectives": "Specific objectives to assess"
+                    "learning_objectives": "Specific objectives to assess",
+                    "document_hash": "Content the questions are banked under; reused before generating",
+                    "pages": "Optional [start, end] page range the content was taken from",
+                    "reuse_questions": "Assemble from the question bank first (default: True)",
+                    "cache_folder": "Where the question bank database lives (default: cache)",
+                    "variants": "Number of per-student variants to sample from one pool (default: 1)",
+                    "pool_size": "Questions in the pool variants draw from (default: 2x num_questions)",
+                    "variant_seed": "Seed that makes the variants reproducible (default: 0)"
                 }
             },
             "output_format": {
                 "student_version": "Questions without answers",
                 "instructor_version": "Complete with answers and rubrics",
+                "variants": "Per-student question order, options and subsets, each with its own answer key",
                 "metadata": "Scoring guides and alignment info"
             }
         }
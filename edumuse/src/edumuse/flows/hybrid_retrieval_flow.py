@@ -1,7 +1,8 @@
 from crewai import Agent, Crew, Task
-from crewai_tools import SerperDevTool
 from typing import List, Dict, Any
 from .flow_registry import EducationFlow, flow_registry
+from ..tools.crewai_llm import GatewayLLM
+from ..tools.search_tools import search_tool
 
 class HybridRetrievalFlow(EducationFlow):
     """Combines web search + LLM knowledge for comprehensive retrieval"""
@@ -11,7 +12,8 @@ class HybridRetrievalFlow(EducationFlow):
             role="Hybrid Knowledge Integration Specialist",
             goal="Combine web search results with LLM knowledge to create comprehensive academic source collection",
             backstory="Expert at synthesizing real-time web information with foundational academic knowledge to provide both current and authoritative educational resources...",
-            tools=[SerperDevTool()],
+            tools=[search_tool()],
+            llm=GatewayLLM(),
             verbose=True
         )
     
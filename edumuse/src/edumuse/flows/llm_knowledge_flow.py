@@ -1,6 +1,7 @@
 from crewai import Agent, Crew, Task
 from typing import List, Dict, Any
 from .flow_registry import EducationFlow, flow_registry
+from ..tools.crewai_llm import GatewayLLM
 
 class LLMKnowledgeFlow(EducationFlow):
     """Knowledge retrieval using LLM's training data (baseline approach)"""
@@ -11,6 +12,7 @@ class LLMKnowledgeFlow(EducationFlow):
             goal="Extract comprehensive academic knowledge from LLM training data",
             backstory="Expert at accessing and organizing the vast academic knowledge contained in large language model training data, with deep understanding of academic literature across disciplines...",
             tools=[],  # No external tools - pure LLM knowledge
+            llm=GatewayLLM(),
             verbose=True
         )
     
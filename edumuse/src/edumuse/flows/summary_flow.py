@@ -3,6 +3,24 @@
 from crewai import Agent, Crew, Task, Process
 from typing import List, Dict, Any
 from .flow_registry import EducationFlow, flow_registry
+from ..tools.document_cache import ChunkResultCache
+from ..tools.crewai_llm import GatewayLLM
+from ..schemas import SummaryOutput, parse_summary_text, structured_output, summary_to_text
+
+# "fast" writes only the requested level in one call, "thorough" runs the full three-agent pipeline
+SUMMARY_MODES = ("fast", "thorough")
+
+LEVEL_GUIDANCE = {
+    "beginner": "Use simple language, everyday examples and analogies, avoid technical jargon. Length: 300-400 words",
+    "intermediate": "Explain technical terminology clearly, cover main concepts and applications, show connections. Length: 500-700 words",
+    "advanced": "Use field-appropriate technical language, include nuances, current research and open questions. Length: 800-1000 words",
+}
+USER_LEVELS = tuple(LEVEL_GUIDANCE)
+
+# Long chunked documents are condensed chunk by chunk before summarizing; bump the
+# version whenever the map prompt changes so stale chunk notes are not reused
+MAP_STAGE_VERSION = 1
+MAP_STAGE_MIN_CHARS = 20000
 
 class SummaryFlow(EducationFlow):
     """Multi-level educational summary generation flow"""
@@ -17,6 +35,7 @@ class SummaryFlow(EducationFlow):
             concepts in academic materials and understanding how they connect to form a 
             comprehensive knowledge structure. You can quickly identify learning objectives 
             and prerequisite knowledge required for understanding complex topics.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -31,6 +50,7 @@ class SummaryFlow(EducationFlow):
             students, and excel at explaining difficult concepts using appropriate analogies, 
             examples, and progressive complexity. You understand cognitive load theory and 
             apply it to create effective learning materials.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -44,6 +64,7 @@ class SummaryFlow(EducationFlow):
             content, provide appropriate context, and adjust vocabulary and complexity to match 
             learner needs. You're skilled at creating multiple representations of the same 
             concept for different audiences while maintaining educational integrity.""",
+            llm=GatewayLLM(),
             verbose=True,
             allow_delegation=False
         )
@@ -59,6 +80,145 @@ class SummaryFlow(EducationFlow):
         user_level = context.get('user_level', 'intermediate')
         learning_objectives = context.get('learning_objectives', [])
         summary_format = context.get('summary_format', 'structured')
+        summary_mode = context.get('summary_mode', 'thorough')
+        
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary_mode '{summary_mode}', expected one of {SUMMARY_MODES}")
+        
+        sources, map_stage = self._map_chunks(sources, context.get('cache_folder', 'cache'))
+        
+        if summary_mode == 'fast':
+            # Single structured call: only the requested level plus study aids
+            tasks = [self._fast_summary_task(sources, topic, user_level, learning_objectives, summary_format)]
+            agents = [self.summary_writer]
+            agents_used = ["summary_writer"]
+            summary_levels = [user_level]
+            generation_method = "single_pass_level_summary"
+        else:
+            tasks = self._thorough_summary_tasks(sources, topic, user_level, learning_objectives, summary_format)
+            agents = [self.concept_extractor, self.summary_writer, self.level_adapter]
+            agents_used = ["concept_extractor", "summary_writer", "level_adapter"]
+            summary_levels = ["beginner", "intermediate", "advanced"]
+            generation_method = "concept_extraction_to_adaptive_summary"
+        
+        # Create and run the crew
+        summary_crew = Crew(
+            agents=agents,
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=True
+        )
+        
+        crew_output = summary_crew.kickoff()
+        summary = structured_output(crew_output, SummaryOutput, parse_summary_text, default_level=user_level)
+        summary_text = summary_to_text(summary)
+        
+        # ✅ FIXED: Match the expected frontend structure
+        return {
+            "flow_type": "summary",
+            "retrieval_method": "educational_summarization",
+            "sources_found": summary_text,  # ← Frontend expects this field!
+            # Per-level summaries, glossary and takeaways as fields for PDFs and caches
+            "summary": summary.model_dump(),
+            "topic": topic,
+            "metadata": {
+                "summary_levels": summary_levels,
+                "user_level": user_level,
+                "summary_mode": summary_mode,
+                "generation_method": generation_method,
+                "agents_used": agents_used,
+                "map_stage": map_stage,
+                "word_count": len(summary_text.split()),
+                "estimated_reading_time": f"{len(summary_text.split()) // 200 + 1} minutes"
+            },
+            # Keep additional data for potential future use
+            "summary_details": {
+                "levels": summary_levels,
+                "format": summary_format,
+                "learning_objectives": learning_objectives
+            }
+        }
+    
+    def _map_chunks(self, sources: List[Dict[str, Any]], cache_folder: str):
+        """Condense long chunked sources into per-chunk notes, reusing notes of unchanged chunks"""
+        cache = ChunkResultCache(cache_folder, namespace='summary_map')
+        stats = {"chunks": 0, "reused": 0}
+        mapped_sources = []
+        
+        for source in sources:
+            chunks = source.get('chunks') or []
+            if len(chunks) < 2 or len(source.get('content', '')) < MAP_STAGE_MIN_CHARS:
+                mapped_sources.append(source)
+                continue
+            
+            notes = []
+            for chunk in chunks:
+                key = f"{chunk['hash']}_v{MAP_STAGE_VERSION}"
+                entry = cache.get(key)
+                if entry is None:
+                    entry = {"pages": chunk['pages'], "notes": self._summarize_chunk(chunk)}
+                    cache.put(key, entry)
+                else:
+                    stats["reused"] += 1
+                stats["chunks"] += 1
+                first_page, last_page = chunk['pages']
+                notes.append(f"[Pages {first_page}-{last_page}]\n{entry['notes']}")
+            
+            mapped_sources.append({**source, 'content': "\n\n".join(notes)})
+        
+        return mapped_sources, stats
+    
+    def _summarize_chunk(self, chunk: Dict[str, Any]) -> str:
+        """Map stage: extract the key points of one document chunk"""
+        # The prompt only depends on the chunk text so cached notes stay valid across topics and levels
+        chunk_task = Task(
+            description=f"""
+            Extract the key concepts, definitions, results and examples from this section
+            of an academic document. Be faithful to the text and keep technical terms.
+            
+            Section text:
+            {chunk['text']}
+            """,
+            agent=self.concept_extractor,
+            expected_output="Concise bullet-point notes covering every important idea in the section"
+        )
+        chunk_crew = Crew(agents=[self.concept_extractor], tasks=[chunk_task], verbose=True)
+        return str(chunk_crew.kickoff())
+    
+    def _fast_summary_task(self, sources: List[Dict[str, Any]], topic: str, user_level: str,
+                           learning_objectives: List[str], summary_format: str) -> Task:
+        """Build the single-call task used by the fast summary mode"""
+        level_guidance = LEVEL_GUIDANCE.get(user_level, LEVEL_GUIDANCE['intermediate'])
+        
+        return Task(
+            description=f"""
+            Create an educational summary about '{topic}' for a {user_level} level learner,
+            working directly from the provided academic sources.
+            
+            1. **{user_level.title()} Level Summary**:
+               {level_guidance}
+            
+            2. **Glossary**: 8-12 important terms with one-sentence definitions
+            
+            3. **Key Takeaways**: 5-7 bullet points
+            
+            Learning Objectives: {learning_objectives if learning_objectives else 'General understanding'}
+            Summary format requested: {summary_format}
+            
+            Sources to analyze:
+            {self._format_sources(sources)}
+            """,
+            agent=self.summary_writer,
+            expected_output=f"""A structured summary with:
+            - One summary at the {user_level} level
+            - A glossary of terms with definitions
+            - 5-7 key takeaways""",
+            output_pydantic=SummaryOutput
+        )
+    
+    def _thorough_summary_tasks(self, sources: List[Dict[str, Any]], topic: str, user_level: str,
+                                learning_objectives: List[str], summary_format: str) -> List[Task]:
+        """Build the three sequential tasks used by the thorough summary mode"""
         
         # Task 1: Extract key concepts and learning objectives
         concept_extraction_task = Task(
@@ -143,43 +303,13 @@ class SummaryFlow(EducationFlow):
             """,
             agent=self.level_adapter,
             expected_output="""Enhanced summaries with:
-            - Optimized content for user's level
-            - Learning progression guidance
-            - Glossary and study aids
-            - Personalized recommendations"""
+            - The beginner, intermediate and advanced summaries, each optimized and with
+              learning progression guidance
+            - Glossary, key takeaways and study tips as separate fields""",
+            output_pydantic=SummaryOutput
         )
         
-        # Create and run the crew
-        summary_crew = Crew(
-            agents=[self.concept_extractor, self.summary_writer, self.level_adapter],
-            tasks=[concept_extraction_task, summary_creation_task, adaptation_task],
-            process=Process.sequential,
-            verbose=True
-        )
-        
-        crew_output = summary_crew.kickoff()
-        
-        # ✅ FIXED: Match the expected frontend structure
-        return {
-            "flow_type": "summary",
-            "retrieval_method": "educational_summarization",
-            "sources_found": str(crew_output),  # ← Frontend expects this field!
-            "topic": topic,
-            "metadata": {
-                "summary_levels": ["beginner", "intermediate", "advanced"],
-                "user_level": user_level,
-                "generation_method": "concept_extraction_to_adaptive_summary",
-                "agents_used": ["concept_extractor", "summary_writer", "level_adapter"],
-                "word_count": len(str(crew_output).split()),
-                "estimated_reading_time": f"{len(str(crew_output).split()) // 200 + 1} minutes"
-            },
-            # Keep additional data for potential future use
-            "summary_details": {
-                "levels": ["beginner", "intermediate", "advanced"],
-                "format": summary_format,
-                "learning_objectives": learning_objectives
-            }
-        }
+        return [concept_extraction_task, summary_creation_task, adaptation_task]
     
     def _format_sources(self, sources: List[Dict[str, Any]]) -> str:
         """Format sources for agent consumption"""
@@ -221,7 +351,9 @@ class SummaryFlow(EducationFlow):
                     "topic": "Subject matter to summarize",
                     "user_level": "beginner|intermediate|advanced",
                     "learning_objectives": "Optional specific goals",
-                    "summary_format": "structured|narrative|bullet_points"
+                    "summary_format": "structured|narrative|bullet_points",
+                    "summary_mode": "fast|thorough (default: thorough)",
+                    "cache_folder": "Where per-chunk map outputs are cached (default: cache)"
                 }
             },
             "output_format": {
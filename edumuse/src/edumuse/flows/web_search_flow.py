@@ -1,7 +1,8 @@
 from crewai import Agent, Crew, Task
-from crewai_tools import SerperDevTool
 from typing import List, Dict, Any
 from .flow_registry import EducationFlow, flow_registry
+from ..tools.crewai_llm import GatewayLLM
+from ..tools.search_tools import search_tool
 
 class WebSearchFlow(EducationFlow):
     """Web-enhanced academic source discovery using search APIs"""
@@ -11,7 +12,8 @@ class WebSearchFlow(EducationFlow):
             role="Web Search Academic Specialist",
             goal="Discover current academic sources using web search APIs",
             backstory="Expert at crafting academic search queries and filtering web results for educational credibility and relevance...",
-            tools=[SerperDevTool()],
+            tools=[search_tool()],
+            llm=GatewayLLM(),
             verbose=True
         )
     
@@ -0,0 +1,261 @@
+"""Structured outputs of the content flows
+
+The final task of each crew is asked for JSON matching these models (CrewAI's
+output_pydantic). When a model answers in prose instead, the parse_* functions
+recover the same structure from the text once, so everything downstream (PDFs,
+caches, API responses) works on fields rather than re-parsing strings.
+"""
+
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+QUESTION_TYPES = ("multiple_choice", "short_answer", "essay")
+
+QUESTION_HEADER = re.compile(r'^(?:\*\*)?(?:question\s+(\d+)|q(\d+)[.:)]|(\d+)\.)\s*:?\s*(.*)$', re.IGNORECASE)
+QUESTION_TAGS = re.compile(r'^\[([^\]]+)\]\s*(.*)$')
+OPTION_LINE = re.compile(r'^([A-Da-d])[).]\s+(.*)$')
+FIELD_LINE = re.compile(r'^(correct answer|answer|explanation|concept|rubric|model answer)\s*:\s*(.*)$', re.IGNORECASE)
+LEVEL_HEADER = re.compile(r'^(?:=+|#+|\*\*)?\s*(beginner|intermediate|advanced)(?: level)?(?: summary)?\s*(?:=+|\*\*)?:?$',
+                          re.IGNORECASE)
+# Written by summary_to_text for text shared by all levels
+OVERVIEW_HEADER = re.compile(r'^=+\s*OVERVIEW\s*=+$')
+SECTION_HEADER = re.compile(r'^(?:=+|#+|\*\*)?\s*(glossary|key takeaways|study tips)\s*(?:=+|\*\*)?:?$', re.IGNORECASE)
+LIST_ITEM = re.compile(r'^(?:[-*•]|\d+[.)])\s+')
+HEADING_LINE = re.compile(r'^(?:=+|#+)|^section\s+\d+', re.IGNORECASE)
+# Leading option letter of a multiple choice answer: "B", "b)", "(C) Paris", "D. 42"
+ANSWER_LETTER = re.compile(r'^\(?([A-Ha-h])(?:[).:]|$|\s)')
+# Per-question notes the PDFs never showed
+COMMENTARY_LINE = re.compile(r'^(?:-\s*)?(?:time|points|note|common misconception)\b[^:]*:', re.IGNORECASE)
+
+
+class Option(BaseModel):
+    label: str = Field(description="Option letter: A, B, C or D")
+    text: str
+
+
+class Question(BaseModel):
+    number: int
+    question_type: str = Field("multiple_choice", description="multiple_choice, short_answer or essay")
+    text: str
+    bloom_level: Optional[str] = Field(None, description="Bloom's taxonomy level, e.g. Remember or Analyze")
+    difficulty: Optional[str] = Field(None, description="Easy, Medium or Hard")
+    concept: Optional[str] = Field(None, description="Concept being tested")
+    options: List[Option] = Field(default_factory=list, description="Answer options, multiple choice only")
+    answer: Optional[str] = Field(None, description="Correct option letter, or a model answer for open questions")
+    explanation: Optional[str] = None
+    rubric: Optional[str] = Field(None, description="Scoring rubric for short answer and essay questions")
+
+    @model_validator(mode='after')
+    def _answer_as_letter(self):
+        """Store a multiple choice answer as its option letter: 'A) Paris' or 'Paris' -> 'A'
+
+        Answer keys, variant remapping and grading all compare letters.
+        """
+        if self.options and self.answer:
+            self.answer = option_letter(self.answer, self.options) or self.answer
+        return self
+
+
+class AssessmentOutput(BaseModel):
+    instructions: List[str] = Field(default_factory=list)
+    questions: List[Question]
+
+
+class LevelSummary(BaseModel):
+    level: str = Field(description="beginner, intermediate or advanced (overview for shared introductory text)")
+    text: str
+
+
+class GlossaryEntry(BaseModel):
+    term: str
+    definition: str
+
+
+class SummaryOutput(BaseModel):
+    summaries: List[LevelSummary]
+    glossary: List[GlossaryEntry] = Field(default_factory=list)
+    key_takeaways: List[str] = Field(default_factory=list)
+    study_tips: List[str] = Field(default_factory=list)
+
+
+def option_letter(answer, options):
+    """The option label an answer refers to, by leading letter or by option text, or None"""
+    answer = (answer or '').strip()
+    labels = {option.label.strip().upper(): option for option in options}
+    for label, option in labels.items():
+        if option.text.strip().lower() == answer.lower():
+            return label
+    letter = ANSWER_LETTER.match(answer)
+    if letter and letter.group(1).upper() in labels:
+        return letter.group(1).upper()
+    return None
+
+
+def _question_type(tags):
+    lowered = tags.lower()
+    if 'short' in lowered:
+        return 'short_answer'
+    if 'essay' in lowered or 'long' in lowered:
+        return 'essay'
+    return 'multiple_choice'
+
+
+def parse_assessment_text(text):
+    """Recover questions, options, answers and explanations from a prose assessment"""
+    questions = []
+    instructions = []
+    current = None
+    last_field = None
+
+    for raw_line in text.split('\n'):
+        line = raw_line.strip().strip('*').strip()
+        if not line:
+            continue
+
+        header = QUESTION_HEADER.match(line)
+        if header:
+            number = next(int(group) for group in header.groups()[:3] if group)
+            rest = header.group(4)
+            current = {'number': number, 'text': '', 'options': []}
+            tags = QUESTION_TAGS.match(rest)
+            if tags:
+                parts = [part.strip() for part in re.split(r'\s+-\s+|,', tags.group(1))]
+                current['question_type'] = _question_type(tags.group(1))
+                current['bloom_level'] = parts[1] if len(parts) > 1 else None
+                current['difficulty'] = parts[2] if len(parts) > 2 else None
+                rest = tags.group(2)
+            current['text'] = rest
+            questions.append(current)
+            last_field = 'text'
+            continue
+
+        if current is None:
+            if not HEADING_LINE.match(line):
+                instructions.append(LIST_ITEM.sub('', line))
+            continue
+        if COMMENTARY_LINE.match(line):
+            continue
+
+        option = OPTION_LINE.match(line)
+        field = FIELD_LINE.match(line)
+        if option and last_field not in ('answer', 'explanation', 'rubric'):
+            current['options'].append({'label': option.group(1).upper(), 'text': option.group(2)})
+            last_field = 'options'
+        elif field:
+            name = field.group(1).lower()
+            key = {'correct answer': 'answer', 'model answer': 'answer'}.get(name, name)
+            value = field.group(2)
+            if key == 'answer':
+                letter = re.match(r'^([A-Da-d])(?:[).]|$|\s)', value)
+                value = letter.group(1).upper() if letter and current['options'] else value
+            current[key] = value
+            last_field = key
+        elif last_field in ('explanation', 'rubric', 'answer') and current.get(last_field):
+            current[last_field] += ' ' + line
+        elif not current['text']:
+            current['text'] = line
+            last_field = 'text'
+        elif last_field == 'text':
+            current['text'] += ' ' + line
+
+    for question in questions:
+        if not question['options'] and question.get('question_type', 'multiple_choice') == 'multiple_choice':
+            question['question_type'] = 'short_answer'
+    return AssessmentOutput(instructions=instructions[:10], questions=[Question(**question) for question in questions])
+
+
+def parse_summary_text(text, default_level='intermediate'):
+    """Split a prose summary into per-level summaries, glossary, takeaways and study tips"""
+    levels = {}
+    sections = {'glossary': [], 'key takeaways': [], 'study tips': []}
+    current_level = None
+    current_section = None
+
+    for raw_line in text.split('\n'):
+        line = raw_line.strip()
+        if not line:
+            if current_section is None:
+                levels.setdefault(current_level, []).append('')
+            continue
+        level = LEVEL_HEADER.match(line)
+        section = SECTION_HEADER.match(line)
+        if level or OVERVIEW_HEADER.match(line):
+            current_level, current_section = level.group(1).lower() if level else 'overview', None
+            levels.setdefault(current_level, [])
+        elif section:
+            current_level, current_section = None, section.group(1).lower()
+        elif current_section:
+            sections[current_section].append(LIST_ITEM.sub('', line))
+        else:
+            levels.setdefault(current_level, []).append(line)
+
+    # Text before the first level heading is the summary itself when there are no headings at all
+    preamble = levels.pop(None, [])
+    if not levels:
+        levels[default_level] = preamble
+    elif '\n'.join(preamble).strip():
+        levels = {'overview': preamble + levels.pop('overview', []), **levels}
+
+    glossary = []
+    for entry in sections['glossary']:
+        term, separator, definition = entry.partition(':')
+        if separator and definition.strip():
+            glossary.append(GlossaryEntry(term=term.strip(' *'), definition=definition.strip()))
+
+    return SummaryOutput(
+        summaries=[
+            LevelSummary(level=level, text='\n'.join(lines).strip())
+            for level, lines in levels.items() if '\n'.join(lines).strip()
+        ] or [LevelSummary(level=default_level, text=text.strip())],
+        glossary=glossary,
+        key_takeaways=sections['key takeaways'],
+        study_tips=sections['study tips']
+    )
+
+
+def structured_output(crew_output, model, parse_text, **parse_kwargs):
+    """The final task's validated model, or the structure recovered from its raw text"""
+    structured = getattr(crew_output, 'pydantic', None)
+    if isinstance(structured, model):
+        return structured
+    return parse_text(str(crew_output), **parse_kwargs)
+
+
+def assessment_to_text(assessment, include_answers=True):
+    """Readable assessment in the 'Question N:' layout the frontend has always shown"""
+    blocks = [f"- {line}" for line in assessment.instructions]
+    for question in assessment.questions:
+        tags = ' - '.join(
+            part for part in (question.question_type.replace('_', ' ').title(), question.bloom_level,
+                              question.difficulty) if part
+        )
+        lines = [f"Question {question.number}: [{tags}]", question.text]
+        if question.concept:
+            lines.append(f"Concept: {question.concept}")
+        lines.extend(f"{option.label}) {option.text}" for option in question.options)
+        if include_answers:
+            if question.answer:
+                lines.append(f"Correct Answer: {question.answer}")
+            if question.explanation:
+                lines.append(f"Explanation: {question.explanation}")
+            if question.rubric:
+                lines.append(f"Rubric: {question.rubric}")
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+
+def summary_to_text(summary):
+    """Readable summary with one '=== LEVEL SUMMARY ===' section per level"""
+    parts = [
+        f"=== {entry.level.upper()}{'' if entry.level == 'overview' else ' LEVEL SUMMARY'} ===\n{entry.text}"
+        for entry in summary.summaries
+    ]
+    if summary.glossary:
+        parts.append("=== GLOSSARY ===\n" + '\n'.join(f"{entry.term}: {entry.definition}" for entry in summary.glossary))
+    if summary.key_takeaways:
+        parts.append("=== KEY TAKEAWAYS ===\n" + '\n'.join(f"- {item}" for item in summary.key_takeaways))
+    if summary.study_tips:
+        parts.append("=== STUDY TIPS ===\n" + '\n'.join(f"- {item}" for item in summary.study_tips))
+    return '\n\n'.join(parts)
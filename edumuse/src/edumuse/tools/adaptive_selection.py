@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Item difficulty on the IRT logit scale, from the calibration metadata stored with each question
+DIFFICULTY_LOGITS = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+BLOOM_LOGITS = {'remember': -0.5, 'understand': -0.25, 'apply': 0.0, 'analyze': 0.25, 'evaluate': 0.5, 'create': 0.75}
+# Questions are calibrated for a learner level, so a beginner's "hard" sits below an advanced "hard"
+LEVEL_LOGITS = {'beginner': -1.0, 'intermediate': 0.0, 'advanced': 1.0, 'graduate': 1.5}
+DEFAULT_DISCRIMINATION = 1.0
+
+# Ability is estimated on a fixed grid under a standard normal prior (expected a posteriori)
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+LOG_PRIOR = -0.5 * THETA_GRID ** 2
+
+DEFAULT_MAX_ITEMS = 20
+DEFAULT_TARGET_SE = 0.3
+MAX_CACHED_POOLS = 32
+
+
+class ItemPool:
+    """Three-parameter logistic (3PL) item parameters for one document's banked questions
+
+    Parameters live in parallel NumPy arrays, so the probability and Fisher information
+    of every item at an ability estimate are a few vector operations.
+    """
+
+    def __init__(self, ids, discrimination, difficulty, guessing, question_types=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.a = np.asarray(discrimination, dtype=np.float64)
+        self.b = np.asarray(difficulty, dtype=np.float64)
+        self.c = np.asarray(guessing, dtype=np.float64)
+        self.a_squared = self.a ** 2
+        self.question_types = np.asarray(question_types if question_types is not None else ['multiple_choice'] * len(ids))
+        self.positions = {int(item_id): position for position, item_id in enumerate(self.ids)}
+        self._eligible = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from question bank rows: id, user_level, question_type, bloom_level, difficulty, option_count"""
+        ids, difficulty, guessing, question_types = [], [], [], []
+        for row in rows:
+            ids.append(row['id'])
+            question_types.append(row['question_type'])
+            difficulty.append(LEVEL_LOGITS.get(row['user_level'], 0.0)
+                              + DIFFICULTY_LOGITS.get(row['difficulty'], 0.0)
+                              + BLOOM_LOGITS.get(row['bloom_level'], 0.0))
+            # A blind guess gets a multiple choice item right one time in option_count
+            option_count = row['option_count'] or 0
+            guessing.append(1.0 / option_count if row['question_type'] == 'multiple_choice' and option_count else 0.0)
+        return cls(ids, np.full(len(ids), DEFAULT_DISCRIMINATION), difficulty, guessing, question_types)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def probability(self, theta, positions=None):
+        """P(correct) for the given items (all by default); theta may be a scalar or a column of abilities"""
+        a, b, c = (self.a, self.b, self.c) if positions is None else (self.a[positions], self.b[positions], self.c[positions])
+        return c + (1.0 - c) / (1.0 + np.exp(-a * (theta - b)))
+
+    def information(self, theta):
+        """Fisher information of every item at ability theta"""
+        # With q the logistic part of P, (P - c) / (1 - c) is q itself
+        q = np.exp(-self.a * (theta - self.b))
+        q += 1.0
+        np.reciprocal(q, out=q)
+        p = self.c + (1.0 - self.c) * q
+        q *= q
+        q *= self.a_squared
+        q *= 1.0 - p
+        q /= p
+        return q
+
+    def estimate(self, positions, correct):
+        """Expected a posteriori ability and its standard error given scored responses"""
+        log_posterior = LOG_PRIOR.copy()
+        if len(positions):
+            p = self.probability(THETA_GRID[:, None], np.asarray(positions))
+            p = np.clip(p, 1e-9, 1 - 1e-9)
+            outcome = np.asarray(correct, dtype=np.float64)
+            log_posterior += (outcome * np.log(p) + (1.0 - outcome) * np.log1p(-p)).sum(axis=1)
+        weights = np.exp(log_posterior - log_posterior.max())
+        weights /= weights.sum()
+        theta = float(weights @ THETA_GRID)
+        return theta, float(np.sqrt(weights @ (THETA_GRID - theta) ** 2))
+
+    def eligible(self, question_types):
+        """0 for items of the given types and -inf for the rest, computed once per combination"""
+        key = tuple(sorted(question_types))
+        if key not in self._eligible:
+            self._eligible[key] = np.where(np.isin(self.question_types, key), 0.0, -np.inf)
+        return self._eligible[key]
+
+    def most_informative(self, theta, answered_positions, eligible=None):
+        """Position of the unanswered (eligible) item with the highest information at theta, or None"""
+        information = self.information(theta)
+        if eligible is not None:
+            information += eligible
+        information[np.asarray(answered_positions, dtype=np.int64)] = -np.inf
+        position = int(np.argmax(information))
+        return None if information[position] == -np.inf else position
+
+
+def next_item(pool, responses, max_items=DEFAULT_MAX_ITEMS, target_se=DEFAULT_TARGET_SE, question_types=None):
+    """Score the responses so far and choose the next item
+
+    `responses` is a list of (item id, correct) pairs. Returns the ability estimate,
+    its standard error and the next item id (restricted to question_types, if given),
+    which is None once the estimate is precise enough, max_items have been asked or
+    the eligible items are exhausted.
+    """
+    positions = [pool.positions[item_id] for item_id, _ in responses]
+    theta, standard_error = pool.estimate(positions, [correct for _, correct in responses])
+    done = len(responses) >= max_items or (bool(responses) and standard_error <= target_se)
+    eligible = pool.eligible(question_types) if question_types else None
+    position = None if done or not len(pool) else pool.most_informative(theta, positions, eligible)
+    return {
+        'theta': theta,
+        'standard_error': standard_error,
+        'next_item': None if position is None else int(pool.ids[position])
+    }
+
+
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def load_item_pool(bank, document_hash, pages=None):
+    """Item pool for a document's banked questions, rebuilt only when the bank has changed for it"""
+    key = (bank.db_path, document_hash, tuple(pages) if pages else None)
+    revision = bank.revision(document_hash, pages=pages)
+    with _pools_lock:
+        cached = _pools.get(key)
+        if cached and cached[0] == revision:
+            _pools.move_to_end(key)
+            return cached[1]
+
+    pool = ItemPool.from_rows(bank.item_parameters(document_hash, pages=pages))
+    with _pools_lock:
+        _pools[key] = (revision, pool)
+        _pools.move_to_end(key)
+        while len(_pools) > MAX_CACHED_POOLS:
+            _pools.popitem(last=False)
+    return pool
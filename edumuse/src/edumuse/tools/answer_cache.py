@@ -0,0 +1,146 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+EMBEDDING_DIMENSIONS = 2048
+NGRAM_SIZE = 3
+
+# Question framing that changes the phrasing but not what is being asked. Only these
+# leading phrases and articles are dropped; interrogatives and auxiliaries such as
+# how/why/does stay, since they separate one intent from another
+FRAMING_PREFIXES = tuple(tuple(phrase.split()) for phrase in (
+    'can you', 'could you', 'would you', 'please', 'what is', 'what are', 'whats', 'what s',
+    'explain', 'define', 'describe', 'tell me about', 'tell me', 'give me', 'the meaning of', 'meaning of'
+))
+FILLER_WORDS = frozenset(('a', 'an', 'the', 'please'))
+
+# A question that opens with one of these only matches cached questions opening with the same word
+INTENT_WORDS = frozenset('''
+how why what which who whom whose when where does do did is are was were can could should would will has have
+'''.split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(question):
+    """Lowercase, split hyphenated terms and drop framing: 'Please explain self-attention?' -> 'self attention'"""
+    words = WORD_PATTERN.findall(question.lower())
+    stripped = True
+    while stripped:
+        stripped = False
+        for prefix in FRAMING_PREFIXES:
+            if tuple(words[:len(prefix)]) == prefix and len(words) > len(prefix):
+                words = words[len(prefix):]
+                stripped = True
+    content = [word for word in words if word not in FILLER_WORDS]
+    return ' '.join(content or words)
+
+
+def question_intent(normalized):
+    """Leading interrogative or auxiliary of a normalized question: 'why does x work' -> 'why'"""
+    first = normalized.split(' ', 1)[0]
+    return first if first in INTENT_WORDS else ''
+
+
+def embed_question(normalized):
+    """Hashed word and character n-gram vector, L2-normalised so a dot product is cosine similarity"""
+    vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+    padded = f" {normalized} "
+    features = normalized.split() + [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], 'little') % EMBEDDING_DIMENSIONS
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] += sign
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """Reuse verified QA answers for rephrasings of a question about the same material
+
+    Entries are scoped (e.g. by document hash and page range) so an answer is only
+    reused for the content it was produced from. Lookup compares the question's
+    embedding with every entry in its scope that asks the same kind of question (see
+    `question_intent`) in one matrix product; the best match at or above `threshold`
+    is a hit. Entries expire after `ttl_seconds` and the least
+    recently used one is evicted beyond `max_entries`.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, question, scope, threshold=None):
+        """Return (answer, similarity) for the closest cached question in scope, or None"""
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_question(question)
+        vector = embed_question(normalized)
+        intent = question_intent(normalized)
+
+        with self._lock:
+            self._expire(scope)
+            keys = [key for key in self._scopes.get(scope, ()) if self._entries[key]['intent'] == intent]
+            if keys:
+                matrix = np.stack([self._entries[key]['vector'] for key in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    self._entries.move_to_end(keys[best])
+                    self._stats['hits'] += 1
+                    return self._entries[keys[best]]['answer'], float(similarities[best])
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, question, scope, answer):
+        normalized = normalize_question(question)
+        key = (scope, normalized)
+        with self._lock:
+            self._entries[key] = {
+                'vector': embed_question(normalized),
+                'intent': question_intent(normalized),
+                'answer': answer,
+                'stored_at': time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            self._scopes.setdefault(scope, set()).add(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'threshold': self.threshold
+            }
+
+    def _expire(self, scope):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [key for key in self._scopes.get(scope, ()) if self._entries[key]['stored_at'] < cutoff]:
+            self._remove(key)
+            self._stats['expirations'] += 1
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._scopes.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._scopes[key[0]]
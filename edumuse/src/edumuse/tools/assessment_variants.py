@@ -0,0 +1,88 @@
+import random
+import re
+
+from ..schemas import AssessmentOutput, option_letter
+
+OPTION_LABELS = 'ABCDEFGH'
+# "Option B", "choice (c)", "answer (a)" and similar references in explanations follow the
+# options when they move; after "answer" a lowercase letter must be in parentheses, so
+# "answer a question" is left alone
+OPTION_REFERENCE = re.compile(r'\b((?i:option|choice)\s+\(?|(?i:answer)\s+(?=\(|[A-H]\b)\(?)([A-Ha-h])(?!\w)')
+
+
+def _stratum(question):
+    return question.question_type, (question.difficulty or 'medium').strip().lower()
+
+
+def balanced_sample(questions, size, rng):
+    """Sample `size` questions keeping the pool's mix of question types and difficulties
+
+    Each (type, difficulty) stratum gets its proportional share, largest remainders
+    first, so every variant drawn from the same pool is equally long and equally hard.
+    """
+    if size >= len(questions):
+        return list(questions)
+
+    buckets = {}
+    for question in questions:
+        buckets.setdefault(_stratum(question), []).append(question)
+    shares = {stratum: size * len(bucket) / len(questions) for stratum, bucket in buckets.items()}
+    counts = {stratum: int(share) for stratum, share in shares.items()}
+    by_remainder = sorted(shares, key=lambda stratum: (shares[stratum] - counts[stratum], len(buckets[stratum])),
+                          reverse=True)
+    for stratum in by_remainder[:size - sum(counts.values())]:
+        counts[stratum] += 1
+
+    return [question for stratum, bucket in buckets.items() for question in rng.sample(bucket, counts[stratum])]
+
+
+def permute_options(question, rng):
+    """Shuffle a multiple choice question's options, relabel them and remap the answer key"""
+    if len(question.options) < 2:
+        return question
+    options = list(question.options)
+    rng.shuffle(options)
+    relabel = {option.label.upper(): OPTION_LABELS[index] for index, option in enumerate(options)}
+
+    def relabel_reference(match):
+        letter = match.group(2)
+        new = relabel.get(letter.upper(), letter.upper())
+        return match.group(1) + (new if letter.isupper() else new.lower())
+
+    def remap(text):
+        if not text:
+            return text
+        return OPTION_REFERENCE.sub(relabel_reference, text)
+
+    answer = question.answer
+    letter = option_letter(answer, question.options)
+    if letter:
+        answer = relabel[letter]
+    return question.model_copy(update={
+        'options': [option.model_copy(update={'label': relabel[option.label.upper()]}) for option in options],
+        'answer': answer,
+        'explanation': remap(question.explanation)
+    })
+
+
+def make_variants(assessment, count, questions_per_variant=None, seed=0):
+    """Build `count` distinct assessments from one question pool without calling the LLM
+
+    Each variant samples a difficulty-balanced subset of the pool, shuffles question
+    order and permutes multiple choice options. Variants are reproducible: the same
+    pool, count and seed always give the same variants.
+    """
+    size = questions_per_variant or len(assessment.questions)
+    variants = []
+    for index in range(count):
+        rng = random.Random(f"{seed}:{index}")
+        questions = balanced_sample(assessment.questions, size, rng)
+        rng.shuffle(questions)
+        variants.append(AssessmentOutput(
+            instructions=assessment.instructions,
+            questions=[
+                permute_options(question, rng).model_copy(update={'number': number})
+                for number, question in enumerate(questions, 1)
+            ]
+        ))
+    return variants
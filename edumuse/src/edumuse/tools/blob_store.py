@@ -0,0 +1,49 @@
+import hashlib
+import os
+import tempfile
+
+from .document_cache import HASH_BLOCK_SIZE
+
+
+class BlobStore:
+    """Content-addressed file storage: each unique document is stored once as <sha256>.pdf"""
+
+    def __init__(self, folder='blobs'):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, sha256):
+        return os.path.join(self.folder, f"{sha256}.pdf")
+
+    def linearized_path(self, sha256):
+        """Optional fast-web-view copy served in place of the original"""
+        return os.path.join(self.folder, f"{sha256}.linear.pdf")
+
+    def exists(self, sha256):
+        return bool(sha256) and os.path.exists(self.path(sha256))
+
+    def put_stream(self, stream):
+        """Write a stream to disk while hashing it; returns (sha256, size, created)"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+        return sha256, size, self.commit(tmp_path, sha256)
+
+    def commit(self, tmp_path, sha256):
+        """Move a fully written file into place; returns False if the content was already stored"""
+        if self.exists(sha256):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, self.path(sha256))
+        return True
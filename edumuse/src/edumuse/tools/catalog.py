@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+# Generated PDFs that older versions wrote straight into uploads/
+LEGACY_ARTIFACT_PATTERN = re.compile(r'_(assessment|answer_key|summary)_\d{8}_\d{6}\.pdf$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    filename TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER,
+    sha256 TEXT,
+    page_count INTEGER,
+    ingestion_state TEXT NOT NULL,
+    source_filename TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (kind, filename)
+);
+CREATE INDEX IF NOT EXISTS idx_files_sha256 ON files(sha256);
+CREATE TABLE IF NOT EXISTS collections (
+    name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (name, filename)
+);
+CREATE TABLE IF NOT EXISTS catalog_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_state (key, value) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS request_artifacts (
+    request_key TEXT PRIMARY KEY,
+    files TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+"""
+
+FILE_COLUMNS = ('filename', 'kind', 'size', 'sha256', 'page_count', 'ingestion_state', 'source_filename', 'created_at', 'updated_at')
+
+
+class FileCatalog:
+    """SQLite catalog of uploaded documents and derived artifacts"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def upsert(self, filename, kind, **fields):
+        """Insert or update a file record; only the given fields are changed on update
+
+        New records start in the 'pending' ingestion state unless one is given.
+        """
+        now = datetime.now().isoformat()
+        unknown = set(fields) - set(FILE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown catalog fields: {sorted(unknown)}")
+
+        columns = {**fields, 'updated_at': now}
+        assignments = ', '.join(f"{column} = excluded.{column}" for column in columns)
+        insert_columns = {'filename': filename, 'kind': kind, 'created_at': now, 'ingestion_state': 'pending', **columns}
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO files ({', '.join(insert_columns)}) VALUES ({', '.join('?' * len(insert_columns))}) "
+                f"ON CONFLICT (kind, filename) DO UPDATE SET {assignments}",
+                tuple(insert_columns.values())
+            )
+            self._bump_version()
+
+    def get(self, filename, kind='upload'):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM files WHERE kind = ? AND filename = ?', (kind, filename)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_sha256(self, sha256, kind='upload', ingestion_state=None):
+        """Return one record with this content hash, optionally in a given ingestion state"""
+        query = 'SELECT * FROM files WHERE sha256 = ? AND kind = ?'
+        params = [sha256, kind]
+        if ingestion_state:
+            query += ' AND ingestion_state = ?'
+            params.append(ingestion_state)
+        with self._lock:
+            row = self._conn.execute(query + ' LIMIT 1', params).fetchone()
+        return dict(row) if row else None
+
+    def list_files(self, kind='upload', limit=100, after=None):
+        """Keyset-paginated listing ordered by filename; cost is O(limit) at any depth"""
+        query = 'SELECT * FROM files WHERE kind = ?'
+        params = [kind]
+        if after:
+            query += ' AND filename > ?'
+            params.append(after)
+        query += ' ORDER BY filename LIMIT ?'
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(query, params).fetchall()]
+
+        next_cursor = rows[limit - 1]['filename'] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def add_to_collection(self, name, filenames):
+        """Group uploads into a named collection (e.g. a course); re-adding a file is a no-op"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO collections (name, filename, added_at) VALUES (?, ?, ?)',
+                [(name, filename, now) for filename in filenames]
+            )
+            self._bump_version()
+
+    def remove_from_collection(self, name, filenames):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'DELETE FROM collections WHERE name = ? AND filename = ?',
+                [(name, filename) for filename in filenames]
+            )
+            self._bump_version()
+
+    def collection_files(self, name):
+        """Upload records in a collection, ordered by filename"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.* FROM collections JOIN files ON files.kind = 'upload' AND files.filename = collections.filename "
+                'WHERE collections.name = ? ORDER BY files.filename', (name,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_collections(self):
+        """Return [{'name', 'documents'}] for every collection"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT name, COUNT(*) AS documents FROM collections GROUP BY name ORDER BY name'
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_artifacts(self, request_key, files):
+        """Remember which artifact filenames a request produced, replacing any earlier entry"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO request_artifacts (request_key, files, recorded_at) VALUES (?, ?, ?)',
+                (request_key, json.dumps(files), now)
+            )
+        return {'files': files, 'recorded_at': now}
+
+    def request_artifacts(self, request_key):
+        """Return {'files', 'recorded_at'} recorded for a request, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT files, recorded_at FROM request_artifacts WHERE request_key = ?', (request_key,)
+            ).fetchone()
+        return {'files': json.loads(row['files']), 'recorded_at': row['recorded_at']} if row else None
+
+    def version(self):
+        """Monotonic counter bumped on every write, used to build listing ETags"""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM catalog_state WHERE key = 'version'").fetchone()[0]
+
+    def sync_folder(self, folder, kind='upload'):
+        """Register files already on disk that the catalog does not know about yet"""
+        with self._lock:
+            known = {row[0] for row in self._conn.execute('SELECT filename FROM files')}
+
+        added = []
+        for filename in os.listdir(folder):
+            if not filename.lower().endswith('.pdf') or filename in known:
+                continue
+            file_kind = 'artifact' if kind == 'upload' and LEGACY_ARTIFACT_PATTERN.search(filename) else kind
+            size = os.path.getsize(os.path.join(folder, filename))
+            state = 'ready' if file_kind == 'artifact' else 'pending'
+            self.upsert(filename, file_kind, ingestion_state=state, size=size)
+            added.append((filename, file_kind))
+        return added
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE catalog_state SET value = value + 1 WHERE key = 'version'")
@@ -0,0 +1,131 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from .document_cache import write_atomic
+
+# Bump when passage splitting or tokenization changes so old shards are rebuilt
+SHARD_VERSION = 1
+PASSAGE_WORDS = 120
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Parsed shards kept in memory between queries
+MAX_LOADED_SHARDS = 64
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class CorpusIndex:
+    """BM25 passage search over many documents, one shard per document
+
+    Each shard holds the postings and passage lengths of a single document and
+    is stored under its content hash, so adding a document builds one shard and
+    leaves the rest alone. Corpus statistics (passage count, average length,
+    document frequencies) are summed across the requested shards at query time,
+    which gives the same ranking as one index built over the whole collection.
+    """
+
+    def __init__(self, cache_folder='cache'):
+        self.folder = os.path.join(cache_folder, 'corpus')
+        os.makedirs(self.folder, exist_ok=True)
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has_shard(self, sha256):
+        return os.path.exists(self._shard_path(sha256))
+
+    def build_shard(self, sha256, pages):
+        """Split cached pages into passages and write the document's shard"""
+        passages = []
+        for page in pages:
+            words = page['text'].split()
+            for start in range(0, len(words), PASSAGE_WORDS):
+                passages.append({'page': page['page'], 'text': ' '.join(words[start:start + PASSAGE_WORDS])})
+
+        postings = {}
+        lengths = []
+        for number, passage in enumerate(passages):
+            terms = Counter(tokenize(passage['text']))
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append([number, frequency])
+
+        shard = {'sha256': sha256, 'passages': passages, 'lengths': lengths, 'postings': postings}
+        write_atomic(self._shard_path(sha256), json.dumps(shard))
+        self._remember(sha256, shard)
+        return shard
+
+    def search(self, query, documents, top_k=5):
+        """Return the top_k passages for `query` across documents given as {sha256: filename}
+
+        Results are [{'filename', 'page', 'text', 'score'}], best first.
+        """
+        terms = set(tokenize(query))
+        shards = {sha256: self._load(sha256) for sha256 in documents}
+        shards = {sha256: shard for sha256, shard in shards.items() if shard is not None}
+        if not terms or not shards:
+            return []
+
+        passage_count = sum(len(shard['lengths']) for shard in shards.values())
+        if passage_count == 0:
+            return []
+        average_length = sum(sum(shard['lengths']) for shard in shards.values()) / passage_count
+        idf = {}
+        for term in terms:
+            frequency = sum(len(shard['postings'].get(term, ())) for shard in shards.values())
+            if frequency:
+                idf[term] = math.log(1 + (passage_count - frequency + 0.5) / (frequency + 0.5))
+
+        candidates = []
+        for sha256, shard in shards.items():
+            scores = Counter()
+            for term, weight in idf.items():
+                for number, frequency in shard['postings'].get(term, ()):
+                    norm = 1 - BM25_B + BM25_B * shard['lengths'][number] / average_length
+                    scores[number] += weight * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+            candidates.extend((score, sha256, number) for number, score in scores.items())
+
+        results = []
+        for score, sha256, number in heapq.nlargest(top_k, candidates):
+            passage = shards[sha256]['passages'][number]
+            results.append({
+                'filename': documents[sha256],
+                'page': passage['page'],
+                'text': passage['text'],
+                'score': round(score, 4)
+            })
+        return results
+
+    def _load(self, sha256):
+        with self._lock:
+            if sha256 in self._shards:
+                self._shards.move_to_end(sha256)
+                return self._shards[sha256]
+
+        path = self._shard_path(sha256)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            shard = json.load(f)
+        self._remember(sha256, shard)
+        return shard
+
+    def _remember(self, sha256, shard):
+        with self._lock:
+            self._shards[sha256] = shard
+            self._shards.move_to_end(sha256)
+            while len(self._shards) > MAX_LOADED_SHARDS:
+                self._shards.popitem(last=False)
+
+    def _shard_path(self, sha256):
+        return os.path.join(self.folder, f"{sha256}_v{SHARD_VERSION}.json")
@@ -0,0 +1,32 @@
+from crewai import BaseLLM
+
+from .llm_gateway import get_gateway, resolve_model
+
+# gpt-4o / gpt-4o-mini context window
+CONTEXT_WINDOW_TOKENS = 128000
+
+
+class GatewayLLM(BaseLLM):
+    """CrewAI LLM that sends every agent call through the shared LLMGateway
+
+    Flow agents then share the QA pipeline's rate limits, retries and connection
+    pool instead of each opening their own client. Tools are driven through
+    CrewAI's text (ReAct) protocol, so native function calling is not needed.
+    """
+
+    def __init__(self, model=None, temperature=None, stop=None):
+        super().__init__(model=resolve_model(model), temperature=temperature, stop=stop)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        if isinstance(messages, str):
+            messages = [{'role': 'user', 'content': messages}]
+        return get_gateway().chat(messages, model=self.model, temperature=self.temperature, stop=self.stop or None)
+
+    def supports_function_calling(self):
+        return False
+
+    def supports_stop_words(self):
+        return True
+
+    def get_context_window_size(self):
+        return CONTEXT_WINDOW_TOKENS
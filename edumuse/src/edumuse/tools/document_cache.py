@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+# Content-defined chunk boundaries: a chunk ends after a page whose hash hits the
+# modulus, so inserting or editing a page only disturbs the chunk around it
+CHUNK_BOUNDARY_MODULUS = 8
+MIN_PAGES_PER_CHUNK = 2
+MAX_PAGES_PER_CHUNK = 16
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Bump when the page hash changes so manifests written with the old hash are rebuilt
+PAGE_HASH_VERSION = 2
+# Text comes from fonts and from forms drawn with Do; colour spaces, shadings and
+# graphics states cannot change it, so only these resource categories are hashed
+TEXT_RESOURCE_CATEGORIES = ('/Font', '/XObject')
+# Entries that cannot change extracted text either: the page tree, editor private data,
+# transparency groups, optional content, image masks and embedded glyph programs
+# (text comes from encodings and /ToUnicode maps)
+TEXT_NEUTRAL_KEYS = frozenset({'/Parent', '/PieceInfo', '/Private', '/Metadata', '/Thumb', '/Group', '/OC',
+                               '/SMask', '/Mask', '/FontFile', '/FontFile2', '/FontFile3'})
+
+
+def file_sha256(filepath):
+    """Hash a file in fixed-size blocks without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """Write a cache entry so concurrent readers never see a partial file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class DocumentCache:
+    """Page- and chunk-level text cache for uploaded PDFs, keyed by content hash"""
+
+    def __init__(self, cache_folder='cache'):
+        self.cache_folder = cache_folder
+        self.pages_folder = os.path.join(cache_folder, 'pages')
+        self.documents_folder = os.path.join(cache_folder, 'documents')
+        os.makedirs(self.pages_folder, exist_ok=True)
+        os.makedirs(self.documents_folder, exist_ok=True)
+
+    def extract_pages(self, filepath):
+        """Return [{'page', 'hash', 'text'}] for a PDF, extracting only pages not seen before"""
+        document_hash = file_sha256(filepath)
+        manifest_path = os.path.join(self.documents_folder, f"{document_hash}.json")
+
+        # Unchanged file: serve straight from the manifest without parsing the PDF
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            pages = [
+                {**page, 'text': self._read_page_text(page['hash'])}
+                for page in manifest['pages']
+            ]
+            if manifest.get('page_hash_version') == PAGE_HASH_VERSION and all(page['text'] is not None for page in pages):
+                return pages
+
+        pages = []
+        # Fonts and XObjects are usually shared between pages, so each is hashed once per document
+        resource_digests = {}
+        with open(filepath, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            for number, page in enumerate(reader.pages, 1):
+                page_hash = self._page_hash(page, resource_digests)
+                text = self._read_page_text(page_hash)
+                if text is None:
+                    text = page.extract_text() or ""
+                    write_atomic(os.path.join(self.pages_folder, f"{page_hash}.txt"), text)
+                pages.append({'page': number, 'hash': page_hash, 'text': text})
+
+        manifest = {
+            'document_hash': document_hash,
+            'page_hash_version': PAGE_HASH_VERSION,
+            'pages': [{'page': page['page'], 'hash': page['hash']} for page in pages]
+        }
+        write_atomic(manifest_path, json.dumps(manifest))
+        return pages
+
+    def chunk_pages(self, pages):
+        """Group pages into content-defined chunks of {'hash', 'pages', 'text'}"""
+        chunks = []
+        current = []
+
+        for page in pages:
+            current.append(page)
+            at_boundary = int(page['hash'][:8], 16) % CHUNK_BOUNDARY_MODULUS == 0
+            if (at_boundary and len(current) >= MIN_PAGES_PER_CHUNK) or len(current) >= MAX_PAGES_PER_CHUNK:
+                chunks.append(self._make_chunk(current))
+                current = []
+
+        if current:
+            chunks.append(self._make_chunk(current))
+        return chunks
+
+    def _make_chunk(self, pages):
+        chunk_hash = hashlib.sha256('|'.join(page['hash'] for page in pages).encode()).hexdigest()
+        return {
+            'hash': chunk_hash,
+            'pages': [pages[0]['page'], pages[-1]['page']],
+            'text': ''.join(page['text'] for page in pages)
+        }
+
+    def _page_hash(self, page, resource_digests=None):
+        """Hash the raw content stream and the resources it draws with, which is far cheaper than extracting text
+
+        Identical streams such as "/Fm0 Do" can name different fonts or XObjects, so the
+        resolved /Resources, form and font stream data included, are part of the hash.
+        """
+        digest = hashlib.sha256()
+        contents = page.get_contents()
+        if contents is not None:
+            if hasattr(contents, 'get_data'):
+                digest.update(contents.get_data())
+            else:
+                for stream in contents:
+                    digest.update(stream.get_object().get_data())
+        digest.update(str(page.get('/Rotate', 0)).encode())
+        digest.update(self._object_digest(self._text_resources(page.get('/Resources')),
+                                          {} if resource_digests is None else resource_digests))
+        return digest.hexdigest()
+
+    def _object_digest(self, obj, memo, visiting=frozenset()):
+        """Digest of a PDF object and everything it references; `memo` caches indirect objects by reference"""
+        digest = hashlib.sha256()
+        self._feed(digest, obj, memo, visiting)
+        return digest.digest()
+
+    def _feed(self, digest, obj, memo, visiting):
+        """Add an object to a digest, inlining direct objects and hashing each indirect object once"""
+        if isinstance(obj, IndirectObject):
+            reference = (obj.idnum, obj.generation)
+            if reference not in memo:
+                if reference in visiting:
+                    digest.update(b'cycle')
+                    return
+                memo[reference] = self._object_digest(obj.get_object(), memo, visiting | {reference})
+            digest.update(memo[reference])
+        elif isinstance(obj, DictionaryObject):
+            # Image samples never become text; form XObjects, CMaps and encodings do
+            if isinstance(obj, StreamObject) and obj.get('/Subtype') != '/Image':
+                # The stored (still compressed) bytes identify a stream as well as decoded ones, without inflating them
+                data = obj._data if isinstance(obj._data, bytes) else obj.get_data()
+                digest.update(b'stream %d ' % len(data))
+                digest.update(data)
+            digest.update(b'<<')
+            for key in sorted(obj):
+                if key in TEXT_NEUTRAL_KEYS:
+                    continue
+                digest.update(key.encode())
+                value = obj.raw_get(key)
+                # A form's own resources, like the page's, only matter for their fonts and forms
+                self._feed(digest, self._text_resources(value) if key == '/Resources' else value, memo, visiting)
+            digest.update(b'>>')
+        elif isinstance(obj, ArrayObject):
+            digest.update(b'[')
+            for item in obj:
+                self._feed(digest, item, memo, visiting)
+            digest.update(b']')
+        else:
+            digest.update(repr(obj).encode() + b' ')
+
+    @staticmethod
+    def _text_resources(resources):
+        """The font and XObject entries of a resource dictionary"""
+        resources = resources.get_object() if resources is not None else None
+        if not isinstance(resources, DictionaryObject):
+            return None
+        return DictionaryObject({NameObject(category): resources.raw_get(category)
+                                 for category in TEXT_RESOURCE_CATEGORIES if category in resources})
+
+    def _read_page_text(self, page_hash):
+        path = os.path.join(self.pages_folder, f"{page_hash}.txt")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+class ChunkResultCache:
+    """JSON store for per-chunk flow outputs (e.g. summary map stage), keyed by chunk hash"""
+
+    def __init__(self, cache_folder='cache', namespace='chunk_results'):
+        self.folder = os.path.join(cache_folder, namespace)
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get(self, key):
+        path = os.path.join(self.folder, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, key, value):
+        write_atomic(os.path.join(self.folder, f"{key}.json"), json.dumps(value))
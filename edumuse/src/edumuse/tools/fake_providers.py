@@ -0,0 +1,277 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from ..schemas import parse_assessment_text, parse_summary_text
+
+# EDUMUSE_OFFLINE=1 switches every provider to its local stand-in
+OFFLINE = os.getenv('EDUMUSE_OFFLINE', '0') == '1'
+LLM_PROVIDER = 'fake' if OFFLINE else os.getenv('EDUMUSE_LLM_PROVIDER', 'openai')
+SEARCH_PROVIDER = 'fake' if OFFLINE else os.getenv('EDUMUSE_SEARCH_PROVIDER', 'serper')
+
+DEFAULT_LLM_LATENCY = 'lognormal:0.8,0.5'
+DEFAULT_SEARCH_LATENCY = 'lognormal:0.3,0.3'
+# Occurrence counts kept for this many distinct requests, least recently seen dropped first
+MAX_TRACKED_REQUESTS = 10000
+
+WORDS_PER_TOKEN = 0.75
+FAKE_API_URL = 'https://fake.edumuse.local/v1/chat/completions'
+# Same name as SerperDevTool, so agent prompts look identical with either provider
+SEARCH_TOOL_NAME = 'Search the internet with Serper'
+# CrewAI's wording when a task has output_pydantic, and when it converts prose to JSON afterwards
+JSON_OUTPUT_MARKERS = ('Ensure your final answer contains only the content in the following format',
+                       'Please convert the following text into valid JSON')
+
+FILLER_PHRASES = [
+    'how attention weights are computed from queries and keys',
+    'the trade-off between model capacity and training cost',
+    'evaluating results against a held-out benchmark',
+    'the assumptions made in the original formulation',
+    'common misconceptions students have about the method',
+    'the role of normalization in stable training',
+    'how the idea generalizes to new domains',
+    'the limitations discussed by the authors',
+]
+BLOOM_LEVELS = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate']
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+QUESTION_COUNT_PATTERN = re.compile(r"(multiple[ _]choice|short[ _]answer|essay)(?:/long answer)?: (\d+)")
+
+
+class Latency:
+    """Latency distribution parsed from 'fixed:S', 'uniform:LOW,HIGH' or 'lognormal:MEDIAN,SIGMA' (seconds)"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, values = spec.partition(':')
+        self.kind = kind
+        self.values = [float(value) for value in values.split(',')] if values else []
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng):
+        if self.kind == 'fixed':
+            return self.values[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.values)
+        median, sigma = self.values
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+class FakeBehaviour:
+    """Latency, error injection and determinism shared by the fake LLM and search backends
+
+    Each call draws from a generator seeded by (seed, request, how often that request
+    has been seen), so a replayed workload sees the same outputs, latencies and
+    failures regardless of thread scheduling. Counts are kept for the `max_tracked`
+    most recently seen requests; a request forgotten beyond that starts over at zero.
+    """
+
+    def __init__(self, latency, error_rate=0.0, seed=0, time_scale=1.0, max_tracked=MAX_TRACKED_REQUESTS):
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency)
+        self.error_rate = error_rate
+        self.seed = seed
+        self.time_scale = time_scale
+        self.max_tracked = max_tracked
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'simulated_seconds': 0.0}
+
+    def begin(self, request_text):
+        """Return (rng, fail) for this call after sleeping for the sampled latency"""
+        digest = hashlib.sha256(request_text.encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            occurrence = self._seen.pop(digest, 0)
+            self._seen[digest] = occurrence + 1
+            if len(self._seen) > self.max_tracked:
+                self._seen.popitem(last=False)
+        rng = random.Random(f"{self.seed}:{digest}:{occurrence}")
+        delay = self.latency.sample(rng)
+        fail = rng.random() < self.error_rate
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['errors'] += int(fail)
+            self.stats['simulated_seconds'] += delay
+        time.sleep(delay * self.time_scale)
+        return rng, fail
+
+    @classmethod
+    def from_env(cls, prefix, default_latency):
+        return cls(
+            latency=os.getenv(f'{prefix}_LATENCY', default_latency),
+            error_rate=float(os.getenv(f'{prefix}_ERROR_RATE', 0)),
+            seed=int(os.getenv('EDUMUSE_FAKE_SEED', 0)),
+            time_scale=float(os.getenv('EDUMUSE_FAKE_TIME_SCALE', 1))
+        )
+
+
+def load_canned_responses(path):
+    """Canned outputs: a JSON list of {"match": regex, "response": template with {topic}}"""
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(re.compile(entry['match'], re.IGNORECASE | re.DOTALL), entry['response']) for entry in json.load(f)]
+
+
+class FakeChatCompletions:
+    """Offline stand-in for client.chat.completions with OpenAI-shaped responses and errors"""
+
+    def __init__(self, behaviour, completion_tokens=200, canned=None):
+        self.behaviour = behaviour
+        self.completion_tokens = completion_tokens
+        self.canned = canned or []
+
+    def create(self, model, messages, temperature=None, max_tokens=None, stop=None, **kwargs):
+        prompt = '\n'.join(message.get('content') or '' for message in messages)
+        rng, fail = self.behaviour.begin(prompt)
+        if fail:
+            response = httpx.Response(429, headers={'retry-after': '0'}, request=httpx.Request('POST', FAKE_API_URL))
+            raise openai.RateLimitError('Injected rate limit from the fake LLM provider', response=response, body=None)
+
+        budget = min(max_tokens or self.completion_tokens, self.completion_tokens)
+        content = self._respond(messages, prompt, rng, budget)
+        prompt_tokens = len(prompt.split()) * 4 // 3
+        completion_tokens = int(len(content.split()) / WORDS_PER_TOKEN)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason='stop', message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens)
+        )
+
+    def _respond(self, messages, prompt, rng, budget):
+        request = next((message.get('content') or '' for message in messages if message.get('role') == 'user'), prompt)
+        topic = self._topic(request)
+
+        for pattern, template in self.canned:
+            if pattern.search(prompt):
+                return self._react(prompt, template.format(topic=topic), topic)
+
+        # CrewAI appends "...not a summary" to every task, which says nothing about the task itself
+        lowered = prompt.lower().replace('not a summary', '')
+        count = re.search(r"(?:create|return all) (\d+)", lowered)
+        count = int(count.group(1)) if count else 5
+        type_counts = {name.replace(' ', '_'): int(number)
+                       for name, number in QUESTION_COUNT_PATTERN.findall(lowered)}
+        if any(marker in prompt for marker in JSON_OUTPUT_MARKERS):
+            # Structured outputs: the same generated text, shaped like the requested model
+            if '"questions"' in prompt:
+                body = parse_assessment_text(self._questions(topic, count, rng, type_counts)).model_dump_json()
+            else:
+                body = parse_summary_text(self._summary(topic, rng, budget)).model_dump_json()
+            return self._react(prompt, body, topic)
+        if 'fact-check' in lowered or 'is the answer fully supported' in lowered:
+            return 'YES'
+        if 'multiple choice' in lowered:
+            body = self._questions(topic, count, rng, type_counts)
+        elif 'summary' in lowered or 'summar' in lowered:
+            body = self._summary(topic, rng, budget)
+        else:
+            body = self._paragraphs(topic, rng, budget)
+        return self._react(prompt, body, topic)
+
+    def _topic(self, request):
+        """Best guess at what is being asked about, used to fill the templates"""
+        match = (re.search(r"\babout[:\s]+['\"]?([^'\"\n.?]+)", request, re.IGNORECASE)
+                 or re.search(r"Question:\s*([^\n?]+)", request))
+        text = match.group(1) if match else request.replace('Current Task:', '')
+        return ' '.join(re.findall(r"[A-Za-z][\w-]*", text)[:8]) or 'the topic'
+
+    def _react(self, prompt, body, topic):
+        # CrewAI agents parse ReAct text: search once if the agent has the search tool, then answer
+        if 'Final Answer:' not in prompt:
+            return body
+        # The format instructions mention "Observation:" once; a second one is a tool result
+        if f"Tool Name: {SEARCH_TOOL_NAME}" in prompt and prompt.count('Observation:') < 2:
+            query = json.dumps({'search_query': topic})
+            return f"Thought: I should search for sources first\nAction: {SEARCH_TOOL_NAME}\nAction Input: {query}"
+        links = re.findall(r'"link": "([^"]+)"', prompt)[:5]
+        if links:
+            body += '\n\nSources:\n' + '\n'.join(f"- {link}" for link in links)
+        return f"Thought: I now know the final answer\nFinal Answer: {body}"
+
+    def _paragraphs(self, topic, rng, budget):
+        words = []
+        target = int(budget * WORDS_PER_TOKEN)
+        while len(words) < target:
+            words.extend(f"{topic} relates to {rng.choice(FILLER_PHRASES)}.".split())
+        return ' '.join(words[:target])
+
+    def _summary(self, topic, rng, budget):
+        bullets = '\n'.join(f"- {rng.choice(FILLER_PHRASES).capitalize()}" for _ in range(4))
+        return f"# Summary: {topic}\n\n## Key Concepts\n{bullets}\n\n## Overview\n{self._paragraphs(topic, rng, budget // 2)}"
+
+    def _questions(self, topic, count, rng, type_counts=None):
+        # Honour per-type counts from the prompt ("Multiple Choice: 5 ..."), else all multiple choice
+        types = [question_type for question_type, number in (type_counts or {}).items() for _ in range(number)]
+        blocks = []
+        for number in range(1, count + 1):
+            question_type = types[number - 1] if number <= len(types) else 'multiple_choice'
+            concept = rng.choice(FILLER_PHRASES)
+            tags = f"{question_type.replace('_', ' ').title()} - {rng.choice(BLOOM_LEVELS)} - {rng.choice(DIFFICULTIES)}"
+            if question_type != 'multiple_choice':
+                blocks.append(
+                    f"Question {number}: [{tags}]\n"
+                    f"Explain {concept} in the context of {topic}.\n"
+                    f"Concept: {concept}\n"
+                    f"Model Answer: {topic} relates to {concept}.\n"
+                    f"Rubric: 1 point per correct idea, up to 3 points."
+                )
+                continue
+            answer = rng.choice('ABCD')
+            blocks.append(
+                f"Question {number}: [{tags}]\n"
+                f"Which statement about {topic} and {concept} is correct?\n"
+                f"Concept: {concept}\n"
+                f"A) {rng.choice(FILLER_PHRASES)}\nB) {rng.choice(FILLER_PHRASES)}\n"
+                f"C) {rng.choice(FILLER_PHRASES)}\nD) {rng.choice(FILLER_PHRASES)}\n"
+                f"Correct Answer: {answer}\nExplanation: Option {answer} matches the source material."
+            )
+        return '\n\n'.join(blocks)
+
+
+class FakeOpenAIClient:
+    """Drop-in for the parts of the OpenAI client used by LLMGateway"""
+
+    def __init__(self, behaviour=None, completion_tokens=None, canned=None):
+        behaviour = behaviour or FakeBehaviour.from_env('EDUMUSE_FAKE_LLM', DEFAULT_LLM_LATENCY)
+        completion_tokens = completion_tokens or int(os.getenv('EDUMUSE_FAKE_COMPLETION_TOKENS', 200))
+        canned = canned if canned is not None else load_canned_responses(os.getenv('EDUMUSE_FAKE_RESPONSES'))
+        self.behaviour = behaviour
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(behaviour, completion_tokens, canned))
+
+
+class FakeSearchBackend:
+    """Deterministic Serper-shaped organic results for a query"""
+
+    def __init__(self, behaviour=None, num_results=5):
+        self.behaviour = behaviour or FakeBehaviour.from_env('EDUMUSE_FAKE_SEARCH', DEFAULT_SEARCH_LATENCY)
+        self.num_results = num_results
+
+    def search(self, query):
+        rng, fail = self.behaviour.begin(query)
+        if fail:
+            raise RuntimeError('Injected failure from the fake search provider')
+        slug = re.sub(r'[^a-z0-9]+', '-', query.lower()).strip('-')[:60] or 'query'
+        domains = ['mit.edu', 'arxiv.org', 'stanford.edu', 'cmu.edu', 'berkeley.edu', 'ox.ac.uk']
+        return {
+            'searchParameters': {'q': query},
+            'organic': [
+                {
+                    'title': f"{query.title()} - lecture notes part {position}",
+                    'link': f"https://{rng.choice(domains)}/{slug}/{position}",
+                    'snippet': f"An overview of {query} covering {rng.choice(FILLER_PHRASES)}.",
+                    'position': position
+                }
+                for position in range(1, self.num_results + 1)
+            ]
+        }
@@ -0,0 +1,52 @@
+import os
+import shutil
+import subprocess
+
+try:
+    import pikepdf
+except ImportError:  # optional: fall back to the qpdf command line tool
+    pikepdf = None
+
+# Linearized files declare themselves in a dictionary at the very start of the file
+LINEARIZED_MARKER = b'/Linearized'
+HEADER_BYTES = 1024
+
+QPDF_TIMEOUT_SECONDS = 120
+
+
+def linearizer_available():
+    return pikepdf is not None or shutil.which('qpdf') is not None
+
+
+def is_linearized(filepath):
+    with open(filepath, 'rb') as f:
+        return LINEARIZED_MARKER in f.read(HEADER_BYTES)
+
+
+def linearize_pdf(source_path, output_path):
+    """Write a linearized ("fast web view") copy of a PDF; returns False if no linearizer is installed
+
+    The copy lets a viewer render page 1 from the first few range requests instead of
+    downloading the whole file. The source is never modified.
+    """
+    tmp_path = f"{output_path}.part"
+    try:
+        if pikepdf is not None:
+            with pikepdf.open(source_path) as pdf:
+                pdf.save(tmp_path, linearize=True)
+        elif shutil.which('qpdf'):
+            result = subprocess.run(
+                ['qpdf', '--linearize', source_path, tmp_path],
+                capture_output=True,
+                timeout=QPDF_TIMEOUT_SECONDS
+            )
+            # Exit code 3 means qpdf succeeded with warnings
+            if result.returncode not in (0, 3):
+                raise RuntimeError(result.stderr.decode(errors='replace').strip())
+        else:
+            return False
+        os.replace(tmp_path, output_path)
+        return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
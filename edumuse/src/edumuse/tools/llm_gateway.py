@@ -0,0 +1,209 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+import openai
+from openai import OpenAI
+
+from .fake_providers import LLM_PROVIDER, FakeOpenAIClient
+from .usage_meter import record_usage
+
+DEFAULT_MODEL = 'gpt-4o-mini'
+# Same precedence CrewAI uses when it picks a model from the environment
+MODEL_ENV_VARS = ('MODEL', 'MODEL_NAME', 'OPENAI_MODEL_NAME')
+
+# Provider limits; defaults sit below OpenAI's tier-1 limits for gpt-4o-mini
+DEFAULT_RPM = int(os.getenv('EDUMUSE_LLM_RPM', 450))
+DEFAULT_TPM = int(os.getenv('EDUMUSE_LLM_TPM', 180000))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv('EDUMUSE_LLM_CONCURRENCY', 8))
+DEFAULT_MAX_RETRIES = int(os.getenv('EDUMUSE_LLM_MAX_RETRIES', 5))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv('EDUMUSE_LLM_TIMEOUT', 60))
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Reserved for the completion when the caller gives no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def resolve_model(model=None):
+    """An explicit model, else the first of MODEL, MODEL_NAME, OPENAI_MODEL_NAME that is set, else DEFAULT_MODEL
+
+    Read at call time, so a .env loaded after import still applies.
+    """
+    if model:
+        return model
+    for name in MODEL_ENV_VARS:
+        if os.getenv(name):
+            return os.getenv(name)
+    return DEFAULT_MODEL
+
+
+def estimate_tokens(messages):
+    """Rough prompt size used to reserve TPM budget before the request is sent"""
+    return sum(len(message.get('content') or '') for message in messages) // CHARS_PER_TOKEN + 4 * len(messages)
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_minute`; acquire() blocks until enough is available"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._available = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Take `amount` from the bucket, waiting as needed; returns the amount actually taken"""
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= amount:
+                    self._available -= amount
+                    return amount
+                wait = (amount - self._available) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, amount):
+        """Settle a reservation against actual usage: positive charges more (the balance may go
+        negative), negative refunds"""
+        with self._lock:
+            self._refill()
+            self._available = min(self.capacity, self._available - amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class LLMGateway:
+    """Single entry point for chat completions shared by the QA agents and the flows
+
+    Requests are paced by token buckets for requests and tokens per minute, capped
+    by a concurrency semaphore, and retried on 429/5xx/timeouts with exponential
+    backoff and full jitter (honouring Retry-After). One OpenAI client is shared so
+    its HTTP connection pool is reused across calls.
+    """
+
+    def __init__(self, api_key=None, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_retries=DEFAULT_MAX_RETRIES, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._client = None
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'failures': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+    @property
+    def client(self):
+        """Lazily built OpenAI client with a keep-alive pool sized to the concurrency limit"""
+        with self._lock:
+            if self._client is None and LLM_PROVIDER == 'fake':
+                self._client = FakeOpenAIClient()
+            if self._client is None:
+                limits = httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+                self._client = OpenAI(
+                    api_key=self.api_key or os.getenv('OPENAI_API_KEY', ''),
+                    max_retries=0,  # retries are paced here, not inside the SDK
+                    timeout=self.timeout,
+                    http_client=httpx.Client(limits=limits, timeout=self.timeout)
+                )
+            return self._client
+
+    def chat(self, messages, model=None, temperature=None, max_tokens=None, stop=None):
+        """Return the completion text for `messages`, retrying transient failures"""
+        reserved = estimate_tokens(messages) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+        params = {'model': resolve_model(model), 'messages': messages}
+        if temperature is not None:
+            params['temperature'] = temperature
+        if max_tokens is not None:
+            params['max_tokens'] = max_tokens
+        if stop:
+            params['stop'] = stop
+
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire()
+            acquired = self.tokens.acquire(reserved)
+            try:
+                with self._semaphore:
+                    response = self.client.chat.completions.create(**params)
+            except RETRYABLE_ERRORS as e:
+                # A rejected attempt spent no tokens; the next attempt reserves again
+                self.tokens.adjust(-acquired)
+                if attempt == self.max_retries:
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                record_usage(llm_retries=1)
+                time.sleep(self._backoff(attempt, e))
+                continue
+            except Exception:
+                self.tokens.adjust(-acquired)
+                self._count('failures')
+                raise
+
+            self._record_usage(response, acquired)
+            return response.choices[0].message.content or ''
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def _record_usage(self, response, reserved):
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        if usage is not None:
+            self.tokens.adjust(prompt_tokens + completion_tokens - reserved)
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['prompt_tokens'] += prompt_tokens
+            self._stats['completion_tokens'] += completion_tokens
+        record_usage(llm_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Process-wide gateway, so every agent shares the same limits and connection pool"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
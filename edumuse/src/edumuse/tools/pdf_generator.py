@@ -2,10 +2,96 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.enums import TA_CENTER
-from datetime import datetime
+from collections import deque
+from functools import lru_cache
+from itertools import chain
+from xml.sax.saxutils import escape
+import hashlib
+import json
 import os
 import re
 
+# Part of every output filename hash: bump whenever layout or styles change so
+# previously rendered PDFs are not served for the new template
+TEMPLATE_VERSION = 2
+
+HEADING_PATTERN = re.compile(r'^(#{1,6}\s+.+|={2,}\s*.+?\s*={2,}|\*\*[^*]+\*\*:?)$')
+QUESTION_PATTERN = re.compile(r'^(question\s+\d+|q\d+[.:)]|\d+\.)', re.IGNORECASE)
+BULLET_PATTERN = re.compile(r'^[-*•]\s+')
+OPTION_PATTERN = re.compile(r'^[A-Da-d][).]\s')
+# Runs of lines without a blank line are laid out this many lines per Paragraph;
+# splitting one huge Paragraph across pages re-wraps its remainder on every page
+MAX_PARAGRAPH_LINES = 20
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Build the stylesheet once per process and reuse it for every document"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle('CenteredTitle', parent=styles['Title'], alignment=TA_CENTER))
+    styles.add(ParagraphStyle('Question', parent=styles['Normal'], fontName='Helvetica-Bold', spaceBefore=10, spaceAfter=4))
+    styles.add(ParagraphStyle('Option', parent=styles['Normal'], leftIndent=24))
+    styles.add(ParagraphStyle('ListItem', parent=styles['Normal'], leftIndent=18, bulletIndent=6))
+    return styles
+
+def render_content(data, field):
+    """What a renderer needs from a flow result: the structured output when present, else the text"""
+    return data.get(field) or data.get('sources_found', '')
+
+def _question_tags(question):
+    parts = (question.get('question_type', '').replace('_', ' ').title(), question.get('bloom_level'),
+             question.get('difficulty'))
+    return ' - '.join(part for part in parts if part)
+
+def _inline_markup(text):
+    """Escape text for ReportLab and keep **bold** emphasis"""
+    return re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', escape(text))
+
+class FlowableStream:
+    """List-like view over a flowable generator for ReportLab's build loop
+    
+    BaseDocTemplate.build only works at the front of the story (index, delete,
+    insert, re-inserting split parts) plus a short keepWithNext look-ahead, so a
+    small buffer refilled from the generator lays out any length in flat memory.
+    """
+    
+    def __init__(self, flowables, lookahead=32):
+        self._source = iter(flowables)
+        self._buffer = deque()
+        self._lookahead = lookahead
+    
+    def _fill(self):
+        while self._source is not None and len(self._buffer) < self._lookahead:
+            try:
+                self._buffer.append(next(self._source))
+            except StopIteration:
+                self._source = None
+    
+    def __len__(self):
+        self._fill()
+        return len(self._buffer)
+    
+    def __getitem__(self, index):
+        self._fill()
+        if isinstance(index, slice):
+            return list(self._buffer)[index]
+        return self._buffer[index]
+    
+    def __setitem__(self, index, value):
+        if isinstance(index, slice) and index.start in (0, None) and index.stop == 0:
+            self._buffer.extendleft(reversed(list(value)))
+        else:
+            self._buffer[index] = value
+    
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for _ in range(len(self._buffer))[index]:
+                self._buffer.popleft()
+        else:
+            del self._buffer[index]
+    
+    def insert(self, index, value):
+        self._buffer.insert(index, value)
+
 class PDFGenerator:
     """Generate PDF files for educational assessments and summaries"""
     
@@ -15,68 +101,120 @@ class PDFGenerator:
     
     def generate_summary_pdf(self, summary_data):
         """Generate a PDF for an educational summary"""
-        content = summary_data.get('sources_found', '')
+        content = render_content(summary_data, 'summary')
         topic = summary_data.get('topic', 'Educational Summary')
         
-        safe_topic = re.sub(r'[^\w\s-]', '', topic)[:30]
-        safe_topic = re.sub(r'[-\s]+', '_', safe_topic)
+        pdf_files = self.summary_files(summary_data)
+        if not os.path.exists(pdf_files['summary_path']):
+            self._generate_summary_pdf(pdf_files['summary_path'], content, topic)
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{safe_topic}_summary_{timestamp}.pdf"
-        filepath = os.path.join(self.upload_folder, filename)
+        return pdf_files
+
+    def generate_assessment_pdfs(self, assessment_data):
+        """Generate both student assessment and answer key PDFs"""
+        content = render_content(assessment_data, 'assessment')
+        topic = assessment_data.get('topic', 'Educational Assessment')
         
-        doc = SimpleDocTemplate(filepath, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
+        pdf_files = self.assessment_files(assessment_data)
+        if not os.path.exists(pdf_files['student_path']):
+            self._generate_student_pdf(pdf_files['student_path'], content, topic)
+        if not os.path.exists(pdf_files['answer_key_path']):
+            self._generate_answer_key_pdf(pdf_files['answer_key_path'], content, topic)
         
-        title_style = ParagraphStyle('Title', parent=styles['Title'], alignment=TA_CENTER)
-        elements.append(Paragraph(f"Summary: {topic}", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Replace newlines with <br/> for ReportLab Paragraphs
-        formatted_content = content.replace('\n', '<br/>')
-        elements.append(Paragraph(formatted_content, styles['Normal']))
+        return pdf_files
+    
+    def generate_variant_pdfs(self, assessment_data):
+        """Render every per-student variant's student and answer key PDF in one pass"""
+        pdf_files = self.variant_files(assessment_data)
+        for method_name, filepath, content, title in self.variant_renders(assessment_data, pdf_files):
+            if not os.path.exists(filepath):
+                getattr(self, method_name)(filepath, content, title)
+        return pdf_files
+    
+    def summary_files(self, summary_data):
+        """Decide the summary PDF filename without rendering it"""
+        topic = summary_data.get('topic', 'Educational Summary')
+        safe_topic = self._safe_topic(topic)
         
-        doc.build(elements)
+        content_hash = self.content_hash('summary', summary_data.get('sources_found', ''), topic)
+        filename = f"{safe_topic}_summary_{content_hash}.pdf"
         
         return {
             "summary_pdf": filename,
-            "summary_path": filepath
+            "summary_path": os.path.join(self.upload_folder, filename)
         }
-
-    def generate_assessment_pdfs(self, assessment_data):
-        """Generate both student assessment and answer key PDFs"""
-        content = assessment_data.get('sources_found', '')
+    
+    def assessment_files(self, assessment_data):
+        """Decide the student and answer key PDF filenames without rendering them"""
         topic = assessment_data.get('topic', 'Educational Assessment')
+        safe_topic = self._safe_topic(topic)
         
-        safe_topic = re.sub(r'[^\w\s-]', '', topic)[:30]
-        safe_topic = re.sub(r'[-\s]+', '_', safe_topic)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        student_filename = f"{safe_topic}_assessment_{timestamp}.pdf"
-        answer_key_filename = f"{safe_topic}_answer_key_{timestamp}.pdf"
-        
-        student_path = os.path.join(self.upload_folder, student_filename)
-        answer_key_path = os.path.join(self.upload_folder, answer_key_filename)
-        
-        self._generate_student_pdf(student_path, content, topic)
-        self._generate_answer_key_pdf(answer_key_path, content, topic)
+        content_hash = self.content_hash('assessment', assessment_data.get('sources_found', ''), topic)
+        student_filename = f"{safe_topic}_assessment_{content_hash}.pdf"
+        answer_key_filename = f"{safe_topic}_answer_key_{content_hash}.pdf"
         
         return {
             "student_assessment": student_filename,
             "answer_key": answer_key_filename,
-            "student_path": student_path,
-            "answer_key_path": answer_key_path
+            "student_path": os.path.join(self.upload_folder, student_filename),
+            "answer_key_path": os.path.join(self.upload_folder, answer_key_filename)
         }
     
+    def variant_files(self, assessment_data):
+        """Decide a student and answer key PDF filename for each variant without rendering them"""
+        topic = assessment_data.get('topic', 'Educational Assessment')
+        safe_topic = self._safe_topic(topic)
+        
+        pdf_files = {}
+        for number, variant in enumerate(assessment_data.get('variants', []), 1):
+            content_hash = self.content_hash('assessment_variant', json.dumps(variant, sort_keys=True), f"{topic} {number}")
+            for key, kind in (('student_assessment', 'assessment'), ('answer_key', 'answer_key')):
+                filename = f"{safe_topic}_{kind}_v{number:02d}_{content_hash}.pdf"
+                pdf_files[f"variant_{number:02d}_{key}"] = filename
+                pdf_files[f"variant_{number:02d}_{key}_path"] = os.path.join(self.upload_folder, filename)
+        return pdf_files
+    
+    def variant_renders(self, assessment_data, pdf_files):
+        """(method name, output path, content, title) for every variant PDF"""
+        topic = assessment_data.get('topic', 'Educational Assessment')
+        renders = []
+        for number, variant in enumerate(assessment_data.get('variants', []), 1):
+            title = f"{topic} (Variant {number})"
+            renders.append(('_generate_student_pdf', pdf_files[f"variant_{number:02d}_student_assessment_path"],
+                            variant, title))
+            renders.append(('_generate_answer_key_pdf', pdf_files[f"variant_{number:02d}_answer_key_path"],
+                            variant, title))
+        return renders
+    
+    def content_hash(self, kind, content, topic):
+        """Identify a render by (template version, document kind, topic, flow output)"""
+        key = f"{TEMPLATE_VERSION}\x00{kind}\x00{topic}\x00{content}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:20]
+    
+    def _safe_topic(self, topic):
+        safe_topic = re.sub(r'[^\w\s-]', '', topic)[:30]
+        return re.sub(r'[-\s]+', '_', safe_topic)
+    
+    def _generate_summary_pdf(self, filepath, content, topic):
+        """Generate summary PDF"""
+        doc = SimpleDocTemplate(filepath, pagesize=letter)
+        styles = get_styles()
+        elements = []
+        
+        elements.append(Paragraph(f"Summary: {topic}", styles['CenteredTitle']))
+        elements.append(Spacer(1, 20))
+        
+        # One small flowable per block, streamed, so layout cost stays linear and pages split cleanly
+        body = self._summary_flowables(content) if isinstance(content, dict) else self._content_flowables(content)
+        doc.build(FlowableStream(chain(elements, body)))
+    
     def _generate_student_pdf(self, filepath, content, topic):
         """Generate student assessment PDF"""
         doc = SimpleDocTemplate(filepath, pagesize=letter)
-        styles = getSampleStyleSheet()
+        styles = get_styles()
         elements = []
         
-        title_style = ParagraphStyle('Title', parent=styles['Title'], alignment=TA_CENTER)
-        elements.append(Paragraph(f"Assessment: {topic}", title_style))
+        elements.append(Paragraph(f"Assessment: {topic}", styles['CenteredTitle']))
         elements.append(Spacer(1, 20))
         
         elements.append(Paragraph("Instructions:", styles['Heading2']))
@@ -85,27 +223,110 @@ class PDFGenerator:
         elements.append(Paragraph("• Provide complete answers for short answer questions", styles['Normal']))
         elements.append(Spacer(1, 20))
         
-        questions = self._parse_content_for_student(content)
-        for question in questions:
-            elements.append(Paragraph(question, styles['Normal']))
-            elements.append(Spacer(1, 15))
+        if isinstance(content, dict):
+            questions = [self._student_question_markup(question) for question in content['questions']]
+        else:
+            questions = self._parse_content_for_student(content)
+        question_flowables = (
+            flowable
+            for question in questions
+            for flowable in (Paragraph(question, styles['Normal']), Spacer(1, 15))
+        )
         
-        doc.build(elements)
+        doc.build(FlowableStream(chain(elements, question_flowables)))
     
     def _generate_answer_key_pdf(self, filepath, content, topic):
         """Generate answer key PDF with full content"""
         doc = SimpleDocTemplate(filepath, pagesize=letter)
-        styles = getSampleStyleSheet()
+        styles = get_styles()
         elements = []
         
-        title_style = ParagraphStyle('Title', parent=styles['Title'], alignment=TA_CENTER)
-        elements.append(Paragraph(f"Answer Key: {topic}", title_style))
+        elements.append(Paragraph(f"Answer Key: {topic}", styles['CenteredTitle']))
         elements.append(Spacer(1, 20))
         
         # Full content with answers, formatted for PDF
-        elements.append(Paragraph(content.replace('\n', '<br/>'), styles['Normal']))
+        body = self._answer_key_flowables(content) if isinstance(content, dict) else self._content_flowables(content)
+        doc.build(FlowableStream(chain(elements, body)))
+    
+    def _content_flowables(self, content):
+        """Stream generated text as headings, questions, options, list items and paragraphs"""
+        styles = get_styles()
+        paragraph_lines = []
+        
+        def flush_paragraph(end=True):
+            if paragraph_lines:
+                yield Paragraph('<br/>'.join(paragraph_lines), styles['Normal'])
+                paragraph_lines.clear()
+                if end:
+                    yield Spacer(1, 6)
+        
+        for raw_line in content.split('\n'):
+            line = raw_line.strip()
+            if not line:
+                yield from flush_paragraph()
+                continue
+            
+            if HEADING_PATTERN.match(line):
+                yield from flush_paragraph()
+                heading = line.strip('#= ').strip('*').rstrip(':').strip('*')
+                yield Paragraph(_inline_markup(heading), styles['Heading3'])
+            elif QUESTION_PATTERN.match(line):
+                yield from flush_paragraph()
+                yield Paragraph(_inline_markup(line), styles['Question'])
+            elif OPTION_PATTERN.match(line):
+                yield from flush_paragraph()
+                yield Paragraph(_inline_markup(line), styles['Option'])
+            elif BULLET_PATTERN.match(line):
+                yield from flush_paragraph()
+                yield Paragraph(_inline_markup(BULLET_PATTERN.sub('', line)), styles['ListItem'], bulletText='•')
+            else:
+                paragraph_lines.append(_inline_markup(line))
+                if len(paragraph_lines) >= MAX_PARAGRAPH_LINES:
+                    # Same text, continued in the next flowable without a gap
+                    yield from flush_paragraph(end=False)
         
-        doc.build(elements)
+        yield from flush_paragraph()
+    
+    def _student_question_markup(self, question):
+        """One structured question for the student PDF: header, text and options, no answers"""
+        markup = f"<b>Question {question['number']}: [{escape(_question_tags(question))}]</b><br/>"
+        markup += f"{escape(question['text'])}<br/>"
+        for option in question.get('options', []):
+            markup += f"&nbsp;&nbsp;&nbsp;&nbsp;{escape(option['label'])}) {escape(option['text'])}<br/>"
+        return markup
+    
+    def _answer_key_flowables(self, assessment):
+        """Stream a structured assessment with answers, explanations and rubrics"""
+        styles = get_styles()
+        for question in assessment['questions']:
+            yield Paragraph(escape(f"Question {question['number']}: [{_question_tags(question)}]"), styles['Question'])
+            yield Paragraph(_inline_markup(question['text']), styles['Normal'])
+            if question.get('concept'):
+                yield Paragraph(f"<i>Concept: {escape(question['concept'])}</i>", styles['Normal'])
+            for option in question.get('options', []):
+                yield Paragraph(_inline_markup(f"{option['label']}) {option['text']}"), styles['Option'])
+            for label, key in (('Correct Answer', 'answer'), ('Explanation', 'explanation'), ('Rubric', 'rubric')):
+                if question.get(key):
+                    yield Paragraph(f"<b>{label}:</b> {_inline_markup(question[key])}", styles['Normal'])
+            yield Spacer(1, 6)
+    
+    def _summary_flowables(self, summary):
+        """Stream a structured summary: one section per level, then the study aids"""
+        styles = get_styles()
+        for entry in summary['summaries']:
+            title = 'Overview' if entry['level'] == 'overview' else f"{entry['level'].title()} Level Summary"
+            yield Paragraph(escape(title), styles['Heading2'])
+            yield from self._content_flowables(entry['text'])
+        if summary.get('glossary'):
+            yield Paragraph("Glossary", styles['Heading2'])
+            for entry in summary['glossary']:
+                yield Paragraph(f"<b>{escape(entry['term'])}</b>: {_inline_markup(entry['definition'])}",
+                                styles['ListItem'], bulletText='•')
+        for title, key in (("Key Takeaways", 'key_takeaways'), ("Study Tips", 'study_tips')):
+            if summary.get(key):
+                yield Paragraph(title, styles['Heading2'])
+                for item in summary[key]:
+                    yield Paragraph(_inline_markup(item), styles['ListItem'], bulletText='•')
     
     def _parse_content_for_student(self, content):
         """Parse content to show only questions and hide answers"""
@@ -122,8 +343,8 @@ class PDFGenerator:
             if any(word in line.lower() for word in ['answer:', 'correct:', 'solution:', 'explanation:', 'rubric:']):
                 continue
                 
-            # Treat lines starting with numbers or all-caps as question headers
-            if re.match(r'^\d+\.', line) or line.isupper():
+            # Treat "Question N", numbered or all-caps lines as question headers
+            if QUESTION_PATTERN.match(line) or line.isupper():
                 if current_question:
                     questions.append(current_question)
                 current_question = f"<b>{line}</b><br/>"
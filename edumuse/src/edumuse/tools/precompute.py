@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from .usage_meter import metered
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accesses (
+    id INTEGER PRIMARY KEY,
+    document_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    action TEXT NOT NULL,
+    params TEXT NOT NULL,
+    accessed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_accesses_time ON accesses(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_accesses_document ON accesses(document_hash, accessed_at);
+"""
+
+# Lives in the cache folder next to the other derived data
+ACCESS_LOG_FILENAME = 'access_log.db'
+
+# Popularity is counted over this many days of requests; older entries are pruned
+DEFAULT_LOOKBACK_DAYS = 7
+DEFAULT_HOT_DOCUMENTS = 10
+DEFAULT_WINDOW_TOKENS = 200000
+# How often the scheduler checks for an off-peak window and for newly popular requests
+CHECK_INTERVAL_SECONDS = 60
+
+
+class AccessLog:
+    """SQLite log of document requests, used to find the documents worth precomputing
+
+    Each entry keeps the request's normalized parameters, so a popular request can
+    be replayed exactly and land on the same cached result a later request looks up.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def record(self, document_hash, filename, action, params):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO accesses (document_hash, filename, action, params, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (document_hash, filename, action, json.dumps(params, sort_keys=True), datetime.now().isoformat())
+            )
+
+    def hottest(self, since, limit=DEFAULT_HOT_DOCUMENTS):
+        """Most requested documents since a datetime, as [{document_hash, filename, hits}]"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT document_hash, MAX(filename) AS filename, COUNT(*) AS hits FROM accesses '
+                'WHERE accessed_at >= ? GROUP BY document_hash ORDER BY hits DESC, MAX(accessed_at) DESC LIMIT ?',
+                (since.isoformat(), limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def requests(self, document_hash, since, actions):
+        """Distinct requests for a document since a datetime, most frequent first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT MAX(filename) AS filename, action, params, COUNT(*) AS hits FROM accesses '
+                f"WHERE document_hash = ? AND accessed_at >= ? AND action IN ({', '.join('?' * len(actions))}) "
+                'GROUP BY action, params ORDER BY hits DESC',
+                (document_hash, since.isoformat(), *actions)
+            ).fetchall()
+        return [{**dict(row), 'params': json.loads(row['params'])} for row in rows]
+
+    def prune(self, before):
+        """Drop entries older than a datetime; returns how many were removed"""
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM accesses WHERE accessed_at < ?', (before.isoformat(),)).rowcount
+
+    def stats(self):
+        with self._lock:
+            requests, documents = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT document_hash) FROM accesses'
+            ).fetchone()
+        return {'requests': requests, 'documents': documents}
+
+
+def parse_windows(spec):
+    """Parse "HH:MM-HH:MM" windows separated by commas into (start, end) minutes after midnight
+
+    A window whose end is before its start runs past midnight, e.g. "22:00-06:00".
+    """
+    windows = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start, end = (_minutes(value) for value in part.split('-'))
+        except ValueError:
+            raise ValueError(f"Invalid off-peak window {part!r}; expected HH:MM-HH:MM")
+        if start == end:
+            raise ValueError(f"Off-peak window {part!r} is empty")
+        windows.append((start, end))
+    return windows
+
+
+def _minutes(value):
+    hours, minutes = value.strip().split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(value)
+    return hours * 60 + minutes
+
+
+def active_window(windows, now):
+    """Start time of the off-peak window containing `now`, or None outside all windows"""
+    minute = now.hour * 60 + now.minute
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for start, end in windows:
+        if start < end and start <= minute < end:
+            return midnight + timedelta(minutes=start)
+        if start > end and minute >= start:
+            return midnight + timedelta(minutes=start)
+        if start > end and minute < end:
+            return midnight - timedelta(days=1) + timedelta(minutes=start)
+    return None
+
+
+class PrecomputeScheduler:
+    """Warm the results of popular requests during off-peak windows
+
+    Outside the windows it does nothing. Inside one, it takes the most requested
+    documents from the access log and hands their indexing and their most frequent
+    summary and assessment requests, most popular first, to `warm`. `warm(task)`
+    runs one task the way a live request would and returns False if there was
+    nothing to do. LLM tokens used by `warm` count against a budget that resets with
+    each window; a task whose kind has cost more than what is left is deferred.
+    """
+
+    def __init__(self, access_log, warm, windows, token_budget=DEFAULT_WINDOW_TOKENS,
+                 hot_documents=DEFAULT_HOT_DOCUMENTS, lookback_days=DEFAULT_LOOKBACK_DAYS,
+                 actions=('summarize', 'assess'), interval=CHECK_INTERVAL_SECONDS):
+        self.access_log = access_log
+        self.warm = warm
+        self.windows = windows
+        self.token_budget = token_budget
+        self.hot_documents = hot_documents
+        self.lookback = timedelta(days=lookback_days)
+        self.actions = tuple(actions)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        # (tasks, tokens) per task kind; the mean skips tasks the rest of the budget cannot cover
+        self._costs = {}
+        self._window = None
+        self._attempted = set()
+        self._deferred = set()
+        self._stats = {'window_start': None, 'tokens_spent': 0, 'warmed': 0, 'already_warm': 0, 'failed': 0}
+
+    def start(self):
+        """Run in a daemon thread; a no-op without configured windows"""
+        if not self.windows or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='precompute-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def plan(self, now=None):
+        """Tasks for the hottest documents: every index first, then requests by popularity"""
+        since = (now or datetime.now()) - self.lookback
+        indexes, requests = [], []
+        for document in self.access_log.hottest(since, limit=self.hot_documents):
+            indexes.append({'document_hash': document['document_hash'], 'filename': document['filename'],
+                            'action': 'index', 'params': {}, 'hits': document['hits']})
+            for entry in self.access_log.requests(document['document_hash'], since, self.actions):
+                requests.append({'document_hash': document['document_hash'], **entry})
+        requests.sort(key=lambda task: task['hits'], reverse=True)
+        return indexes + requests
+
+    def run_window(self, window_start, now=None):
+        """Warm as much of the plan as the window's token budget allows"""
+        self._enter(window_start, now or datetime.now())
+        for task in self.plan(now):
+            key = (task['document_hash'], task['action'], json.dumps(task['params'], sort_keys=True))
+            if key in self._attempted or self._stop.is_set():
+                continue
+            # Stop as soon as the window closes, so precomputation never competes with peak traffic
+            if now is None and active_window(self.windows, datetime.now()) != window_start:
+                break
+            with self._lock:
+                remaining = self.token_budget - self._stats['tokens_spent']
+                if task['action'] != 'index' and (remaining <= 0 or self._mean_cost(task['action']) > remaining):
+                    self._deferred.add(key)
+                    continue
+            self._attempted.add(key)
+            self._deferred.discard(key)
+            self._run(task)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'windows': [f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+                            for start, end in self.windows],
+                'active': self._thread is not None and active_window(self.windows, datetime.now()) is not None,
+                'token_budget': self.token_budget,
+                **self._stats,
+                'deferred': len(self._deferred),
+                'access_log': self.access_log.stats()
+            }
+
+    def _enter(self, window_start, now):
+        """Reset the budget when a new window begins"""
+        if window_start == self._window:
+            return
+        self._window = window_start
+        self._attempted = set()
+        with self._lock:
+            self._deferred = set()
+            self._stats.update({'window_start': window_start.isoformat(), 'tokens_spent': 0, 'warmed': 0,
+                                'already_warm': 0, 'failed': 0})
+        self.access_log.prune(now - self.lookback)
+
+    def _run(self, task):
+        try:
+            with metered() as usage:
+                warmed = self.warm(task)
+        except Exception as e:
+            print(f"Precompute {task['action']} of {task['filename']} failed: {e}")
+            warmed, failed = False, True
+        else:
+            failed = False
+        counts = usage.snapshot()
+        tokens = counts['prompt_tokens'] + counts['completion_tokens']
+        with self._lock:
+            self._stats['tokens_spent'] += tokens
+            if failed:
+                self._stats['failed'] += 1
+            elif warmed:
+                self._stats['warmed'] += 1
+                count, total = self._costs.get(task['action'], (0, 0))
+                self._costs[task['action']] = (count + 1, total + tokens)
+            else:
+                self._stats['already_warm'] += 1
+
+    def _mean_cost(self, action):
+        count, total = self._costs.get(action, (0, 0))
+        return total / count if count else 0
+
+    def _loop(self):
+        while not self._stop.is_set():
+            window_start = active_window(self.windows, datetime.now())
+            if window_start is not None:
+                try:
+                    self.run_window(window_start)
+                except Exception as e:
+                    print(f"Precompute window failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from ..schemas import Question
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    document_hash TEXT NOT NULL,
+    pages TEXT NOT NULL,
+    user_level TEXT NOT NULL,
+    question_type TEXT NOT NULL,
+    bloom_level TEXT,
+    difficulty TEXT,
+    concept TEXT,
+    fingerprint TEXT NOT NULL,
+    question TEXT NOT NULL,
+    times_used INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT,
+    UNIQUE (document_hash, pages, user_level, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_lookup
+    ON questions(document_hash, pages, user_level, question_type, difficulty, bloom_level);
+CREATE INDEX IF NOT EXISTS idx_questions_concept ON questions(document_hash, concept);
+"""
+
+# Lives in the cache folder next to the other derived data
+QUESTION_BANK_FILENAME = 'question_bank.db'
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+DIFFICULTY_ORDER = {'easy': 0, 'medium': 1, 'hard': 2}
+
+
+def question_fingerprint(question):
+    """Hash of the question's wording and options, ignoring case and punctuation, so re-generated duplicates are stored once"""
+    wording = ' '.join([question.question_type, question.text] + [option.text for option in question.options])
+    normalized = ' '.join(WORD_PATTERN.findall(wording.lower()))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def difficulty_rank(question):
+    """Sort key for ordering questions from easier to harder; unknown difficulty sits in the middle"""
+    return DIFFICULTY_ORDER.get((question.difficulty or '').strip().lower(), 1)
+
+
+def _indexed(value):
+    return value.strip().lower() if value else None
+
+
+def _pages_key(pages):
+    return f"{pages[0]}-{pages[1]}" if pages else ''
+
+
+class QuestionBank:
+    """SQLite bank of generated questions, reused before asking the LLM for new ones
+
+    Questions are scoped to the content they were generated from (document hash and
+    optional page range) and the learner level they were calibrated for, and indexed
+    by type, difficulty, Bloom level and concept so an assessment can be assembled
+    with a few indexed queries.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def add(self, document_hash, questions, user_level, pages=None):
+        """Store questions for this content and level; returns how many were new"""
+        now = datetime.now().isoformat()
+        rows = [
+            (document_hash, _pages_key(pages), user_level, question.question_type, _indexed(question.bloom_level),
+             _indexed(question.difficulty), _indexed(question.concept), question_fingerprint(question),
+             question.model_dump_json(exclude={'number'}), now)
+            for question in questions
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO questions (document_hash, pages, user_level, question_type, bloom_level, '
+                'difficulty, concept, fingerprint, question, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            return self._conn.total_changes - before
+
+    def select(self, document_hash, quota, user_level, pages=None):
+        """Pick up to quota[question_type] banked questions per type
+
+        Least-used questions come first, so repeated assessments rotate through the
+        bank, and each type covers as many different concepts as it can. Call
+        `mark_used` once the assessment they were picked for has been built.
+        """
+        selected = []
+        with self._lock:
+            for question_type, count in quota.items():
+                if count <= 0:
+                    continue
+                rows = self._conn.execute(
+                    'SELECT id, concept, question FROM questions '
+                    'WHERE document_hash = ? AND pages = ? AND user_level = ? AND question_type = ? '
+                    'ORDER BY times_used, id',
+                    (document_hash, _pages_key(pages), user_level, question_type)
+                ).fetchall()
+                selected.extend(self._spread_concepts(rows, count))
+        return [Question(number=0, **json.loads(row['question'])) for row in selected]
+
+    def mark_used(self, document_hash, questions, user_level, pages=None):
+        """Count banked questions as served, so the next selection rotates to others"""
+        now = datetime.now().isoformat()
+        rows = [(now, document_hash, _pages_key(pages), user_level, question_fingerprint(question))
+                for question in questions]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'UPDATE questions SET times_used = times_used + 1, last_used_at = ? '
+                'WHERE document_hash = ? AND pages = ? AND user_level = ? AND fingerprint = ?',
+                rows
+            )
+
+    def count(self, document_hash, user_level=None, pages=None):
+        """Banked questions per type for this content (and level, if given)"""
+        query = 'SELECT question_type, COUNT(*) FROM questions WHERE document_hash = ? AND pages = ?'
+        params = [document_hash, _pages_key(pages)]
+        if user_level:
+            query += ' AND user_level = ?'
+            params.append(user_level)
+        with self._lock:
+            rows = self._conn.execute(query + ' GROUP BY question_type', params).fetchall()
+        return {question_type: count for question_type, count in rows}
+
+    def item_parameters(self, document_hash, pages=None):
+        """Calibration metadata of every banked question for this content, across learner levels"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, user_level, question_type, bloom_level, difficulty, "
+                "json_array_length(question, '$.options') AS option_count "
+                'FROM questions WHERE document_hash = ? AND pages = ? ORDER BY id',
+                (document_hash, _pages_key(pages))
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def revision(self, document_hash, pages=None):
+        """Changes whenever questions are added for this content; used to invalidate derived data"""
+        with self._lock:
+            return tuple(self._conn.execute(
+                'SELECT COUNT(*), MAX(id) FROM questions WHERE document_hash = ? AND pages = ?',
+                (document_hash, _pages_key(pages))
+            ).fetchone())
+
+    def questions(self, ids):
+        """Banked questions by id, as {id: Question}"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, question FROM questions WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {row['id']: Question(number=0, **json.loads(row['question'])) for row in rows}
+
+    def stats(self):
+        with self._lock:
+            questions, documents = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT document_hash) FROM questions'
+            ).fetchone()
+            served = self._conn.execute('SELECT COALESCE(SUM(times_used), 0) FROM questions').fetchone()[0]
+        return {'questions': questions, 'documents': documents, 'times_served': served}
+
+    @staticmethod
+    def _spread_concepts(rows, count):
+        """First rows covering distinct concepts, then the remaining rows in order"""
+        picked, seen, rest = [], set(), []
+        for row in rows:
+            if row['concept'] is None or row['concept'] not in seen:
+                seen.add(row['concept'])
+                picked.append(row)
+            else:
+                rest.append(row)
+            if len(picked) == count:
+                return picked
+        return (picked + rest)[:count]
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_question_bank(db_path):
+    """Process-wide bank per database file, so concurrent flows share one connection"""
+    with _banks_lock:
+        if db_path not in _banks:
+            _banks[db_path] = QuestionBank(db_path)
+        return _banks[db_path]
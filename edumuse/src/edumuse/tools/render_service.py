@@ -0,0 +1,203 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+import os
+import threading
+import uuid
+
+from .pdf_generator import PDFGenerator, render_content
+
+# Completed jobs are forgotten, oldest first, once more than this many jobs are tracked
+MAX_TRACKED_JOBS = 1000
+
+
+def _render_pdf(method_name, filepath, content, topic):
+    """Worker entry point: render one PDF and publish it atomically"""
+    generator = PDFGenerator(upload_folder=os.path.dirname(filepath))
+    tmp_path = f"{filepath}.part"
+    getattr(generator, method_name)(tmp_path, content, topic)
+    os.replace(tmp_path, filepath)
+    return os.path.basename(filepath)
+
+
+def _render_batch(renders):
+    """Worker entry point: render several PDFs in one task, as [(filename, error or None)]
+
+    A failing render is reported for its own file; the rest of the batch still renders.
+    """
+    outcomes = []
+    for render in renders:
+        filename = os.path.basename(render[1])
+        try:
+            outcomes.append((_render_pdf(*render), None))
+        except Exception as e:
+            outcomes.append((filename, f"{filename}: {e}"))
+    return outcomes
+
+
+class RenderService:
+    """Render generated PDFs in worker processes, off the request critical path"""
+
+    def __init__(self, upload_folder='uploads', max_workers=2, on_rendered=None):
+        self.generator = PDFGenerator(upload_folder=upload_folder)
+        self.max_workers = max_workers
+        # Called with the output path each time a PDF has been written
+        self.on_rendered = on_rendered
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit_summary(self, summary_data):
+        """Queue a summary PDF and return its filenames plus a render job id"""
+        pdf_files = self.generator.summary_files(summary_data)
+        futures = [
+            self._submit('_generate_summary_pdf', pdf_files['summary_path'], summary_data, 'summary', 'Educational Summary')
+        ]
+        return self._track(pdf_files, futures)
+
+    def submit_assessment(self, assessment_data):
+        """Queue the student and answer key PDFs, plus one pair per student variant; they render in parallel"""
+        pdf_files = self.generator.assessment_files(assessment_data)
+        futures = [
+            self._submit('_generate_student_pdf', pdf_files['student_path'], assessment_data, 'assessment',
+                         'Educational Assessment'),
+            self._submit('_generate_answer_key_pdf', pdf_files['answer_key_path'], assessment_data, 'assessment',
+                         'Educational Assessment')
+        ]
+        if assessment_data.get('variants'):
+            variant_files = self.generator.variant_files(assessment_data)
+            futures.extend(self._submit_batch(self.generator.variant_renders(assessment_data, variant_files)))
+            pdf_files = {**pdf_files, **variant_files}
+        return self._track(pdf_files, futures)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job has rendered, re-raising any rendering error"""
+        for future in self._job(job_id)['futures']:
+            future.result(timeout=timeout)
+        return self.job_status(job_id)
+
+    def job_status(self, job_id):
+        """Return 'pending', 'done' or 'failed' for a job, or None if unknown"""
+        job = self._job(job_id)
+        if job is None:
+            return None
+
+        futures = job['futures']
+        status = {'job_id': job_id, 'files': job['files'], 'status': 'pending'}
+        if all(future.done() for future in futures):
+            errors = [str(future.exception()) for future in futures if future.exception()]
+            status['status'] = 'failed' if errors else 'done'
+            if errors:
+                status['errors'] = errors
+        return status
+
+    def is_pending(self, filename):
+        """True while a queued PDF with this filename has not been written yet"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return any(
+            filename in job['filenames'] and not all(future.done() for future in job['futures'])
+            for job in jobs
+        )
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _submit(self, method_name, filepath, data, field, default_topic):
+        """Render a PDF unless it already exists or an identical render is in flight"""
+        with self._lock:
+            # Filenames are content hashes, so an existing file is already the right render
+            if os.path.exists(filepath):
+                future = Future()
+                future.set_result(os.path.basename(filepath))
+                return future
+            if filepath in self._inflight:
+                return self._inflight[filepath]
+
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            future = self._executor.submit(
+                _render_pdf,
+                method_name,
+                filepath,
+                render_content(data, field),
+                data.get('topic', default_topic)
+            )
+            self._inflight[filepath] = future
+
+        future.add_done_callback(lambda done: self._finish(filepath, done))
+        return future
+
+    def _submit_batch(self, renders):
+        """Render many PDFs as one task per worker rather than one task per file
+
+        A class set is dozens of small PDFs; batching them keeps the per-task process
+        overhead to max_workers round trips. Each file still gets its own future, so a
+        failed render only fails that file. Existing and in-flight files are skipped.
+        """
+        futures = []
+        with self._lock:
+            pending = []
+            for render in renders:
+                filepath = render[1]
+                if filepath in self._inflight:
+                    futures.append(self._inflight[filepath])
+                elif not os.path.exists(filepath):
+                    pending.append(render)
+
+            batches = [pending[start::self.max_workers] for start in range(self.max_workers)]
+            submitted = []
+            for batch in batches:
+                if not batch:
+                    continue
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                file_futures = [Future() for _ in batch]
+                for render, file_future in zip(batch, file_futures):
+                    self._inflight[render[1]] = file_future
+                submitted.append((self._executor.submit(_render_batch, batch), batch, file_futures))
+
+        for batch_future, batch, file_futures in submitted:
+            for render, file_future in zip(batch, file_futures):
+                file_future.add_done_callback(lambda done, filepath=render[1]: self._finish(filepath, done))
+            batch_future.add_done_callback(lambda done, file_futures=file_futures: self._settle(done, file_futures))
+            futures.extend(file_futures)
+        return list({id(future): future for future in futures}.values())
+
+    @staticmethod
+    def _settle(batch_future, file_futures):
+        """Resolve each file's future from its batch's per-file outcomes"""
+        if batch_future.exception() is not None:
+            for file_future in file_futures:
+                file_future.set_exception(batch_future.exception())
+            return
+        for (filename, error), file_future in zip(batch_future.result(), file_futures):
+            if error:
+                file_future.set_exception(RuntimeError(error))
+            else:
+                file_future.set_result(filename)
+
+    def _finish(self, filepath, future):
+        with self._lock:
+            self._inflight.pop(filepath, None)
+        if self.on_rendered is not None and future.exception() is None:
+            self.on_rendered(filepath)
+
+    def _track(self, pdf_files, futures):
+        job_id = uuid.uuid4().hex
+        filenames = {value for key, value in pdf_files.items() if not key.endswith('_path')}
+        with self._lock:
+            self._jobs[job_id] = {'files': pdf_files, 'filenames': filenames, 'futures': futures}
+            # Pending jobs stay tracked however many there are, so their status never goes unknown mid-render
+            excess = len(self._jobs) - MAX_TRACKED_JOBS
+            if excess > 0:
+                done = [old_id for old_id, job in self._jobs.items() if all(future.done() for future in job['futures'])]
+                for old_id in done[:excess]:
+                    del self._jobs[old_id]
+        return {**pdf_files, 'render_job': job_id}
+
+    def _job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
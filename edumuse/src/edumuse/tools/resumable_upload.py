@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from .document_cache import HASH_BLOCK_SIZE, write_atomic
+
+# Sessions untouched for this long are removed along with their partial data
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadOffsetError(Exception):
+    """A chunk did not start where the partial upload currently ends"""
+
+    def __init__(self, expected, received):
+        super().__init__(f"Chunk offset {received} does not match upload offset {expected}")
+        self.expected = expected
+        self.received = received
+
+
+class UploadTooLargeError(Exception):
+    """A chunk would take the upload past its declared size or the size limit"""
+
+    def __init__(self, limit):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+class ResumableUploads:
+    """Chunked uploads written straight to disk and hashed as the bytes arrive
+
+    Each session is a <id>.part file plus a <id>.json record. The partial file's
+    size is the resume offset, so an interrupted client asks for the offset and
+    continues from there. Running hashes live in memory; after a restart the
+    partial file is re-hashed once before the next chunk is appended.
+    """
+
+    def __init__(self, folder, max_size=None):
+        self.folder = folder
+        self.max_size = max_size
+        os.makedirs(folder, exist_ok=True)
+        self._hashers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def create(self, filename, size=None):
+        """Start a session and return its state"""
+        if size is not None and self.max_size is not None and size > self.max_size:
+            raise UploadTooLargeError(self.max_size)
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        record = {'upload_id': upload_id, 'filename': filename, 'size': size, 'created_at': time.time()}
+        open(self._part_path(upload_id), 'wb').close()
+        write_atomic(self._record_path(upload_id), json.dumps(record))
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """Return the session record with the current offset, or None if unknown"""
+        record = self._record(upload_id) if UPLOAD_ID_PATTERN.match(upload_id) else None
+        if record is None:
+            return None
+        return {**record, 'offset': os.path.getsize(self._part_path(upload_id))}
+
+    def append(self, upload_id, offset, stream, length=None):
+        """Append a chunk that starts at `offset`; returns the new offset
+
+        A chunk that would go past the declared size or `max_size` is rejected
+        whole, checked up front when its `length` is known and otherwise as it
+        streams in, and the upload stays resumable from `offset`.
+        """
+        with self._session_lock(upload_id):
+            state = self.status(upload_id)
+            if state is None:
+                raise KeyError(upload_id)
+            if offset != state['offset']:
+                raise UploadOffsetError(state['offset'], offset)
+            limit = min(limit for limit in (state['size'], self.max_size, float('inf')) if limit is not None)
+            if length is not None and offset + length > limit:
+                raise UploadTooLargeError(limit)
+
+            hasher = self._hasher(upload_id, offset)
+            checkpoint = hasher.copy()
+            written = offset
+            try:
+                with open(self._part_path(upload_id), 'ab') as out:
+                    for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+                        if written + len(block) > limit:
+                            out.truncate(offset)
+                            hasher, written = checkpoint, offset
+                            raise UploadTooLargeError(limit)
+                        out.write(block)
+                        hasher.update(block)
+                        written += len(block)
+            finally:
+                # A dropped connection leaves a shorter file; keep the hash in step with it
+                self._hashers[upload_id] = (hasher, written)
+            return written
+
+    def finish(self, upload_id):
+        """Close a session and return (part_path, sha256, size) for the caller to commit"""
+        with self._session_lock(upload_id):
+            state = self.status(upload_id)
+            if state is None:
+                raise KeyError(upload_id)
+            if state['size'] is not None and state['offset'] != state['size']:
+                raise UploadOffsetError(state['size'], state['offset'])
+
+            sha256 = self._hasher(upload_id, state['offset']).hexdigest()
+            os.remove(self._record_path(upload_id))
+            self._forget(upload_id)
+            return self._part_path(upload_id), sha256, state['offset']
+
+    def abort(self, upload_id):
+        try:
+            lock = self._session_lock(upload_id)
+        except KeyError:
+            return
+        with lock:
+            for path in (self._part_path(upload_id), self._record_path(upload_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._forget(upload_id)
+
+    def expire(self, ttl=SESSION_TTL_SECONDS):
+        """Drop sessions that have not received data within `ttl` seconds"""
+        cutoff = time.time() - ttl
+        for name in os.listdir(self.folder):
+            if name.endswith('.json'):
+                upload_id = name[:-len('.json')]
+                part_path = self._part_path(upload_id)
+                last_write = os.path.getmtime(part_path) if os.path.exists(part_path) else 0
+                if last_write < cutoff:
+                    self.abort(upload_id)
+
+    def _hasher(self, upload_id, offset):
+        hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hashed != offset:
+            hasher = hashlib.sha256()
+            with open(self._part_path(upload_id), 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    hasher.update(block)
+            self._hashers[upload_id] = (hasher, offset)
+        return hasher
+
+    def _session_lock(self, upload_id):
+        """Lock for an existing session; raises KeyError for anything else, so no stray locks are kept"""
+        with self._lock:
+            if upload_id not in self._locks:
+                if not UPLOAD_ID_PATTERN.match(upload_id) or not os.path.exists(self._record_path(upload_id)):
+                    raise KeyError(upload_id)
+                self._locks[upload_id] = threading.Lock()
+            return self._locks[upload_id]
+
+    def _forget(self, upload_id):
+        """Drop in-memory state once the session's record is gone; callers hold its lock
+
+        Anyone still waiting on the old lock finds the session removed, and later
+        callers cannot create a new lock for it.
+        """
+        self._hashers.pop(upload_id, None)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+
+    def _record(self, upload_id):
+        path = self._record_path(upload_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.folder, f"{upload_id}.part")
+
+    def _record_path(self, upload_id):
+        return os.path.join(self.folder, f"{upload_id}.json")
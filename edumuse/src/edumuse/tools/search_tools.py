@@ -0,0 +1,48 @@
+import json
+from typing import Type
+
+from crewai.tools import BaseTool
+from crewai_tools import SerperDevTool
+from pydantic import BaseModel, Field
+
+from .fake_providers import SEARCH_PROVIDER, SEARCH_TOOL_NAME, FakeSearchBackend
+from .usage_meter import record_usage
+
+
+class FakeSearchInput(BaseModel):
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+
+class FakeSearchTool(BaseTool):
+    """Offline replacement for SerperDevTool with the same name and arguments"""
+
+    name: str = SEARCH_TOOL_NAME
+    description: str = "A tool that can be used to search the internet with a search_query."
+    args_schema: Type[BaseModel] = FakeSearchInput
+
+    def _run(self, search_query: str) -> str:
+        record_usage(search_calls=1)
+        return json.dumps(fake_search_backend().search(search_query))
+
+
+class MeteredSerperDevTool(SerperDevTool):
+    """SerperDevTool that counts its calls against the active usage meter"""
+
+    def _run(self, **kwargs):
+        record_usage(search_calls=1)
+        return super()._run(**kwargs)
+
+
+_backend = None
+
+
+def fake_search_backend():
+    global _backend
+    if _backend is None:
+        _backend = FakeSearchBackend()
+    return _backend
+
+
+def search_tool():
+    """Web search tool for flow agents: Serper, or the local fake when EDUMUSE_SEARCH_PROVIDER=fake"""
+    return FakeSearchTool() if SEARCH_PROVIDER == 'fake' else MeteredSerperDevTool()
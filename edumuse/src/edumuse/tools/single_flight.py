@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one execution
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block on the same result (or exception) instead of repeating the
+    work. Once the call finishes the key is released, so later calls run fresh
+    and anything longer-lived belongs in a cache.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """Return (result, shared) where shared is True if another caller's run was reused"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats['executions'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
@@ -0,0 +1,45 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+_current_meter = contextvars.ContextVar('edumuse_usage_meter', default=None)
+
+
+class UsageMeter:
+    """LLM and search usage counted for one unit of work, e.g. a single flow run
+
+    The gateway's own stats are process-wide, so they cannot tell concurrent
+    flow runs apart; a meter only sees calls made inside its `metered()` block.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'llm_requests': 0, 'llm_retries': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                       'search_calls': 0}
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+@contextmanager
+def metered():
+    """Count usage recorded by this thread (and contexts copied from it) until the block exits"""
+    meter = UsageMeter()
+    token = _current_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _current_meter.reset(token)
+
+
+def record_usage(**counts):
+    """Add to the active meter, if any; a no-op outside `metered()`"""
+    meter = _current_meter.get()
+    if meter is not None:
+        meter.add(**counts)
@@ -1,21 +1,43 @@
 import sys
 import os
-import PyPDF2
+import copy
+import json
+import hashlib
+import re
 import traceback
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import PyPDF2
+
 # Add the 'src' directory to Python's path to allow for clean imports
 src_path = os.path.join(os.path.dirname(__file__), 'edumuse', 'src')
 sys.path.insert(0, src_path)
 
 # Import your EduMUSE components
 from edumuse.crew import EduMUSE
-from edumuse.tools.pdf_generator import PDFGenerator
+from edumuse.tools.render_service import RenderService
+from edumuse.tools.document_cache import DocumentCache, ChunkResultCache, file_sha256
+from edumuse.tools.catalog import FileCatalog
+from edumuse.tools.question_bank import QUESTION_BANK_FILENAME, get_question_bank
+from edumuse.tools.adaptive_selection import DEFAULT_MAX_ITEMS, DEFAULT_TARGET_SE, load_item_pool, next_item
+from edumuse.tools.precompute import (ACCESS_LOG_FILENAME, DEFAULT_HOT_DOCUMENTS, DEFAULT_WINDOW_TOKENS, AccessLog,
+                                      PrecomputeScheduler, parse_windows)
+from edumuse.tools.blob_store import BlobStore
+from edumuse.tools.resumable_upload import ResumableUploads, UploadOffsetError, UploadTooLargeError
+from edumuse.tools.corpus_index import CorpusIndex
+from edumuse.tools.answer_cache import SemanticAnswerCache, DEFAULT_THRESHOLD
+from edumuse.tools.single_flight import SingleFlight
+from edumuse.tools.llm_gateway import get_gateway
+from edumuse.tools.fake_providers import LLM_PROVIDER, SEARCH_PROVIDER
+from edumuse.tools.linearize import linearize_pdf, linearizer_available, is_linearized
 from edumuse.flows.web_search_flow import WebSearchFlow
 from edumuse.flows.llm_knowledge_flow import LLMKnowledgeFlow
 from edumuse.flows.hybrid_retrieval_flow import HybridRetrievalFlow
 from edumuse.flows.assessment_flow import AssessmentFlow
-from edumuse.flows.summary_flow import SummaryFlow
+from edumuse.flows.summary_flow import SummaryFlow, SUMMARY_MODES, USER_LEVELS
+from edumuse.schemas import option_letter
 
 # Import QA pipeline components
 qa_pipeline_path = os.path.join(os.path.dirname(__file__), 'EduMUSE-ishika-qa-pipeline', 'multi_agent_pipeline')
@@ -23,7 +45,7 @@ sys.path.insert(0, qa_pipeline_path)
 from orchestrator.orchestrator import MultiAgentOrchestrator
 
 # --- Standard Flask Imports ---
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_file, make_response
 from flask_cors import CORS, cross_origin
 from werkzeug.utils import secure_filename
 
@@ -36,21 +58,341 @@ UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upload
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# Generated PDFs (summaries, assessments, answer keys) live apart from user uploads
+GENERATED_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generated')
+
+# Page text, chunk hashes and per-chunk flow outputs, shared across re-uploads
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Uploaded documents stored once per unique content; filenames are catalog aliases
+BLOB_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs')
+
+# SQLite catalog of uploads and derived artifacts backing the /files listing
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.db')
+
+for folder in (GENERATED_FOLDER, CACHE_FOLDER, BLOB_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+app.config['CACHE_FOLDER'] = CACHE_FOLDER
+app.config['BLOB_FOLDER'] = BLOB_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 
-def extract_text_from_pdf(filepath):
-    """Opens a PDF file and returns its text content."""
-    text = ""
+FILES_PAGE_SIZE = 100
+MAX_FILES_PAGE_SIZE = 500
+
+# Generated PDFs carry their content hash in the name, so their bytes never change
+ARTIFACT_HASH_PATTERN = re.compile(r'_([0-9a-f]{20})\.pdf$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Upload aliases can be re-pointed, so clients revalidate them (cheaply, via the ETag)
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Serve linearized copies of uploads when pikepdf or qpdf is installed (EDUMUSE_LINEARIZE=0 disables)
+LINEARIZE_UPLOADS = os.environ.get('EDUMUSE_LINEARIZE', '1') != '0' and linearizer_available()
+
+# /qa corpus search: `collection: "all"` searches every ingested upload
+ALL_UPLOADS_COLLECTION = 'all'
+CORPUS_TOP_K = 5
+MAX_CORPUS_TOP_K = 20
+
+# Rephrased questions about the same material reuse a verified answer at or above this similarity
+QA_CACHE_THRESHOLD = float(os.environ.get('EDUMUSE_QA_CACHE_THRESHOLD', DEFAULT_THRESHOLD))
+
+# Bump to invalidate cached flow results after prompt or flow changes
+FLOW_RESULT_CACHE_VERSION = 2
+
+# Upper bounds on /process assess num_questions and per-student variants
+MAX_ASSESSMENT_QUESTIONS = 50
+MAX_ASSESSMENT_VARIANTS = 200
+
+# What /adaptive/next shows a student; answers, explanations and rubrics stay in the bank
+STUDENT_QUESTION_FIELDS = {'question_type', 'text', 'options', 'bloom_level', 'difficulty', 'concept'}
+
+# /process actions and the flows that serve them
+ACTION_FLOWS = {
+    'highlight': 'highlight',
+    'search': 'web_search',
+    'explain': 'llm_knowledge',
+    'analyze': 'hybrid_retrieval',
+    'summarize': 'summary',
+    'assess': 'assessment'
+}
+
+# Popular document requests are precomputed during off-peak windows, e.g. "01:00-06:00,22:30-23:30",
+# spending at most EDUMUSE_PRECOMPUTE_TOKENS LLM tokens per window; no windows turns it off
+PRECOMPUTE_WINDOWS = parse_windows(os.environ.get('EDUMUSE_PRECOMPUTE_WINDOWS', ''))
+PRECOMPUTE_TOKENS = int(os.environ.get('EDUMUSE_PRECOMPUTE_TOKENS', DEFAULT_WINDOW_TOKENS))
+PRECOMPUTE_DOCUMENTS = int(os.environ.get('EDUMUSE_PRECOMPUTE_DOCUMENTS', DEFAULT_HOT_DOCUMENTS))
+
+document_cache = DocumentCache(CACHE_FOLDER)
+flow_result_cache = ChunkResultCache(CACHE_FOLDER, namespace='flow_results')
+blob_store = BlobStore(BLOB_FOLDER)
+corpus_index = CorpusIndex(CACHE_FOLDER)
+answer_cache = SemanticAnswerCache(threshold=QA_CACHE_THRESHOLD)
+# Identical requests arriving together (a class hitting "summarize" at once) share one LLM run
+qa_flight = SingleFlight()
+flow_flight = SingleFlight()
+# Partial uploads sit next to the blobs so finishing one is a rename, not a copy
+resumable_uploads = ResumableUploads(os.path.join(BLOB_FOLDER, 'incoming'), max_size=app.config['MAX_CONTENT_LENGTH'])
+catalog = FileCatalog(CATALOG_PATH)
+# Shared with AssessmentFlow, which opens the same file from the cache folder
+question_bank = get_question_bank(os.path.join(CACHE_FOLDER, QUESTION_BANK_FILENAME))
+access_log = AccessLog(os.path.join(CACHE_FOLDER, ACCESS_LOG_FILENAME))
+
+def register_artifact(filepath, **fields):
+    """Marks a rendered PDF as ready in the catalog, with its size, content hash and page count."""
     try:
-        with open(filepath, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() or ""
+        page_count = len(PyPDF2.PdfReader(filepath).pages)
+    except Exception as e:
+        print(f"Error counting pages of {filepath}: {e}")
+        page_count = None
+    catalog.upsert(os.path.basename(filepath), 'artifact', ingestion_state='ready', size=os.path.getsize(filepath),
+                   sha256=file_sha256(filepath), page_count=page_count, **fields)
+
+render_service = RenderService(upload_folder=GENERATED_FOLDER, on_rendered=register_artifact)
+ingestion_executor = ThreadPoolExecutor(max_workers=2)
+
+def request_key(params):
+    """Normalizes the parameters that determine a result into a stable key."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+def extract_pages_from_pdf(filepath):
+    """Returns the cached per-page text of a PDF, extracting only pages not seen before."""
+    try:
+        return document_cache.extract_pages(filepath)
     except Exception as e:
         print(f"Error extracting text from {filepath}: {e}")
         return None
-    return text
+
+def resolve_upload(filename):
+    """Returns (path, sha256) for an upload alias; legacy uploads live directly in uploads/."""
+    record = catalog.get(filename, kind='upload')
+    if record and blob_store.exists(record['sha256']):
+        return blob_store.path(record['sha256']), record['sha256']
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
+    if not os.path.exists(filepath):
+        return None, None
+    return filepath, (record or {}).get('sha256')
+
+def ingest_document(filename):
+    """Extracts and caches page text for an upload and records the result in the catalog."""
+    filepath, sha256 = resolve_upload(filename)
+    if filepath is None:
+        catalog.upsert(filename, 'upload', ingestion_state='failed')
+        return
+    sha256 = sha256 or file_sha256(filepath)
+    
+    # Another alias of the same content was already ingested: share its results
+    ingested = catalog.find_by_sha256(sha256, ingestion_state='ingested')
+    if ingested:
+        catalog.upsert(filename, 'upload', ingestion_state='ingested', page_count=ingested['page_count'], sha256=sha256)
+        return
+    
+    pages = extract_pages_from_pdf(filepath)
+    if pages is None:
+        catalog.upsert(filename, 'upload', ingestion_state='failed')
+        return
+    corpus_index.build_shard(sha256, pages)
+    catalog.upsert(filename, 'upload', ingestion_state='ingested', page_count=len(pages), sha256=sha256)
+    linearize_upload(filepath, sha256)
+
+def linearize_upload(filepath, sha256):
+    """Writes a fast-web-view copy for the viewer; the original stays the source for extraction."""
+    target = blob_store.linearized_path(sha256)
+    if not LINEARIZE_UPLOADS or os.path.exists(target) or is_linearized(filepath):
+        return
+    try:
+        linearize_pdf(filepath, target)
+    except Exception as e:
+        print(f"Error linearizing {filepath}: {e}")
+
+def corpus_documents(collection):
+    """Maps content hash -> filename for the ingested uploads in a collection, indexing any missing shards."""
+    if collection == ALL_UPLOADS_COLLECTION:
+        records, cursor = [], None
+        while True:
+            page, cursor = catalog.list_files('upload', limit=MAX_FILES_PAGE_SIZE, after=cursor)
+            records.extend(page)
+            if cursor is None:
+                break
+    else:
+        records = catalog.collection_files(collection)
+    
+    documents = {}
+    for record in records:
+        sha256 = record['sha256']
+        if record['ingestion_state'] != 'ingested' or not sha256 or sha256 in documents:
+            continue
+        # Documents ingested before the corpus index existed get their shard on first use
+        if not corpus_index.has_shard(sha256):
+            filepath, _ = resolve_upload(record['filename'])
+            pages = extract_pages_from_pdf(filepath) if filepath else None
+            if pages is None:
+                continue
+            corpus_index.build_shard(sha256, pages)
+        documents[sha256] = record['filename']
+    return documents
+
+def unique_alias(filename, sha256):
+    """Keeps an existing alias for the same content, otherwise picks a free name instead of overwriting."""
+    stem, extension = os.path.splitext(filename)
+    candidate, counter = filename, 1
+    while True:
+        existing_path, existing_sha256 = resolve_upload(candidate)
+        if existing_path is None:
+            return candidate
+        if (existing_sha256 or file_sha256(existing_path)) == sha256:
+            return candidate
+        counter += 1
+        candidate = f"{stem}_{counter}{extension}"
+
+# Register files that were on disk before the catalog existed and ingest new uploads
+catalog.sync_folder(GENERATED_FOLDER, kind='artifact')
+for synced_filename, synced_kind in catalog.sync_folder(UPLOAD_FOLDER, kind='upload'):
+    if synced_kind == 'upload':
+        ingestion_executor.submit(ingest_document, synced_filename)
+
+def extract_text_from_pdf(filepath, page_range=None):
+    """Opens a PDF file and returns its text content, optionally limited to a page range."""
+    pages = extract_pages_from_pdf(filepath)
+    if pages is None:
+        return None
+    return "".join(page['text'] for page in select_pages(pages, page_range))
+
+def parse_page_range(value):
+    """Validates a 1-based inclusive `pages: [start, end]` request field; None means the whole document."""
+    if value is None:
+        return None
+    if (not isinstance(value, (list, tuple)) or len(value) != 2
+            or not all(isinstance(number, int) and not isinstance(number, bool) for number in value)):
+        raise ValueError('pages must be [start, end]')
+    start, end = value
+    if start < 1 or end < start:
+        raise ValueError(f"Invalid page range: [{start}, {end}]")
+    return start, end
+
+def select_pages(pages, page_range):
+    """Keeps the cached pages inside the range, so nothing outside it is sent to a flow."""
+    if page_range is None:
+        return pages
+    start, end = page_range
+    selected = [page for page in pages if start <= page['page'] <= end]
+    if not selected:
+        raise ValueError(f"Page range [{start}, {end}] is outside the document ({len(pages)} pages)")
+    return selected
+
+def flow_context(document_hash, params, document_content, document_chunks):
+    """Builds the flow context for a request's normalized parameters."""
+    context = {
+        "user_level": params['user_level'],
+        "summary_mode": params['mode'],
+        "cache_folder": app.config['CACHE_FOLDER'],
+        "document_hash": document_hash,
+        "pages": params['pages'],
+        'document_content': document_content,
+        'document_chunks': document_chunks
+    }
+    # Options a request left out stay out, so the flows apply their own defaults
+    for name in ('num_questions', 'variants', 'variant_seed'):
+        if params.get(name) is not None:
+            context[name] = params[name]
+    return context
+
+def flow_result_key(document_hash, flow, params):
+    """Flow results are keyed by content, so every alias of a document shares them."""
+    return request_key({'document': document_hash, 'flow': flow, **params, 'version': FLOW_RESULT_CACHE_VERSION})
+
+def run_flow_cached(flow_cache_key, topic, flow, context):
+    """Runs a flow and caches a successful result; returns (result, shared) like SingleFlight.do."""
+    def run_flow():
+        edumuse = EduMUSE()
+        flow_result = edumuse.process_educational_request(
+            topic=topic,
+            requested_flows=[flow],
+            context=context
+        )
+        if not flow_result['educational_content'].get(flow, {}).get('type', '').endswith('_error'):
+            flow_result_cache.put(flow_cache_key, flow_result)
+        return flow_result
+    
+    # Duplicates that arrive while the flow runs wait for it
+    return flow_flight.do(flow_cache_key, run_flow)
+
+def artifact_key(action, flow_cache_key, title):
+    """PDFs depend on the exact flow result and the title printed on them."""
+    return request_key({'action': action, 'flow_result': flow_cache_key, 'title': title})
+
+def render_artifacts(action, flow_data, title, key, source_filename=None):
+    """Queues the PDFs of a summarize/assess result and records them under the request key."""
+    flow_data['topic'] = f"{action.capitalize()} of {title}"
+    if action == 'assess':
+        pdf_files = render_service.submit_assessment(flow_data)
+    else:
+        pdf_files = render_service.submit_summary(flow_data)
+    artifacts = {name: value for name, value in pdf_files.items()
+                 if name != 'render_job' and not name.endswith('_path')}
+    catalog.record_artifacts(key, artifacts)
+    for artifact in artifacts.values():
+        filepath = os.path.join(GENERATED_FOLDER, artifact)
+        record = catalog.get(artifact, kind='artifact')
+        # An identical render is already on disk, so no render callback will mark it ready
+        if os.path.exists(filepath) and not (record and record['sha256']):
+            register_artifact(filepath, source_filename=source_filename)
+        else:
+            # New rows stay 'pending' until the render callback marks them 'ready'
+            catalog.upsert(artifact, 'artifact', source_filename=source_filename)
+    return pdf_files, artifacts
+
+def rendered_artifacts(key):
+    """The artifacts recorded for a request key, if every file has been rendered."""
+    recorded = catalog.request_artifacts(key)
+    if recorded and all(os.path.exists(os.path.join(GENERATED_FOLDER, name)) for name in recorded['files'].values()):
+        return recorded
+    return None
+
+def precompute(task):
+    """Runs one off-peak task the way /process would, so the next request for it is a cache hit."""
+    filepath, _ = resolve_upload(task['filename'])
+    pages = extract_pages_from_pdf(filepath) if filepath else None
+    if pages is None:
+        raise ValueError(f"Could not read {task['filename']}")
+    document_hash = task['document_hash']
+    
+    if task['action'] == 'index':
+        warmed = not corpus_index.has_shard(document_hash)
+        if warmed:
+            corpus_index.build_shard(document_hash, pages)
+        if question_bank.count(document_hash):
+            load_item_pool(question_bank, document_hash)
+        return warmed
+    
+    params = task['params']
+    flow = ACTION_FLOWS[task['action']]
+    flow_cache_key = flow_result_key(document_hash, flow, params)
+    if flow_result_cache.get(flow_cache_key) is not None:
+        return False
+    
+    page_range = tuple(params['pages']) if params['pages'] else None
+    topic = task['filename']
+    if page_range:
+        pages = select_pages(pages, page_range)
+        topic = f"{task['filename']} (pages {page_range[0]}-{page_range[1]})"
+    context = flow_context(document_hash, {**params, 'pages': page_range},
+                           "".join(page['text'] for page in pages), document_cache.chunk_pages(pages))
+    result, _ = run_flow_cached(flow_cache_key, topic, flow, context)
+    flow_data = copy.deepcopy(result['educational_content'].get(flow, {}))
+    if flow_data.get('type', '').endswith('_error'):
+        raise RuntimeError(flow_data.get('content'))
+    render_artifacts(task['action'], flow_data, topic, artifact_key(task['action'], flow_cache_key, topic),
+                     source_filename=task['filename'])
+    return True
+
+precompute_scheduler = PrecomputeScheduler(access_log, precompute, PRECOMPUTE_WINDOWS, token_budget=PRECOMPUTE_TOKENS,
+                                           hot_documents=PRECOMPUTE_DOCUMENTS)
+# The debug reloader's parent process only watches files; precompute where requests are served
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    precompute_scheduler.start()
 
 @app.route('/upload', methods=['POST'])
 @cross_origin()
@@ -61,38 +403,206 @@ def upload_document():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     if file:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        return jsonify({
-            'message': 'PDF uploaded successfully',
-            'filename': filename,
-        }), 200
+        # Hash while streaming to disk; identical content is stored once whatever its name
+        sha256, size, created = blob_store.put_stream(file.stream)
+        return jsonify(register_upload(file.filename, sha256, size, created)), 200
     return jsonify({'error': 'Invalid file type.'}), 400
 
-@app.route('/files/<filename>')
+def register_upload(original_filename, sha256, size, created):
+    """Points a catalog alias at a stored blob and queues ingestion"""
+    filename = unique_alias(secure_filename(original_filename), sha256)
+    catalog.upsert(filename, 'upload', size=size, sha256=sha256)
+    ingestion_executor.submit(ingest_document, filename)
+    return {
+        'message': 'PDF uploaded successfully',
+        'filename': filename,
+        'sha256': sha256,
+        'deduplicated': not created
+    }
+
+# Resumable uploads: POST /uploads, then PUT chunks with ?offset=, then POST /uploads/<id>/complete.
+# After an interruption, GET /uploads/<id> returns the offset to continue from.
+@app.route('/uploads', methods=['POST'])
 @cross_origin()
+def create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename', ''))
+    if not filename:
+        return jsonify({'error': 'No file selected'}), 400
+    size = data.get('size')
+    if size is not None and (not isinstance(size, int) or size < 0):
+        return jsonify({'error': 'size must be a non-negative integer'}), 400
+    try:
+        return jsonify(resumable_uploads.create(filename, size)), 201
+    except UploadTooLargeError as e:
+        return jsonify({'error': str(e), 'limit': e.limit}), 413
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+@cross_origin()
+def upload_status(upload_id):
+    state = resumable_uploads.status(upload_id)
+    if state is None:
+        return jsonify({'error': f"Unknown upload: {upload_id}"}), 404
+    return jsonify(state), 200
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+@cross_origin()
+def upload_chunk(upload_id):
+    offset = request.args.get('offset', request.headers.get('Upload-Offset'))
+    if offset is None or not str(offset).isdigit():
+        return jsonify({'error': 'offset is required'}), 400
+    try:
+        # The raw body is copied to disk block by block; Werkzeug never buffers the chunk
+        new_offset = resumable_uploads.append(upload_id, int(offset), request.stream, request.content_length)
+    except KeyError:
+        return jsonify({'error': f"Unknown upload: {upload_id}"}), 404
+    except UploadOffsetError as e:
+        return jsonify({'error': str(e), 'offset': e.expected}), 409
+    except UploadTooLargeError as e:
+        # The chunk was discarded; the upload can still continue from the same offset
+        return jsonify({'error': str(e), 'limit': e.limit, 'offset': int(offset)}), 413
+    return jsonify({'upload_id': upload_id, 'offset': new_offset}), 200
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+@cross_origin()
+def complete_upload(upload_id):
+    try:
+        state = resumable_uploads.status(upload_id)
+        part_path, sha256, size = resumable_uploads.finish(upload_id)
+    except KeyError:
+        return jsonify({'error': f"Unknown upload: {upload_id}"}), 404
+    except UploadOffsetError as e:
+        return jsonify({'error': f"Upload incomplete: received {e.received} of {e.expected} bytes", 'offset': e.received}), 409
+    created = blob_store.commit(part_path, sha256)
+    return jsonify(register_upload(state['filename'], sha256, size, created)), 200
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+@cross_origin()
+def abort_upload(upload_id):
+    resumable_uploads.abort(upload_id)
+    return '', 204
+
+@app.route('/files/<filename>')
+@cross_origin(expose_headers=['Accept-Ranges', 'Content-Range', 'Content-Length', 'ETag'])
 def serve_file(filename):
-    """Serves a specific file from the uploads folder."""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Serves a specific file with Range, strong ETag and conditional GET support."""
+    filename = secure_filename(filename)
+    if render_service.is_pending(filename):
+        return jsonify({'status': 'rendering', 'filename': filename}), 202
+    
+    generated_path = os.path.join(app.config['GENERATED_FOLDER'], filename)
+    artifact_hash = ARTIFACT_HASH_PATTERN.search(filename)
+    if os.path.exists(generated_path) and artifact_hash:
+        return send_pdf(generated_path, filename, artifact_hash.group(1), IMMUTABLE_CACHE_CONTROL)
+    
+    filepath, sha256 = resolve_upload(filename)
+    if filepath is None:
+        return jsonify({'error': f"File not found: {filename}"}), 404
+    if sha256 and os.path.exists(blob_store.linearized_path(sha256)):
+        return send_pdf(blob_store.linearized_path(sha256), filename, f"{sha256}-linear", REVALIDATE_CACHE_CONTROL)
+    return send_pdf(filepath, filename, sha256, REVALIDATE_CACHE_CONTROL)
+
+def send_pdf(filepath, filename, etag, cache_control):
+    """send_file handles Range and If-None-Match/If-Range; we supply the content hash as a strong ETag"""
+    response = send_file(
+        filepath,
+        mimetype='application/pdf',
+        download_name=filename,
+        conditional=True,
+        etag=etag or True
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 @app.route('/files', methods=['GET'])
 @cross_origin()
 def list_files():
-    """Lists all PDF files in the uploads folder."""
+    """Lists cataloged files one page at a time (?kind=upload|artifact&limit=&cursor=)."""
     try:
-        files = []
-        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-            if filename.lower().endswith('.pdf'):
-                files.append({'filename': filename})
-        return jsonify({'files': files}), 200
+        kind = request.args.get('kind', 'upload')
+        if kind not in ('upload', 'artifact'):
+            return jsonify({'error': f"Invalid kind: {kind}"}), 400
+        try:
+            limit = min(int(request.args.get('limit', FILES_PAGE_SIZE)), MAX_FILES_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        cursor = request.args.get('cursor')
+        
+        # The catalog version changes on every write, so it identifies this page's content
+        etag = request_key({'version': catalog.version(), 'kind': kind, 'limit': limit, 'cursor': cursor})[:32]
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        rows, next_cursor = catalog.list_files(kind=kind, limit=limit, after=cursor)
+        files = [{
+            'filename': row['filename'],
+            'size': row['size'],
+            'sha256': row['sha256'],
+            'page_count': row['page_count'],
+            'ingestion_state': row['ingestion_state']
+        } for row in rows]
+        
+        response = make_response(jsonify({'files': files, 'next_cursor': next_cursor}), 200)
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/collections', methods=['GET'])
+@cross_origin()
+def list_collections():
+    return jsonify({'collections': catalog.list_collections()}), 200
+
+@app.route('/collections/<name>', methods=['GET'])
+@cross_origin()
+def get_collection(name):
+    files = catalog.collection_files(name)
+    return jsonify({'name': name, 'files': files}), 200
+
+@app.route('/collections/<name>', methods=['POST', 'DELETE'])
+@cross_origin()
+def update_collection(name):
+    """POST adds and DELETE removes `{"filenames": [...]}` from a named collection (e.g. a course)."""
+    if name == ALL_UPLOADS_COLLECTION:
+        return jsonify({'error': f"'{ALL_UPLOADS_COLLECTION}' is reserved for every upload"}), 400
+    filenames = (request.get_json(silent=True) or {}).get('filenames')
+    if not isinstance(filenames, list) or not filenames:
+        return jsonify({'error': 'filenames must be a non-empty list'}), 400
+    
+    if request.method == 'DELETE':
+        catalog.remove_from_collection(name, filenames)
+    else:
+        unknown = [filename for filename in filenames if catalog.get(filename, kind='upload') is None]
+        if unknown:
+            return jsonify({'error': f"Unknown uploads: {unknown}"}), 404
+        catalog.add_to_collection(name, filenames)
+    return jsonify({'name': name, 'files': catalog.collection_files(name)}), 200
+
+@app.route('/renders/<job_id>', methods=['GET'])
+@cross_origin()
+def render_status(job_id):
+    """Reports whether the PDFs of a /process render job are ready."""
+    status = render_service.job_status(job_id)
+    if status is None:
+        return jsonify({'error': f"Unknown render job: {job_id}"}), 404
+    return jsonify(status), 200
+
 @app.route('/health', methods=['GET'])
 @cross_origin()
 def health_check():
-    return jsonify({'status': 'healthy'}), 200
+    return jsonify({
+        'status': 'healthy',
+        'single_flight': {'qa': qa_flight.stats(), 'process': flow_flight.stats()},
+        'llm_gateway': get_gateway().stats(),
+        'question_bank': question_bank.stats(),
+        'precompute': precompute_scheduler.stats(),
+        'providers': {'llm': LLM_PROVIDER, 'search': SEARCH_PROVIDER}
+    }), 200
 
 @app.route('/qa', methods=['POST'])
 @cross_origin()
@@ -105,21 +615,67 @@ def qa_endpoint():
         if not query:
             return jsonify({'error': 'No query provided'}), 400
         
+        try:
+            page_range = parse_page_range(data.get('pages'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        cache_threshold = data.get('cache_threshold')
+        if cache_threshold is not None and (not isinstance(cache_threshold, (int, float)) or not 0 < cache_threshold <= 1):
+            return jsonify({'error': 'cache_threshold must be in (0, 1]'}), 400
+        
         print(f"QA request received - Query: {query}, Context: {context}")
         
         # Initialize the QA orchestrator
         orchestrator = MultiAgentOrchestrator()
         
+        # A collection searches the per-document shards of every file in it
+        collection = data.get('collection')
+        if collection:
+            top_k = data.get('top_k', CORPUS_TOP_K)
+            if not isinstance(top_k, int) or not 1 <= top_k <= MAX_CORPUS_TOP_K:
+                return jsonify({'error': f"top_k must be between 1 and {MAX_CORPUS_TOP_K}"}), 400
+            documents = corpus_documents(collection)
+            if not documents:
+                return jsonify({'error': f"No ingested documents in collection: {collection}"}), 404
+            
+            scope = request_key({'documents': sorted(documents), 'top_k': top_k})
+            cached = lookup_answer(query, scope, data)
+            if cached:
+                return jsonify(cached), 200
+            
+            passages = corpus_index.search(query, documents, top_k=top_k)
+            snippets = [f"[{p['filename']}, page {p['page']}] {p['text']}" for p in passages]
+            result = run_qa(orchestrator, query, scope, query, retrieved_snippets=snippets)
+            response = {
+                'answer': result.get('answer_text', ''),
+                'visuals': result.get('visuals'),
+                'sources': result.get('sources', []),
+                'citations': [{key: p[key] for key in ('filename', 'page', 'score')} for p in passages],
+                'documents_searched': len(documents),
+                'verified': result.get('verified', False)
+            }
+            store_answer(query, scope, response)
+            return jsonify(response), 200
+        
         # If context is provided (a PDF filename), extract the text from the PDF
         if context:
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], context)
+            filepath, document_hash = resolve_upload(context)
             print(f"Looking for file at: {filepath}")
             
-            if not os.path.exists(filepath):
+            if filepath is None:
                 return jsonify({'error': f"File not found: {context}"}), 404
             
+            scope = request_key({'document': document_hash or file_sha256(filepath), 'pages': page_range})
+            cached = lookup_answer(query, scope, data)
+            if cached:
+                return jsonify(cached), 200
+            
             print(f"File found, extracting text...")
-            text_from_pdf = extract_text_from_pdf(filepath)
+            try:
+                text_from_pdf = extract_text_from_pdf(filepath, page_range)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
             if text_from_pdf is None:
                 return jsonify({'error': f"Could not extract text from {context}"}), 500
@@ -134,10 +690,14 @@ def qa_endpoint():
             # If no context is provided, just use the query
             input_for_qa = query
             print(f"No context provided, using query directly")
+            scope = request_key({'document': None})
+            cached = lookup_answer(query, scope, data)
+            if cached:
+                return jsonify(cached), 200
         
         # Run the QA pipeline
         print(f"Calling orchestrator.run()...")
-        result = orchestrator.run(input_for_qa)
+        result = run_qa(orchestrator, query, scope, input_for_qa)
         print(f"Orchestrator result received: {result}")
         
         # Format the response
@@ -147,6 +707,7 @@ def qa_endpoint():
             'sources': result.get('sources', []),
             'verified': result.get('verified', False)
         }
+        store_answer(query, scope, response)
         
         return jsonify(response), 200
         
@@ -156,6 +717,118 @@ def qa_endpoint():
         return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
 
 
+def run_qa(orchestrator, query, scope, *args, **kwargs):
+    """Runs the QA pipeline once per (scope, question), however many callers ask the same question at the same time."""
+    # Only case and whitespace are ignored; differently worded questions get their own run
+    key = request_key({'scope': scope, 'question': ' '.join(query.lower().split())})
+    result, _ = qa_flight.do(key, lambda: orchestrator.run(*args, **kwargs))
+    return result
+
+def lookup_answer(query, scope, data):
+    """Returns a cached verified answer for this question (or a rephrasing of it), unless the caller opts out."""
+    if data.get('cache') is False:
+        return None
+    hit = answer_cache.get(query, scope, threshold=data.get('cache_threshold'))
+    if hit is None:
+        return None
+    answer, similarity = hit
+    print(f"QA cache hit (similarity {similarity:.3f})")
+    return {**answer, 'cache_hit': True, 'cache_similarity': round(similarity, 4)}
+
+def store_answer(query, scope, response):
+    # Unverified answers are never served to other students
+    if response.get('verified'):
+        answer_cache.put(query, scope, response)
+
+@app.route('/qa/cache', methods=['GET'])
+@cross_origin()
+def qa_cache_stats():
+    return jsonify(answer_cache.stats()), 200
+
+@app.route('/adaptive/next', methods=['POST'])
+@cross_origin()
+def adaptive_next():
+    """Scores an adaptive practice session so far and picks the next banked question.
+
+    The client keeps the session: it sends every response so far as
+    {"id", "answer"} (multiple choice, graded against the bank) or {"id", "correct"}.
+    No LLM is called; questions come from those banked by earlier assessments.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename')
+    input_text = data.get('text')
+    responses = data.get('responses', [])
+    question_types = data.get('question_types', ['multiple_choice'])
+    max_items = data.get('max_items', DEFAULT_MAX_ITEMS)
+    target_se = data.get('target_se', DEFAULT_TARGET_SE)
+    
+    try:
+        page_range = parse_page_range(data.get('pages'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not isinstance(responses, list) or not all(
+            isinstance(response, dict) and isinstance(response.get('id'), int) and not isinstance(response['id'], bool)
+            for response in responses):
+        return jsonify({'error': 'responses must be a list of {"id", "answer"} or {"id", "correct"} objects with integer ids'}), 400
+    if not isinstance(question_types, list) or not question_types:
+        return jsonify({'error': 'question_types must be a non-empty list'}), 400
+    if not isinstance(max_items, int) or isinstance(max_items, bool) or max_items < 1:
+        return jsonify({'error': 'max_items must be a positive integer'}), 400
+    if not isinstance(target_se, (int, float)) or isinstance(target_se, bool) or target_se <= 0:
+        return jsonify({'error': 'target_se must be a positive number'}), 400
+    
+    if filename:
+        filepath, document_hash = resolve_upload(filename)
+        if filepath is None:
+            return jsonify({'error': f"File not found: {filename}"}), 404
+        document_hash = document_hash or file_sha256(filepath)
+    elif input_text:
+        document_hash = hashlib.sha256(input_text.encode('utf-8')).hexdigest()
+    else:
+        return jsonify({'error': 'No input provided (missing "filename" or "text")'}), 400
+    
+    pool = load_item_pool(question_bank, document_hash, pages=page_range)
+    if not len(pool):
+        return jsonify({'error': 'No banked questions for this content yet; run an "assess" action first'}), 404
+    
+    # Grade multiple choice answers against the bank; other types must say whether they were correct
+    answered = question_bank.questions(response['id'] for response in responses)
+    scored = []
+    for response in responses:
+        question = answered.get(response['id'])
+        if question is None or response['id'] not in pool.positions:
+            return jsonify({'error': f"Unknown question id for this content: {response['id']}"}), 400
+        if 'correct' in response:
+            correct = bool(response['correct'])
+        elif question.question_type == 'multiple_choice' and question.answer:
+            # Both sides as option letters, so "b", "B) Paris" and "Paris" all match an answer of "B"
+            key = option_letter(question.answer, question.options) or question.answer.strip().upper()
+            given = str(response.get('answer', ''))
+            correct = (option_letter(given, question.options) or given.strip().upper()) == key
+        else:
+            return jsonify({'error': f"Question {response['id']} is not multiple choice; send \"correct\""}), 400
+        scored.append((response['id'], correct))
+    
+    start = time.perf_counter()
+    selection = next_item(pool, scored, max_items=max_items, target_se=target_se, question_types=question_types)
+    selection_ms = (time.perf_counter() - start) * 1000
+    
+    question = None
+    if selection['next_item'] is not None:
+        banked = question_bank.questions([selection['next_item']])[selection['next_item']]
+        question = {'id': selection['next_item'], **banked.model_dump(include=STUDENT_QUESTION_FIELDS)}
+    
+    return jsonify({
+        'theta': round(selection['theta'], 3),
+        'standard_error': round(selection['standard_error'], 3),
+        'answered': len(scored),
+        'correct': sum(correct for _, correct in scored),
+        'done': question is None,
+        'question': question,
+        'pool_size': len(pool),
+        'selection_ms': round(selection_ms, 3)
+    }), 200
+
 @app.route('/process', methods=['POST'])
 @cross_origin()
 def process_text():
@@ -164,69 +837,147 @@ def process_text():
         action = data.get('action')
         filename = data.get('filename')
         input_text = data.get('text')
+        user_level = data.get('user_level', 'intermediate')
+        summary_mode = data.get('mode', 'thorough')
+        
+        if summary_mode not in SUMMARY_MODES:
+            return jsonify({'error': f"Invalid mode: {summary_mode}"}), 400
+        # The level also scopes the question bank and the caches, so only known levels are accepted
+        if user_level not in USER_LEVELS:
+            return jsonify({'error': f"Invalid user_level: {user_level}; expected one of {', '.join(USER_LEVELS)}"}), 400
+        
+        try:
+            page_range = parse_page_range(data.get('pages'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         text_for_flow = ""
         topic_for_crew = ""
+        chunks_for_flow = None
+        document_hash = None
 
         # This logic now correctly sets the topic and content for both workflows
         if filename:
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if not os.path.exists(filepath):
+            filepath, document_hash = resolve_upload(filename)
+            if filepath is None:
                 return jsonify({'error': f"File not found: {filename}"}), 404
+            document_hash = document_hash or file_sha256(filepath)
             
-            text_for_flow = extract_text_from_pdf(filepath)
+            pages = extract_pages_from_pdf(filepath)
             topic_for_crew = filename  # For whole file, topic is the filename
             
-            if text_for_flow is None:
+            if pages is None:
                 return jsonify({'error': f"Could not extract text from {filename}"}), 500
+            
+            # A chapter request only sends its own pages (and their chunks) to the flow
+            if page_range:
+                try:
+                    pages = select_pages(pages, page_range)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                topic_for_crew = f"{filename} (pages {page_range[0]}-{page_range[1]})"
+            
+            text_for_flow = "".join(page['text'] for page in pages)
+            chunks_for_flow = document_cache.chunk_pages(pages)
         elif input_text:
             text_for_flow = input_text
             topic_for_crew = input_text  # For highlighted text, the topic IS the text
+            document_hash = hashlib.sha256(input_text.encode('utf-8')).hexdigest()
         else:
             return jsonify({'error': 'No input provided (missing "filename" or "text")'}), 400
+        
+        if page_range and not filename:
+            return jsonify({'error': 'pages can only be used with "filename"'}), 400
 
-        flow_mapping = {
-            'highlight': 'highlight',
-            'search': 'web_search',
-            'explain': 'llm_knowledge',
-            'analyze': 'hybrid_retrieval',
-            'summarize': 'summary',
-            'assess': 'assessment'
-        }
-        flow = flow_mapping.get(action)
+        flow = ACTION_FLOWS.get(action)
         if not flow:
             return jsonify({'error': f"Invalid action: {action}"}), 400
         
-        context = {
-            "user_level": "intermediate",
-            'document_content': text_for_flow
-        }
+        # The options that determine the result; they key the flow cache and the access log
+        params = {'pages': page_range, 'mode': summary_mode, 'user_level': user_level,
+                  'num_questions': None, 'variants': None, 'variant_seed': None}
         
-        edumuse = EduMUSE()
-        result = edumuse.process_educational_request(
-            topic=topic_for_crew, # Use the correctly determined topic
-            requested_flows=[flow],
-            context=context
-        )
+        # Assessments are assembled from the question bank unless the caller asks for new questions
+        if action == 'assess':
+            num_questions = data.get('num_questions', 10)
+            if (not isinstance(num_questions, int) or isinstance(num_questions, bool)
+                    or not 1 <= num_questions <= MAX_ASSESSMENT_QUESTIONS):
+                return jsonify({'error': f"num_questions must be an integer from 1 to {MAX_ASSESSMENT_QUESTIONS}"}), 400
+            params['num_questions'] = num_questions
+            # A class set: one question pool, then a shuffled, re-keyed quiz per student
+            variants = data.get('variants', 1)
+            if (not isinstance(variants, int) or isinstance(variants, bool)
+                    or not 1 <= variants <= MAX_ASSESSMENT_VARIANTS):
+                return jsonify({'error': f"variants must be an integer from 1 to {MAX_ASSESSMENT_VARIANTS}"}), 400
+            variant_seed = data.get('variant_seed', 0)
+            if not isinstance(variant_seed, int) or isinstance(variant_seed, bool):
+                return jsonify({'error': 'variant_seed must be an integer'}), 400
+            if variants > 1:
+                params['variants'] = variants
+                params['variant_seed'] = variant_seed
+        
+        context = flow_context(document_hash, params, text_for_flow, chunks_for_flow)
+        if action == 'assess':
+            context['reuse_questions'] = not data.get('new_questions')
+        
+        # Uploaded documents feed the off-peak precompute scheduler's popularity counts; without
+        # windows nothing would read or prune the log, so nothing is recorded
+        if filename and PRECOMPUTE_WINDOWS:
+            access_log.record(document_hash, filename, action, params)
+        
+        flow_cache_key = flow_result_key(document_hash, flow, params)
+        fresh = data.get('refresh') or data.get('new_questions')
+        result = None if fresh else flow_result_cache.get(flow_cache_key)
+        
+        if result is not None:
+            result['topic'] = topic_for_crew
+            result['cache_hit'] = True
+        else:
+            # Each request gets its own copy of a shared result to annotate
+            result, shared = run_flow_cached(flow_cache_key, topic_for_crew, flow, context)
+            result = copy.deepcopy(result)
+            result['topic'] = topic_for_crew
+            if shared:
+                result['coalesced'] = True
 
-        # PDF generation logic for summarize/assess actions
+        # PDF generation logic for summarize/assess actions; rendering runs in the
+        # background unless the caller asks to wait for the files
         if action in ['assess', 'summarize']:
             try:
-                pdf_generator = PDFGenerator(upload_folder=app.config['UPLOAD_FOLDER'])
                 flow_data = result['educational_content'].get(flow, {})
                 
                 # Use the original filename or a generic title for the PDF
-                pdf_topic_title = filename if filename else f"{action.capitalize()} Result"
-                flow_data['topic'] = f"{action.capitalize()} of {pdf_topic_title}"
-
-                if action == 'assess':
-                    pdf_files = pdf_generator.generate_assessment_pdfs(flow_data)
-                elif action == 'summarize':
-                    pdf_files = pdf_generator.generate_summary_pdf(flow_data)
-
-                if pdf_files:
-                    result['pdf_files'] = {**pdf_files, 'generated_at': datetime.now().isoformat()}
+                pdf_topic_title = topic_for_crew if filename else f"{action.capitalize()} Result"
+                key = artifact_key(action, flow_cache_key, pdf_topic_title)
+                
+                # A repeat served from the flow cache reuses its rendered PDFs without preparing them again
+                recorded = rendered_artifacts(key) if result.get('cache_hit') else None
+                if recorded:
+                    flow_data['topic'] = f"{action.capitalize()} of {pdf_topic_title}"
+                    result['pdf_files'] = {
+                        **recorded['files'],
+                        'urls': {name: f"/files/{value}" for name, value in recorded['files'].items()},
+                        'request_key': key,
+                        'generated_at': recorded['recorded_at']
+                    }
+                    result['pdf_generated'] = True
+                    result['pdf_status'] = 'done'
+                else:
+                    pdf_files, artifacts = render_artifacts(action, flow_data, pdf_topic_title, key,
+                                                            source_filename=filename)
+                    job_id = pdf_files['render_job']
+                    if data.get('wait_for_pdf'):
+                        render_service.wait(job_id)
+                    result['pdf_files'] = {
+                        **pdf_files,
+                        'urls': {name: f"/files/{value}" for name, value in artifacts.items()},
+                        'status_url': f"/renders/{job_id}",
+                        'request_key': key,
+                        'generated_at': datetime.now().isoformat()
+                    }
+                    # The PDFs are on their way; pdf_status says whether they are ready yet
                     result['pdf_generated'] = True
+                    result['pdf_status'] = render_service.job_status(job_id)['status']
             except Exception as e:
                 result['pdf_error'] = str(e)
         